@@ -0,0 +1,615 @@
+"""
+网页存档仓库 - 按内容寻址去重，WARC 风格的分段追加存储
+
+正文按内容摘要只保存一份：摘要对去掉了每次请求都不同的值（CSP nonce、会话ID、服务器时间等，
+见 VOLATILE_PATTERNS）的正文计算 SHA-256，同一页面多次抓取只存第一次的原始正文；
+正文作为一条 WARC resource 记录追加到滚动的段文件
+（segments/archive-00000.warc.gz，超过 SEGMENT_MAX_BYTES 换下一个），
+每条记录单独压缩（默认 gzip，ARCHIVE_CODEC=zst 时用 zstd），可以从记录起点直接解压
+index.bin 为按内容摘要排序的定长索引：哈希 -> (段号, 偏移, 长度)，读取时内存映射后二分查找，
+取正文只需一次 seek
+每次存档在 manifest.jsonl 追加一行（URL、项目ID、时间、响应头、内容摘要 sha256、原始正文哈希 body_sha256）；
+页面未变化时再次存档只需算一次哈希、写一行记录
+keys.bin 为存档记录的键索引：URL / 项目ID / 旧文件名的哈希 -> 该行在 manifest.jsonl 中的位置，
+按 URL、项目查存档记录时只读命中的行，不必解析整个 manifest
+
+旧格式 <项目>_<时间>_<哈希>.html/.json 的迁移: python archive_store.py migrate
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from datetime import datetime
+
+# zstd 压缩率和速度都优于 gzip，但只在显式开启时使用（见 ARCHIVE_CODEC）
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_ARCHIVE_DIR = 'web_archives'
+MANIFEST_FILE = 'manifest.jsonl'
+INDEX_FILE = 'index.bin'
+KEY_INDEX_FILE = 'keys.bin'
+SEGMENT_DIR = 'segments'
+
+# 段文件达到该大小后新开一个
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+
+# 存档记录里保留的响应头
+KEPT_HEADERS = ('Content-Type', 'Content-Length', 'Content-Encoding', 'ETag', 'Last-Modified', 'Date', 'Server')
+
+# 新写入记录的压缩方式：默认 gz 只依赖标准库；设为 zst 时写入和读取存档的每个环境都要装 zstandard，
+# 否则在没装的环境里读到 zst 记录会报错
+CODECS = ('gz', 'zst')
+ARCHIVE_CODEC = os.environ.get('ARCHIVE_CODEC', 'gz')
+
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# 索引记录: 内容摘要(32字节) + 段号 + 偏移 + 长度，按哈希排序
+_INDEX_RECORD = struct.Struct('>32sIQI')
+
+# 键索引记录: 键哈希(16字节) + manifest 行偏移 + 行长度，按 (键哈希, 偏移) 排序；
+# 文件头为魔数 + 已索引到的 manifest 字节数
+_KEY_RECORD = struct.Struct('>16sQI')
+_KEY_HEADER = struct.Struct('>8sQ')
+_KEY_MAGIC = b'ARCKEY01'
+
+# 键索引之后新增的记录先放在内存里，攒够这么多条再合并重写索引文件
+KEY_INDEX_MERGE = 512
+
+_SHA256 = re.compile(r'[0-9a-f]{64}$')
+
+_SEGMENT_NAME = re.compile(r'archive-(\d{5})\.warc\.(gz|zst)$')
+
+# 旧格式文件名: <项目ID>_<YYYYmmdd_HHMMSS>_<URL的md5前8位>.html
+_LEGACY_NAME = re.compile(r'(?P<project>.+)_(?P<time>\d{8}_\d{6})_(?P<url_hash>[0-9a-f]{8})\.html$')
+
+# 每次请求都会变的值（微信公众号页面的 CSP nonce、会话ID、服务器时间等），算内容摘要前替换掉
+VOLATILE_PATTERNS = (
+    (re.compile(rb'\bnonce="[^"]*"'), b'nonce=""'),
+    (re.compile(rb"""setAttribute\((['"])nonce\1,\s*(['"])[^'"]*\2\)"""), b"setAttribute('nonce', '')"),
+    (re.compile(rb'\b(sessionid|svr_time|svrDate|req_id|csp_nonce_str|enterid|cap_sid|poc_sid|poc_token)'
+                rb'(\s*[:=])[^;\n]*'), rb'\1\2'),
+)
+
+
+class SegmentIndex:
+    """
+    内容摘要 -> (段号, 偏移, 长度) 的定长排序索引
+    查找时内存映射文件二分查找；新增时整体重写（条目数在万级以内，代价可以忽略）
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mm = None
+        self._count = 0
+        self._open()
+
+    def _open(self):
+        self.close()
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._count = len(self._mm) // _INDEX_RECORD.size
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = None
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _key(self, position):
+        start = position * _INDEX_RECORD.size
+        return self._mm[start:start + 32]
+
+    def _bisect(self, digest):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < digest:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, digest):
+        """返回 (段号, 偏移, 长度)，不存在返回 None"""
+        position = self._bisect(digest)
+        if position >= self._count or self._key(position) != digest:
+            return None
+        start = position * _INDEX_RECORD.size
+        _, segment, offset, length = _INDEX_RECORD.unpack_from(self._mm, start)
+        return segment, offset, length
+
+    def add(self, digest, segment, offset, length):
+        position = self._bisect(digest)
+        data = self._mm[:] if self._mm is not None else b''
+        split = position * _INDEX_RECORD.size
+        record = _INDEX_RECORD.pack(digest, segment, offset, length)
+        self.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data[:split] + record + data[split:])
+        os.replace(tmp_path, self.path)
+        self._open()
+
+
+def is_sha256(value):
+    """是否为内容摘要（64位十六进制）"""
+    return bool(value) and _SHA256.match(value) is not None
+
+
+def content_digest(body):
+    """正文的内容摘要（去掉 VOLATILE_PATTERNS 后的 SHA-256），作为去重和读取的键"""
+    for pattern, replacement in VOLATILE_PATTERNS:
+        body = pattern.sub(replacement, body)
+    return hashlib.sha256(body).hexdigest()
+
+
+def key_digest(kind, value):
+    """键索引中的键：kind 为 url / project / legacy"""
+    return hashlib.blake2b(f'{kind}\0{value}'.encode('utf-8'), digest_size=16).digest()
+
+
+def _entry_keys(entry):
+    keys = [key_digest('url', entry.get('url', '')), key_digest('project', entry.get('project_id', ''))]
+    if entry.get('legacy_file'):
+        keys.append(key_digest('legacy', entry['legacy_file']))
+    return keys
+
+
+class ManifestIndex:
+    """
+    存档记录的键索引：键哈希 -> manifest.jsonl 中各行的 (偏移, 长度)
+    定长记录按 (键哈希, 偏移) 排序，内存映射后二分查找，同一键的记录按写入顺序（即时间顺序）相邻；
+    索引文件之后追加的行（包括其他进程写入的）在查找时增量读入内存，攒够 KEY_INDEX_MERGE 条再合并重写
+    """
+
+    def __init__(self, path, manifest_path):
+        self.path = path
+        self.manifest_path = manifest_path
+        self._lock = threading.Lock()
+        self._mm = None
+        self._count = 0
+        self._covered = 0
+        self._open()
+
+    def _open(self):
+        self.close()
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= _KEY_HEADER.size:
+            with open(self.path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, covered = _KEY_HEADER.unpack_from(mm, 0)
+            if magic == _KEY_MAGIC:
+                self._mm = mm
+                self._covered = covered
+                self._count = (len(mm) - _KEY_HEADER.size) // _KEY_RECORD.size
+            else:
+                mm.close()
+        self._tail = {}  # 键哈希 -> [(偏移, 长度)]
+        self._tail_count = 0
+        self._tail_end = self._covered
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = None
+        self._count = 0
+        self._covered = 0
+
+    def _record(self, position):
+        return _KEY_RECORD.unpack_from(self._mm, _KEY_HEADER.size + position * _KEY_RECORD.size)
+
+    def _bisect(self, key):
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _refresh(self):
+        """读入 manifest 中还没有索引的行"""
+        size = os.path.getsize(self.manifest_path) if os.path.exists(self.manifest_path) else 0
+        if size < self._tail_end:
+            # manifest 被替换过，索引作废，从头重建
+            self.close()
+            self._tail, self._tail_count, self._tail_end = {}, 0, 0
+        if size == self._tail_end:
+            return
+        offset = self._tail_end
+        with open(self.manifest_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # 其他进程正在写的行，下次再读
+                if line.strip():
+                    for key in _entry_keys(json.loads(line)):
+                        self._tail.setdefault(key, []).append((offset, len(line)))
+                        self._tail_count += 1
+                offset += len(line)
+        self._tail_end = offset
+        if self._tail_count >= KEY_INDEX_MERGE:
+            self._merge()
+
+    def _merge(self):
+        """把内存中的新记录合并进索引文件（整体重写，原子替换）"""
+        records = [self._record(position) for position in range(self._count)]
+        records += [(key, offset, length) for key, items in self._tail.items() for offset, length in items]
+        records.sort()
+        covered = self._tail_end
+        self.close()
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_KEY_HEADER.pack(_KEY_MAGIC, covered))
+            for record in records:
+                f.write(_KEY_RECORD.pack(*record))
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    def lookup(self, key):
+        """返回该键对应的 manifest 行位置 [(偏移, 长度), ...]，按写入顺序"""
+        with self._lock:
+            self._refresh()
+            found = []
+            position = self._bisect(key) if self._mm is not None else 0
+            while position < self._count:
+                record_key, offset, length = self._record(position)
+                if record_key != key:
+                    break
+                found.append((offset, length))
+                position += 1
+            found.extend(self._tail.get(key, ()))
+            return found
+
+
+class _RecordReader(io.RawIOBase):
+    """只读出记录里的正文部分（去掉 WARC 头和结尾的空行）"""
+
+    def __init__(self, stream, length):
+        self._stream = stream
+        self._remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            return 0
+        data = self._stream.read(min(len(buffer), self._remaining))
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self._stream.close()
+        super().close()
+
+
+class ArchiveStore:
+    """内容寻址的网页存档"""
+
+    def __init__(self, archive_dir=DEFAULT_ARCHIVE_DIR, codec=None):
+        self.codec = codec or ARCHIVE_CODEC
+        if self.codec not in CODECS:
+            raise ValueError(f'不支持的存档压缩方式: {self.codec}（可选 {", ".join(CODECS)}）')
+        if self.codec == 'zst' and zstandard is None:
+            raise ImportError('ARCHIVE_CODEC=zst 需要 zstandard: pip install zstandard')
+        self.archive_dir = archive_dir
+        self.segment_dir = os.path.join(archive_dir, SEGMENT_DIR)
+        self.manifest_path = os.path.join(archive_dir, MANIFEST_FILE)
+        self._lock = threading.Lock()
+        os.makedirs(self.segment_dir, exist_ok=True)
+        self.index = SegmentIndex(os.path.join(archive_dir, INDEX_FILE))
+        self.keys = ManifestIndex(os.path.join(archive_dir, KEY_INDEX_FILE), self.manifest_path)
+        self._segments = {}  # 段号 -> 文件路径
+        for name in os.listdir(self.segment_dir):
+            match = _SEGMENT_NAME.match(name)
+            if match:
+                self._segments[int(match.group(1))] = os.path.join(self.segment_dir, name)
+
+    def segment_path(self, segment):
+        return self._segments[segment]
+
+    def locate(self, sha256):
+        """正文所在位置 (段文件路径, 偏移, 长度)，不存在返回 None"""
+        found = self.index.lookup(bytes.fromhex(sha256))
+        if found is None:
+            return None
+        segment, offset, length = found
+        return self.segment_path(segment), offset, length
+
+    def has(self, sha256):
+        return self.index.lookup(bytes.fromhex(sha256)) is not None
+
+    def _current_segment(self, codec):
+        """当前可追加的段：最后一段未写满且压缩方式一致时继续用，否则新开一段"""
+        if self._segments:
+            last = max(self._segments)
+            path = self._segments[last]
+            if path.endswith('.' + codec) and os.path.getsize(path) < SEGMENT_MAX_BYTES:
+                return last
+            segment = last + 1
+        else:
+            segment = 0
+        self._segments[segment] = os.path.join(self.segment_dir, f'archive-{segment:05d}.warc.{codec}')
+        return segment
+
+    def _append_record(self, sha256, body, url, archive_time, content_type, body_sha256=None):
+        segment = self._current_segment(self.codec)
+        header = (
+            'WARC/1.1\r\n'
+            'WARC-Type: resource\r\n'
+            f'WARC-Record-ID: <urn:sha256:{sha256}>\r\n'
+            f'WARC-Date: {archive_time}\r\n'
+            f'WARC-Target-URI: {url}\r\n'
+            f'WARC-Payload-Digest: sha256:{body_sha256 or sha256}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            '\r\n'
+        ).encode('utf-8')
+        record = compress(header + body + b'\r\n\r\n', self.codec)
+        with open(self.segment_path(segment), 'ab') as f:
+            offset = f.tell()
+            f.write(record)
+        self.index.add(bytes.fromhex(sha256), segment, offset, len(record))
+
+    def put(self, url, project_id, body, headers=None, status_code=200, archive_time=None, extra=None):
+        """
+        保存一次抓取，返回存档记录（extra 为附加到记录里的其他字段）
+        deduplicated=True 表示内容摘要相同的正文已存过（可能只差 nonce 等每次请求不同的值），
+        本次只追加了一行记录，读回的是第一次存的原始正文
+        """
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        sha256 = content_digest(body)
+        body_sha256 = hashlib.sha256(body).hexdigest()
+        headers = headers or {}
+        entry = {
+            'url': url,
+            'project_id': project_id,
+            'archive_time': archive_time or datetime.now().isoformat(),
+            'status_code': status_code,
+            'sha256': sha256,
+            'body_sha256': body_sha256,
+            'size': len(body),
+            'headers': {name: headers[name] for name in KEPT_HEADERS if name in headers},
+        }
+        entry.update(extra or {})
+        with self._lock:
+            deduplicated = self.has(sha256)
+            if not deduplicated:
+                content_type = entry['headers'].get('Content-Type', 'text/html')
+                self._append_record(sha256, body, url, entry['archive_time'], content_type, body_sha256)
+            with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return dict(entry, deduplicated=deduplicated)
+
+    def read(self, sha256):
+        """按内容摘要读取存档内容（bytes，已解压）"""
+        with self.open(sha256) as f:
+            return f.read()
+
+    def read_text(self, sha256, encoding='utf-8'):
+        return self.read(sha256).decode(encoding, errors='replace')
+
+    def open(self, sha256):
+        """以流的方式打开存档内容，边读边解压，大页面不必整个解压到内存"""
+        found = self.locate(sha256)
+        if found is None:
+            raise KeyError(f'存档中没有该正文: {sha256}')
+        path, offset, length = found
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            raw = f.read(length)
+
+        stream = decompress_stream(raw)
+        # 跳过 WARC 头，按 Content-Length 只读正文
+        body_length = 0
+        while True:
+            line = stream.readline()
+            if line in (b'\r\n', b''):
+                break
+            if line.lower().startswith(b'content-length:'):
+                body_length = int(line.split(b':', 1)[1])
+        return io.BufferedReader(_RecordReader(stream, body_length))
+
+    def captures(self, url=None, project_id=None):
+        """
+        按时间顺序返回存档记录，可按 URL / 项目ID 过滤
+        指定了过滤条件时通过键索引只读命中的行，否则顺序读取整个 manifest
+        """
+        if not os.path.exists(self.manifest_path):
+            return []
+        if url is None and project_id is None:
+            result = []
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        result.append(json.loads(line))
+            return result
+        key = key_digest('url', url) if url is not None else key_digest('project', project_id)
+        return [entry for entry in self._read_entries(self.keys.lookup(key))
+                if (url is None or entry['url'] == url)
+                and (project_id is None or entry['project_id'] == project_id)]
+
+    def _read_entries(self, positions):
+        """按 (偏移, 长度) 读出 manifest 中的行"""
+        if not positions:
+            return []
+        entries = []
+        with open(self.manifest_path, 'rb') as f:
+            for offset, length in positions:
+                f.seek(offset)
+                entries.append(json.loads(f.read(length)))
+        return entries
+
+    def latest(self, url):
+        """某URL最近一次存档记录，没有返回 None"""
+        for offset, length in reversed(self.keys.lookup(key_digest('url', url))):
+            entry = self._read_entries([(offset, length)])[0]
+            if entry['url'] == url:
+                return entry
+        return None
+
+    def find_legacy(self, filename):
+        """旧格式文件名（迁移时记在 legacy_file 里）对应的存档记录，没有返回 None"""
+        for entry in self._read_entries(self.keys.lookup(key_digest('legacy', filename))):
+            if entry.get('legacy_file') == filename:
+                return entry
+        return None
+
+    def migrate_legacy(self, delete=True):
+        """
+        把旧格式的 .html(.json) 存档和单独存放的正文（blobs/）转存到段文件 + 存档记录
+        校验读回内容一致后才删除原文件，返回 (迁移的存档数, 新写入的正文数)
+        """
+        migrated = 0
+        written = 0
+        for html_path in sorted(glob.glob(os.path.join(self.archive_dir, '*.html'))):
+            filename = os.path.basename(html_path)
+            meta_path = html_path[:-len('.html')] + '.json'
+            match = _LEGACY_NAME.match(filename)
+            try:
+                meta = {}
+                # bot_handler 旧版只存了 .html，没有 .json
+                if os.path.exists(meta_path):
+                    with open(meta_path, 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                with open(html_path, 'rb') as f:
+                    body = f.read()
+            except (OSError, ValueError) as e:
+                print(f'跳过 {html_path}: {e}')
+                continue
+
+            archive_time = meta.get('archive_time')
+            if not archive_time and match:
+                archive_time = datetime.strptime(match.group('time'), '%Y%m%d_%H%M%S').isoformat()
+            headers = {'Content-Type': meta['content_type']} if meta.get('content_type') else {}
+            entry = self.put(
+                meta.get('url', ''),
+                meta.get('project_id', match.group('project') if match else ''),
+                body, headers, meta.get('status_code', 200), archive_time,
+                extra={'legacy_file': filename},
+            )
+            migrated += 1
+            written += not entry['deduplicated']
+            if delete and content_digest(self.read(entry['sha256'])) == entry['sha256']:
+                os.remove(html_path)
+                if os.path.exists(meta_path):
+                    os.remove(meta_path)
+
+        # 分段存储之前按哈希单独存放的正文（blobs/<前两位>/<哈希>[.zst|.gz]），存档记录已在 manifest 中
+        captures = {entry['sha256']: entry for entry in self.captures()}
+        for path in glob.glob(os.path.join(self.archive_dir, 'blobs', '*', '*')):
+            sha256 = os.path.basename(path).split('.')[0]
+            if len(sha256) != 64:
+                continue
+            with decompress_file(path) as f:
+                body = f.read()
+            with self._lock:
+                if not self.has(sha256):
+                    entry = captures.get(sha256, {})
+                    content_type = entry.get('headers', {}).get('Content-Type', 'text/html')
+                    self._append_record(sha256, body, entry.get('url', ''),
+                                        entry.get('archive_time', ''), content_type)
+                    written += 1
+            if delete and self.read(sha256) == body:
+                os.remove(path)
+        blob_dirs = glob.glob(os.path.join(self.archive_dir, 'blobs', '*')) + [os.path.join(self.archive_dir, 'blobs')]
+        for directory in blob_dirs:
+            if os.path.isdir(directory) and not os.listdir(directory):
+                os.rmdir(directory)
+        return migrated, written
+
+
+def compress(data, codec):
+    """压缩一条记录（gz 为单独的 gzip member，zst 为单独的 zstd frame）"""
+    if codec == 'zst':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    buffer = io.BytesIO()
+    # mtime=0 保证同样的内容压缩结果相同
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=GZIP_LEVEL, mtime=0) as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def decompress_stream(raw):
+    """按魔数识别压缩方式，返回边读边解压的流"""
+    if raw.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise ImportError('该存档记录为 zstd 压缩，读取需要 zstandard: pip install zstandard')
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(io.BytesIO(raw)))
+    if raw.startswith(_GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=io.BytesIO(raw), mode='rb')
+    return io.BytesIO(raw)
+
+
+def decompress_file(path):
+    """打开单独存放的压缩文件（按后缀识别）"""
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError(f'{path} 为 zstd 压缩，读取需要 zstandard: pip install zstandard')
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """获取进程内共享的存档仓库"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArchiveStore(os.environ.get('ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR))
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='网页存档仓库')
+    parser.add_argument('command', choices=['migrate'], help='migrate: 迁移旧格式存档')
+    parser.add_argument('--dir', default=DEFAULT_ARCHIVE_DIR, help='存档目录')
+    parser.add_argument('--keep', action='store_true', help='迁移后保留原文件')
+    args = parser.parse_args()
+
+    store = ArchiveStore(args.dir)
+    before = _dir_size(args.dir)
+    migrated, written = store.migrate_legacy(delete=not args.keep)
+    after = _dir_size(args.dir)
+    print(f'迁移存档 {migrated} 个，去重后正文 {written} 份，共 {len(store.index)} 份正文')
+    print(f'目录大小: {before / 1024 / 1024:.1f} MB -> {after / 1024 / 1024:.1f} MB')
+
+
+def _dir_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+if __name__ == '__main__':
+    main()
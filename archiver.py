@@ -1,21 +1,21 @@
 """
 网页存档模块 - 保存原始HTML，防止链接失效
+正文按内容哈希去重保存（见 archive_store.py）
 """
 
 import os
-import requests
-import hashlib
-import re  # 新增一行
-from datetime import datetime
+import http_client
 from urllib.parse import urlparse
 
+from archive_store import ArchiveStore, is_sha256
+
 
 class WebArchiver:
     """网页存档器"""
     
     def __init__(self, archive_dir="web_archives"):
         self.archive_dir = archive_dir
-        os.makedirs(archive_dir, exist_ok=True)
+        self.store = ArchiveStore(archive_dir)
     
     def archive(self, url, project_id):
         """
@@ -25,51 +25,29 @@ class WebArchiver:
         if not url or not url.startswith('http'):
             return None
         
-        # 生成存档文件名
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_project_id = re.sub(r'[^\w]', '_', str(project_id))[:20]
-        
-        filename_base = f"{safe_project_id}_{timestamp}_{url_hash}"
-        
         try:
             # 下载网页
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            resp = requests.get(url, headers=headers, timeout=20)
-            resp.encoding = 'utf-8'
+            resp = http_client.get(url, timeout=20)
             
-            # 保存原始HTML
-            html_path = os.path.join(self.archive_dir, f"{filename_base}.html")
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(resp.text)
+            # 正文已存过时只追加一条存档记录
+            entry = self.store.put(url, project_id, resp.content, resp.headers, resp.status_code)
+            html_path, offset, length = self.store.locate(entry['sha256'])
             
-            # 保存元数据
-            meta = {
-                'url': url,
-                'project_id': project_id,
-                'archive_time': datetime.now().isoformat(),
-                'content_type': resp.headers.get('Content-Type', 'unknown'),
-                'content_length': len(resp.text),
-                'status_code': resp.status_code,
-                'html_file': f"{filename_base}.html"
-            }
-            
-            meta_path = os.path.join(self.archive_dir, f"{filename_base}.json")
-            with open(meta_path, 'w', encoding='utf-8') as f:
-                import json
-                json.dump(meta, f, ensure_ascii=False, indent=2)
-            
-            print(f"✓ 网页存档成功: {html_path}")
+            if entry['deduplicated']:
+                print(f"✓ 网页未变化，复用已有存档: {html_path}@{offset}")
+            else:
+                print(f"✓ 网页存档成功: {html_path}@{offset}")
             
             return {
                 'success': True,
                 'html_path': html_path,
-                'meta_path': meta_path,
-                'filename': filename_base,
-                'archive_time': meta['archive_time'],
-                'size_kb': len(resp.text) / 1024
+                'archive_url': self.get_archive_url(entry['sha256']),
+                'meta_path': self.store.manifest_path,
+                'filename': entry['sha256'],
+                'sha256': entry['sha256'],
+                'deduplicated': entry['deduplicated'],
+                'archive_time': entry['archive_time'],
+                'size_kb': entry['size'] / 1024
             }
             
         except Exception as e:
@@ -84,9 +62,23 @@ class WebArchiver:
         """
         获取存档文件的访问链接
         实际项目中可以上传到云存储，返回公网URL
+        找不到对应的存档时返回 None
         """
         # 这里返回本地路径，后续可改为云存储URL
-        return f"file://{os.path.abspath(self.archive_dir)}/{filename}.html"
+        # filename 为正文哈希，通过索引定位到段文件中的记录；
+        # 旧格式的 <项目>_<时间>_<哈希>：文件还在时直接访问，已迁移的按存档记录里的 legacy_file 找到正文哈希
+        legacy_path = os.path.join(self.archive_dir, f"{filename}.html")
+        if os.path.exists(legacy_path):
+            return f"file://{os.path.abspath(legacy_path)}"
+        sha256 = filename
+        if not is_sha256(sha256):
+            entry = self.store.find_legacy(f"{filename}.html")
+            sha256 = entry['sha256'] if entry else None
+        found = self.store.locate(sha256) if sha256 else None
+        if found is None:
+            return None
+        path, offset, length = found
+        return f"file://{os.path.abspath(path)}#offset={offset}&length={length}"
     
     def upload_to_github(self, filename):
         """
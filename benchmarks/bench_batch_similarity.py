@@ -0,0 +1,84 @@
+"""
+批量打分基准：ProjectMatcher.score_matrix / find_matches vs 逐对 calculate_similarity
+检查：默认模式阈值附近的分数和是否达到阈值与逐对打分一致（其余为上界）；exact=True 时每个分数都一致
+用法: python benchmarks/bench_batch_similarity.py [现有项目数] [待匹配项目数]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gazetteer  # noqa: E402
+from bench_project_index import make_project, perturb  # noqa: E402
+from project_matcher import ProjectMatcher  # noqa: E402
+
+
+def main():
+    existing_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    rng = random.Random(7)
+    cities = [city for city in gazetteer.CITY_PROVINCE if len(city) <= 3]
+    existing = [make_project(rng, cities) for _ in range(existing_count)]
+    queries = [
+        perturb(rng, rng.choice(existing)) if rng.random() < 0.5 else make_project(rng, cities)
+        for _ in range(query_count)
+    ]
+    matcher = ProjectMatcher()
+    for project in existing + queries:
+        matcher.get_features(project)
+
+    start = time.perf_counter()
+    scores = matcher.score_matrix(queries, existing)
+    matrix_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = matcher.find_matches(queries, existing)
+    batch_time = time.perf_counter() - start
+
+    # 逐对打分只跑前若干行再按比例估算
+    sample = queries[:min(query_count, 20)]
+    start = time.perf_counter()
+    exact = [[matcher.calculate_similarity(q, e) for e in existing] for q in sample]
+    pair_time = (time.perf_counter() - start) / len(sample) * query_count
+
+    threshold = matcher.match_threshold
+    max_diff = 0.0
+    near_diff = 0.0
+    decisions_same = True
+    for i, row in enumerate(exact):
+        for j, value in enumerate(row):
+            diff = abs(scores[i, j] - value)
+            max_diff = max(max_diff, diff)
+            if value >= threshold - 0.05:
+                near_diff = max(near_diff, diff)
+            if (scores[i, j] >= threshold) != (value >= threshold):
+                decisions_same = False
+
+    start = time.perf_counter()
+    exact_scores = matcher.score_matrix(sample, existing, exact=True)
+    exact_time = (time.perf_counter() - start) / len(sample) * query_count
+    exact_diff = max(abs(exact_scores[i, j] - value) for i, row in enumerate(exact) for j, value in enumerate(row))
+
+    single = [matcher.find_match(q, existing) for q in sample]
+    same = all(
+        (a is b or (a is None and b is None)) and abs(sa - sb) < 1e-12
+        for (a, sa), (b, sb) in zip(batch, single)
+    )
+    matched = sum(1 for m, _ in batch if m is not None)
+    print(f'现有项目 {existing_count}，待匹配 {query_count}，匹配成功 {matched}')
+    print(f'  score_matrix     {matrix_time * 1000:9.1f} ms')
+    print(f'  find_matches     {batch_time * 1000:9.1f} ms')
+    print(f'  exact=True(估算)  {exact_time * 1000:9.1f} ms')
+    print(f'  逐对打分(估算)    {pair_time * 1000:9.1f} ms')
+    print(f'  前 {len(sample)} 行: 默认模式最大偏差 {max_diff:.4f}（低于阈值的上界），阈值附近最大偏差 {near_diff:.2e}，'
+          f'是否达到阈值全部一致: {decisions_same}')
+    print(f'  前 {len(sample)} 行: exact=True 最大偏差 {exact_diff:.2e}')
+    print(f'  前 {len(sample)} 条匹配结果与 find_match 一致: {same}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+正文压缩基准：比较“截取前N字”与按相关度压缩
+统计发送给 Kimi 的 token 数，以及全文中的规模、投资、地理位置在发送内容里还能否提取到
+存档里的文章都不长（不超过预算时压缩原样返回），另外构造长文：约1万字不含数字的背景段落后接存档正文
+用法: python benchmarks/bench_compaction.py [web_archives目录] [token预算]
+"""
+
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import content_compactor  # noqa: E402
+import field_extractor  # noqa: E402
+import gazetteer  # noqa: E402
+import page_extractor  # noqa: E402
+
+
+def facts(text):
+    fields = field_extractor.extract_fields(text)
+    return {
+        'scale': fields['scale'],
+        'investment': fields['investment'],
+        'location': gazetteer.extract_location(text) or None,
+    }
+
+
+BACKGROUND = [
+    '近年来，当地持续推进水环境综合治理，城乡生活污水收集处理能力不断提升。',
+    '相关部门多次召开专题会议，研究部署污水处理提质增效工作。',
+    '市民对周边环境改善的获得感明显增强，河道水质逐年好转。',
+    '点击上方蓝字关注我们，获取更多行业资讯。',
+    '本文转载自网络，版权归原作者所有，如有侵权请联系删除。',
+    '专家表示，地下式污水处理厂可以节约土地资源，地面空间可建设公园等配套设施。',
+]
+
+
+def long_article(text, chars=10000):
+    """背景段落（各句带编号避免被去重）+ 原文"""
+    parts = []
+    size = 0
+    index = 0
+    while size < chars:
+        sentence = f'{BACKGROUND[index % len(BACKGROUND)][:-1]}（其{index + 1}）。'
+        parts.append(sentence)
+        size += len(sentence)
+        index += 1
+    return ''.join(parts) + text
+
+
+def evaluate(texts, budget):
+    strategies = [
+        ('前6000字', lambda text: text[:6000]),
+        ('前8000字', lambda text: text[:8000]),
+        (f'压缩到{budget} token', lambda text: content_compactor.compact(text, budget)),
+    ]
+    full = [facts(text) for text in texts]
+    present = {key: sum(1 for f in full if f[key] is not None) for key in ('scale', 'investment', 'location')}
+    print(f'{len(texts)} 个页面；全文可提取: 规模 {present["scale"]}，投资 {present["investment"]}，地点 {present["location"]}')
+
+    for label, strategy in strategies:
+        start = time.perf_counter()
+        sent = [strategy(text) for text in texts]
+        elapsed = time.perf_counter() - start
+        tokens = sum(content_compactor.estimate_tokens(text) for text in sent)
+        kept = {key: 0 for key in present}
+        for text, expected in zip(sent, full):
+            got = facts(text)
+            for key in kept:
+                if expected[key] is not None and got[key] == expected[key]:
+                    kept[key] += 1
+        print(f'  {label:<16} 平均 {tokens / len(texts):6.0f} token  保留 规模 {kept["scale"]}/{present["scale"]} '
+              f'投资 {kept["investment"]}/{present["investment"]} 地点 {kept["location"]}/{present["location"]}  '
+              f'{elapsed * 1000:.0f} ms')
+
+
+def main():
+    archive_dir = sys.argv[1] if len(sys.argv) > 1 else 'web_archives'
+    budget = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+
+    texts = []
+    for path in sorted(glob.glob(os.path.join(archive_dir, '*.html'))):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            text = page_extractor.extract_html(f.read())['text']
+        texts.append(re.sub(r'\s+', ' ', text))
+    if not texts:
+        print(f'{archive_dir} 下没有存档页面')
+        return
+
+    print('存档正文')
+    evaluate(texts, budget)
+    print('\n构造的长文')
+    evaluate([long_article(text) for text in texts], budget)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+飞书令牌缓存基准：本地模拟鉴权接口（固定延迟），统计实际发出的令牌请求数
+对比：每次调用都重新获取（原先的做法）、共享令牌管理器；
+检查：多线程并发只请求一次、同一令牌文件的多个进程共用令牌、临近过期时提前刷新、
+令牌被吊销后 feishu_auth.request 刷新并只重试一次
+用法: python benchmarks/bench_feishu_token.py [调用次数] [进程数]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feishu_auth  # noqa: E402
+import http_client  # noqa: E402
+
+LATENCY = 0.1
+EXPIRE = 7200
+
+_token_requests = []
+_api_calls = []
+_request_lock = threading.Lock()
+
+
+class FakeAuthHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        """模拟业务接口：只认最新签发的令牌，其余返回令牌失效"""
+        with _request_lock:
+            latest = f't-{len(_token_requests)}'
+            _api_calls.append(self.headers.get('Authorization'))
+        code = 0 if self.headers.get('Authorization') == f'Bearer {latest}' else 99991663
+        payload = json.dumps({'code': code}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        with _request_lock:
+            _token_requests.append(time.monotonic())
+            number = len(_token_requests)
+        time.sleep(LATENCY)
+        payload = json.dumps({'code': 0, 'msg': 'ok', 'tenant_access_token': f't-{number}',
+                              'expire': EXPIRE}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def child(url, token_file, calls):
+    """子进程：用同一个令牌文件取若干次令牌"""
+    feishu_auth.TOKEN_URL = url
+    manager = feishu_auth.TokenManager('cli_bench', 'secret', token_file)
+    for _ in range(calls):
+        manager.get_token()
+    print(json.dumps(manager.stats))
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeAuthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/open-apis/auth/v3/tenant_access_token/internal'
+    feishu_auth.TOKEN_URL = url
+    workdir = tempfile.mkdtemp(prefix='feishu_token_')
+    print(f'{calls} 次调用，模拟鉴权延迟 {LATENCY * 1000:.0f} ms')
+
+    _token_requests.clear()
+    start = time.perf_counter()
+    for _ in range(calls):
+        http_client.post(url, json={'app_id': 'cli_bench', 'app_secret': 'secret'}).json()
+    elapsed = time.perf_counter() - start
+    print(f'  每次重新获取  {elapsed:6.2f} s  令牌请求 {len(_token_requests)}')
+
+    _token_requests.clear()
+    manager = feishu_auth.TokenManager('cli_bench', 'secret', os.path.join(workdir, 'serial.json'))
+    start = time.perf_counter()
+    for _ in range(calls):
+        manager.get_token()
+    elapsed = time.perf_counter() - start
+    print(f'  共享令牌      {elapsed:6.2f} s  令牌请求 {len(_token_requests)}  {manager.stats}')
+
+    _token_requests.clear()
+    manager = feishu_auth.TokenManager('cli_bench', 'secret', os.path.join(workdir, 'threads.json'))
+    with ThreadPoolExecutor(16) as pool:
+        tokens = set(pool.map(lambda _: manager.get_token(), range(calls)))
+    print(f'  16线程并发    令牌请求 {len(_token_requests)}  拿到的令牌 {len(tokens)} 种')
+
+    _token_requests.clear()
+    token_file = os.path.join(workdir, 'processes.json')
+    code = ('import sys; sys.path.insert(0, sys.argv[1]); import bench_feishu_token as b; '
+            'b.child(sys.argv[2], sys.argv[3], int(sys.argv[4]))')
+    procs = [subprocess.Popen([sys.executable, '-c', code, os.path.dirname(os.path.abspath(__file__)),
+                               url, token_file, str(calls)], stdout=subprocess.PIPE, text=True)
+             for _ in range(processes)]
+    stats = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+    print(f'  {processes}个进程同时  令牌请求 {len(_token_requests)}  '
+          f'从文件读取 {sum(s["loaded"] for s in stats)} 次')
+
+    # 临近过期：剩余时间不足 margin 时下一次调用换新令牌
+    _token_requests.clear()
+    manager = feishu_auth.TokenManager('cli_bench', 'secret', os.path.join(workdir, 'expiry.json'),
+                                       margin=EXPIRE - 0.3)
+    first = manager.get_token()
+    time.sleep(0.5)
+    second = manager.get_token()
+    print(f'  临近过期刷新  令牌请求 {len(_token_requests)}  换了新令牌: {first != second}')
+
+    # 令牌被吊销：缓存里的令牌还没过期，但服务端已经不认
+    feishu_auth._manager = feishu_auth.TokenManager('cli_bench', 'secret', os.path.join(workdir, 'revoked.json'))
+    feishu_auth.get_token()
+    _token_requests.append(time.monotonic())  # 服务端换发了新令牌，旧令牌作废
+    _api_calls.clear()
+    before = len(_token_requests)
+    code = feishu_auth.get(f'http://127.0.0.1:{server.server_port}/open-apis/api').json()['code']
+    print(f'  令牌被吊销    接口调用 {len(_api_calls)}  令牌请求 {len(_token_requests) - before}  最终 code={code}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
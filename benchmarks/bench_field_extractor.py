@@ -0,0 +1,79 @@
+"""
+数值字段提取基准：存档页面正文上的提取耗时，外加一组规模/投资/面积的回归用例
+检查：“万吨/年”的污泥量、“万方”土方、“年处理量”不当作处理规模；“/日”或“规模”提示词下照常提取
+用法: python benchmarks/bench_field_extractor.py [web_archives目录]
+"""
+
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import field_extractor  # noqa: E402
+
+# (原文, 期望的 extract_fields 结果中非空的字段)
+CASES = [
+    ('设计规模3万立方米/日', {'scale': 3.0}),
+    ('近期规模5万m³/d，远期10万m³/d', {'scale': 5.0}),
+    ('处理规模5万 立方米/天，占地2万平方米', {'scale': 5.0, 'area': 20000.0}),
+    ('日处理污水2万吨', {'scale': 2.0}),
+    ('处理规模5万吨', {'scale': 5.0}),
+    ('规模为1.5万方', {'scale': 1.5}),
+    ('规模8万', {'scale': 8.0}),
+    ('处理能力5000吨/日，总投资1.2亿元', {'scale': 0.5, 'investment': 1.2}),
+    ('总投资5000万元', {'investment': 0.5}),
+    # 以下的“万吨”“万方”都不是污水处理规模
+    ('污泥处理能力10万吨/年', {}),
+    ('污泥处置规模20万吨/年', {}),
+    ('年处理量30万吨', {}),
+    ('土方开挖12万方，总投资3亿元', {'investment': 3.0}),
+    ('项目共消纳渣土约8万立方米', {}),
+    ('年产再生水1000万吨，处理规模4万吨/日', {'scale': 4.0}),
+]
+
+
+def check_cases():
+    failed = 0
+    for text, expected in CASES:
+        result = {k: v for k, v in field_extractor.extract_fields(text).items() if v is not None}
+        if result != expected:
+            failed += 1
+            print(f'  ✗ {text}: 期望 {expected}，实际 {result}')
+    print(f'回归用例: {len(CASES) - failed}/{len(CASES)} 通过')
+    return failed
+
+
+def load_texts(archive_dir):
+    """读取存档页面并去掉标签，返回正文文本列表"""
+    texts = []
+    for path in sorted(glob.glob(os.path.join(archive_dir, '*.html'))):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            html = f.read()
+        html = re.sub(r'<(script|style)[^>]*>.*?</\1>', ' ', html, flags=re.DOTALL | re.IGNORECASE)
+        text = re.sub(r'<[^>]+>', ' ', html)
+        texts.append(re.sub(r'\s+', ' ', text))
+    return texts
+
+
+def main():
+    failed = check_cases()
+
+    archive_dir = sys.argv[1] if len(sys.argv) > 1 else 'web_archives'
+    texts = load_texts(archive_dir)
+    if texts:
+        best = float('inf')
+        for _ in range(5):
+            start = time.perf_counter()
+            fields = [field_extractor.extract_fields(text) for text in texts]
+            best = min(best, time.perf_counter() - start)
+        found = sum(1 for f in fields if f['scale'] is not None)
+        print(f'{len(texts)} 个存档页面，共 {sum(map(len, texts))} 字: {best * 1000:.1f} ms，'
+              f'提取到规模 {found} 页')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+表单处理流水线基准：本地模拟飞书多维表格接口和待抓取的网页（固定延迟），
+对比逐条处理（抓取 → 单条推送 → 单条标记）与流水线模式（并发抓取 → batch_create → batch_update）
+检查：各接口调用次数；批量接口随机限流（整块退避重试，不拆分）、个别记录字段非法（拆开定位）、
+随机"已写入但返回 500"（按 client_token 重试，主表不重复），非法记录保持"待处理"，其余全部推送并标记
+用法: python benchmarks/bench_form_pipeline.py [记录数] [抓取线程数]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['HTTP_CACHE_DIR'] = tempfile.mkdtemp(prefix='http_cache_')
+os.environ['FEISHU_TOKEN_FILE'] = os.path.join(tempfile.mkdtemp(prefix='feishu_token_'), 'token.json')
+for name in ('FEISHU_BASE_ID', 'FEISHU_TABLE_ID', 'FEISHU_FORM_BASE_ID', 'FEISHU_FORM_TABLE_ID',
+             'FEISHU_APP_ID', 'FEISHU_APP_SECRET'):
+    os.environ.setdefault(name, name.lower())
+
+import feishu_auth  # noqa: E402
+import form_processor  # noqa: E402
+
+PAGE_LATENCY = 0.05
+API_LATENCY = 0.03
+BATCH_ERROR_RATE = 0.1  # 批量接口返回限流的概率
+LOST_REPLY_RATE = 0.1  # batch_create 已写入但返回 500 的概率
+BAD_EVERY = 97  # 每隔多少条有一条主表拒收的记录
+
+
+class FakeFeishu:
+    """模拟的表单表和主表"""
+
+    def __init__(self, count):
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.form = {f'rec{i}': {'来源URL': {'link': f'/page/{i}'}, '处理状态': '待处理'} for i in range(count)}
+        self.main = []
+        self.client_tokens = set()
+
+    def reset(self):
+        self.calls.clear()
+        self.main.clear()
+        self.client_tokens.clear()
+        for fields in self.form.values():
+            fields['处理状态'] = '待处理'
+
+
+def make_handler(feishu, base_url):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, payload, content_type='application/json'):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            return json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+
+        def _count(self, name):
+            with feishu.lock:
+                feishu.calls[name] += 1
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path.startswith('/page/'):
+                time.sleep(PAGE_LATENCY)
+                i = int(path.rsplit('/', 1)[1])
+                title = f'项目{i}' + ('BAD' if i % BAD_EVERY == BAD_EVERY - 1 else '')
+                html = (f'<html><head><title>{title}</title></head><body><h1>{title}</h1>'
+                        f'<div class="content">某市地下式污水处理厂，规模{i % 20 + 1}万吨/日，总投资{i % 9 + 1}亿元。</div>'
+                        f'</body></html>')
+                return self._reply(html.encode('utf-8'), 'text/html; charset=utf-8')
+            self._count('list')
+            time.sleep(API_LATENCY)
+            items = [{'record_id': rid, 'fields': {**fields, '来源URL': {'link': base_url + fields['来源URL']['link']}}}
+                     for rid, fields in feishu.form.items()]
+            self._reply({'code': 0, 'data': {'items': items, 'has_more': False}})
+
+        def do_POST(self):
+            parsed = urlparse(self.path)
+            path = parsed.path
+            client_token = parse_qs(parsed.query).get('client_token', [None])[0]
+            body = self._body()
+            if path.endswith('tenant_access_token/internal'):
+                self._count('token')
+                return self._reply({'code': 0, 'tenant_access_token': 't-bench', 'expire': 7200})
+            name = path.rsplit('/', 1)[1]
+            self._count(name)
+            time.sleep(API_LATENCY)
+            records = body.get('records') if name.startswith('batch') else [body]
+            bad = any('BAD' in r['fields'].get('项目名称', '') for r in records)
+            if name.startswith('batch') and random.random() < BATCH_ERROR_RATE:
+                return self._reply({'code': 1254290, 'msg': 'TooManyRequest'})
+            if bad:
+                return self._reply({'code': 1254045, 'msg': 'FieldNameNotFound'})
+            with feishu.lock:
+                if name == 'batch_update':
+                    for r in records:
+                        feishu.form[r['record_id']].update(r['fields'])
+                elif client_token is None or client_token not in feishu.client_tokens:
+                    feishu.main.extend(r['fields']['项目名称'] for r in records)
+                    feishu.client_tokens.add(client_token)
+            if name == 'batch_create' and random.random() < LOST_REPLY_RATE:
+                self.send_response(500)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self._reply({'code': 0, 'data': {}})
+
+        def do_PUT(self):
+            record_id = urlparse(self.path).path.rsplit('/', 1)[1]
+            body = self._body()
+            self._count('update')
+            time.sleep(API_LATENCY)
+            with feishu.lock:
+                feishu.form[record_id].update(body['fields'])
+            self._reply({'code': 0, 'data': {}})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    random.seed(1)
+    form_processor.RETRY_DELAY = 0.05
+
+    feishu = FakeFeishu(count)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), None)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    server.RequestHandlerClass = make_handler(feishu, base_url)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    form_processor.FEISHU_API = f'{base_url}/open-apis'
+    feishu_auth.TOKEN_URL = f'{base_url}/open-apis/auth/v3/tenant_access_token/internal'
+
+    bad = sum(1 for i in range(count) if i % BAD_EVERY == BAD_EVERY - 1)
+    print(f'{count} 条表单记录（{bad} 条主表拒收），网页延迟 {PAGE_LATENCY * 1000:.0f} ms，'
+          f'接口延迟 {API_LATENCY * 1000:.0f} ms，批量接口 {BATCH_ERROR_RATE:.0%} 返回限流，'
+          f'{LOST_REPLY_RATE:.0%} 写入后返回 500')
+
+    def run(label, method, *args):
+        feishu.reset()
+        processor = form_processor.FormProcessor()
+        # 只看处理过程的输出摘要
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        start = time.perf_counter()
+        try:
+            success = getattr(processor, method)(*args)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        elapsed = time.perf_counter() - start
+        marked = sum(1 for fields in feishu.form.values() if fields['处理状态'] == '已处理')
+        calls = dict(feishu.calls)
+        print(f'  {label:<10} {elapsed:6.2f} s  完成 {success}  主表 {len(feishu.main)}  已标记 {marked}  '
+              f'接口调用 {sum(calls.values())} {calls}')
+        return sorted(feishu.main), marked
+
+    sequential = run('逐条处理', 'process_all')
+    pipelined = run(f'{workers}线程流水线', 'process_pipelined', workers)
+    print(f'  结果一致: {sequential == pipelined}（主表无重复: {len(set(pipelined[0])) == len(pipelined[0])}），'
+          f'拒收记录未标记: {pipelined[1] == count - bad}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+地名提取基准：旧版两条正则 vs gazetteer 前缀树模式
+用法: python benchmarks/bench_gazetteer.py [web_archives目录]
+"""
+
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gazetteer  # noqa: E402
+
+# 旧版 BaseCrawler.parse_location 使用的正则（原样保留用于对比）
+LEGACY_PROV_PATTERN = r'(北京|天津|上海|重庆|河北|山西|辽宁|吉林|黑龙江|江苏|浙江|安徽|福建|江西|山东|河南|湖北|湖南|广东|海南|四川|贵州|云南|陕西|甘肃|青海|台湾|内蒙古|广西|西藏|宁夏|新疆|香港|澳门)(?:省|市|自治区)?'
+LEGACY_CITY_PATTERN = r'(石家庄|太原|呼和浩特|沈阳|长春|哈尔滨|南京|杭州|合肥|福州|南昌|济南|郑州|武汉|长沙|广州|南宁|海口|成都|贵阳|昆明|拉萨|西安|兰州|西宁|银川|乌鲁木齐|大连|青岛|宁波|厦门|深圳|苏州|无锡|佛山|东莞|常州|徐州|南通|温州|绍兴|嘉兴|烟台|威海|泉州|珠海|中山|惠州|金华|台州|盐城|扬州|镇江|泰州|唐山|保定|邯郸|张家口|承德|沧州|廊坊|衡水|大同|阳泉|长治|晋城|朔州|晋中|运城|忻州|临汾|吕梁|包头|乌海|赤峰|通辽|鄂尔多斯|呼伦贝尔|巴彦淖尔|乌兰察布|兴安盟|锡林郭勒盟|阿拉善盟|鞍山|抚顺|本溪|丹东|锦州|营口|阜新|辽阳|盘锦|铁岭|朝阳|葫芦岛|吉林|四平|辽源|通化|白山|松原|白城|延边朝鲜族自治州|齐齐哈尔|鸡西|鹤岗|双鸭山|大庆|伊春|佳木斯|七台河|牡丹江|黑河|绥化|大兴安岭地区|南京|无锡|徐州|常州|苏州|南通|连云港|淮安|盐城|扬州|镇江|泰州|宿迁|杭州|宁波|温州|嘉兴|湖州|绍兴|金华|衢州|舟山|台州|丽水|合肥|芜湖|蚌埠|淮南|马鞍山|淮北|铜陵|安庆|黄山|滁州|阜阳|宿州|六安|亳州|池州|宣城|福州|厦门|莆田|三明|泉州|漳州|南平|龙岩|宁德|南昌|景德镇|萍乡|九江|新余|鹰潭|赣州|吉安|宜春|抚州|上饶|济南|青岛|淄博|枣庄|东营|烟台|潍坊|济宁|泰安|威海|日照|莱芜|临沂|德州|聊城|滨州|菏泽|郑州|开封|洛阳|平顶山|安阳|鹤壁|新乡|焦作|濮阳|许昌|漯河|三门峡|南阳|商丘|信阳|周口|驻马店|武汉|黄石|十堰|宜昌|襄阳|鄂州|荆门|孝感|荆州|黄冈|咸宁|随州|恩施土家族苗族自治州|长沙|株洲|湘潭|衡阳|邵阳|岳阳|常德|张家界|益阳|郴州|永州|怀化|娄底|湘西土家族苗族自治州|广州|韶关|深圳|珠海|汕头|佛山|江门|湛江|茂名|肇庆|惠州|梅州|汕尾|河源|阳江|清远|东莞|中山|潮州|揭阳|云浮|南宁|柳州|桂林|梧州|北海|防城港|钦州|贵港|玉林|百色|贺州|河池|来宾|崇左|海口|三亚|三沙|儋州|成都|自贡|攀枝花|泸州|德阳|绵阳|广元|遂宁|内江|乐山|南充|眉山|宜宾|广安|达州|雅安|巴中|资阳|阿坝藏族羌族自治州|甘孜藏族自治州|凉山彝族自治州|贵阳|六盘水|遵义|安顺|毕节|铜仁|黔西南布依族苗族自治州|黔东南苗族侗族自治州|黔南布依族苗族自治州|昆明|曲靖|玉溪|保山|昭通|丽江|普洱|临沧|楚雄彝族自治州|红河哈尼族彝族自治州|文山壮族苗族自治州|西双版纳傣族自治州|大理白族自治州|德宏傣族景颇族自治州|怒江傈僳族自治州|迪庆藏族自治州|拉萨|日喀则|昌都|林芝|山南|那曲|阿里地区|西安|铜川|宝鸡|咸阳|渭南|延安|汉中|榆林|安康|商洛|兰州|嘉峪关|金昌|白银|天水|武威|张掖|平凉|酒泉|庆阳|定西|陇南|临夏回族自治州|甘南藏族自治州|西宁|海东市|海北藏族自治州|黄南藏族自治州|海南藏族自治州|果洛藏族自治州|玉树藏族自治州|海西蒙古族藏族自治州|银川|石嘴山|吴忠|固原|中卫|乌鲁木齐|克拉玛依|吐鲁番|哈密|昌吉回族自治州|博尔塔拉蒙古自治州|巴音郭楞蒙古自治州|阿克苏地区|克孜勒苏柯尔克孜自治州|喀什地区|和田地区|伊犁哈萨克自治州|塔城地区|阿勒泰地区|石河子|阿拉尔|图木舒克|五家渠|北屯|铁门关|双河|可克达拉|昆玉|胡杨河|新星)'
+
+
+def legacy_parse_location(text):
+    prov_match = re.search(LEGACY_PROV_PATTERN, text)
+    city_match = re.search(LEGACY_CITY_PATTERN, text)
+    location = ''
+    if prov_match:
+        location = prov_match.group(1)
+    if city_match:
+        location += city_match.group(1) if not location else '·' + city_match.group(1)
+    return location if location else None
+
+
+def load_texts(archive_dir):
+    """读取存档页面并去掉标签，返回正文文本列表"""
+    texts = []
+    for path in sorted(glob.glob(os.path.join(archive_dir, '*.html'))):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            html = f.read()
+        html = re.sub(r'<(script|style)[^>]*>.*?</\1>', ' ', html, flags=re.DOTALL | re.IGNORECASE)
+        text = re.sub(r'<[^>]+>', ' ', html)
+        texts.append(re.sub(r'\s+', ' ', text))
+    return texts
+
+
+def bench(name, func, samples, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in samples:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    print(f'  {name:<12} {best * 1000:9.1f} ms')
+    return best
+
+
+def main():
+    archive_dir = sys.argv[1] if len(sys.argv) > 1 else 'web_archives'
+    texts = load_texts(archive_dir)
+    if not texts:
+        print(f'{archive_dir} 下没有存档页面')
+        return
+
+    # 列表页场景：标题+摘要长度的片段；详情页场景：整页正文
+    snippets = [text[i:i + 200] for text in texts for i in range(0, min(len(text), 20000), 200)]
+    for label, samples in [('片段(200字)', snippets), ('整页正文', texts)]:
+        print(f'{label}: {len(samples)} 条，共 {sum(map(len, samples))} 字')
+        old = bench('旧正则', legacy_parse_location, samples)
+        new = bench('地名库', gazetteer.extract_location, samples)
+        print(f'  加速比 {old / new:.1f}x')
+
+    same = sum(
+        1 for text in snippets
+        if (legacy_parse_location(text) or '') == gazetteer.extract_location(text)
+    )
+    print(f'结果一致: {same}/{len(snippets)}（差异来自城市补全省份、新增城市和简称）')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Kimi 批量提取基准：本地模拟 API（固定延迟、随机 429/503、随机断开连接），对比逐条调用、线程池批量提取、多篇合并请求
+检查：结果顺序与输入一致、限流错误全部重试成功、实际请求速率不超过限速；
+多篇合并时模拟 API 随机漏掉一篇，检查逐篇重试补齐，并统计发送的提示词 token 数
+用法: python benchmarks/bench_kimi_pool.py [条数] [并发数]
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('KIMI_API_KEY', 'bench')
+os.environ['KIMI_CACHE_DIR'] = tempfile.mkdtemp(prefix='kimi_cache_')
+
+import kimi_extractor  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+
+LATENCY = 0.2
+ERROR_RATE = 0.2
+DROP_RATE = 0.1  # 多篇合并时漏掉某篇的概率
+RESET_RATE = 0.05  # 不返回响应直接断开连接的概率
+
+_PACK_ARTICLE = re.compile(r'【文章(\d+)】\nURL: .*\n标题: (.*)\n')
+
+_request_times = []
+_prompt_tokens = []
+_request_lock = threading.Lock()
+
+
+class FakeKimiHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body['messages'][-1]['content']
+        with _request_lock:
+            _request_times.append(time.monotonic())
+            _prompt_tokens.append(kimi_extractor.estimate_tokens(body['messages'][0]['content'] + prompt))
+        time.sleep(LATENCY)
+        if random.random() < RESET_RATE:
+            self.close_connection = True
+            return
+        if random.random() < ERROR_RATE:
+            self.send_response(random.choice((429, 503)))
+            self.end_headers()
+            return
+        articles = _PACK_ARTICLE.findall(prompt)
+        if articles:
+            answer = {'items': [{'id': int(number), '项目名称': title} for number, title in articles
+                                if random.random() >= DROP_RATE]}
+        else:
+            answer = {'项目名称': prompt.split('标题: ', 1)[1].split('\n', 1)[0]}
+        payload = json.dumps({
+            'choices': [{'message': {'content': json.dumps(answer, ensure_ascii=False)}}],
+            'usage': {'total_tokens': len(prompt) // 2},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(extractor, items, workers, packed=False):
+    _request_times.clear()
+    _prompt_tokens.clear()
+    start = time.perf_counter()
+    if packed:
+        results = extractor.extract_packed(items, workers=workers)
+    elif workers == 1:
+        results = [extractor.extract(*item) for item in items]
+    else:
+        results = extractor.extract_batch(items, workers=workers)
+    elapsed = time.perf_counter() - start
+    in_order = [r[0].get('项目名称') for r in results] == [item[1] for item in items]
+    failed = sum(1 for r in results if r[0].get('_fallback'))
+    return elapsed, in_order, failed, len(_request_times)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    random.seed(1)
+    kimi_extractor.RETRY_BASE_DELAY = 0.2
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeKimiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f'http://127.0.0.1:{server.server_port}/v1/chat/completions'
+
+    def items(tag):
+        return [(f'https://example.com/{tag}/{i}', f'项目{tag}{i}', f'{tag}{i} 地下式污水处理厂 ' * 50) for i in range(count)]
+
+    print(f'{count} 条，模拟延迟 {LATENCY * 1000:.0f} ms，{ERROR_RATE:.0%} 请求返回 429/503，{RESET_RATE:.0%} 断开连接')
+    extractor = kimi_extractor.KimiExtractor()
+    extractor.api_url = api_url
+    elapsed, in_order, failed, requests = run(extractor, items('a'), 1)
+    print(f'  逐条调用      {elapsed:6.2f} s  请求 {requests}  失败 {failed}  顺序一致: {in_order}')
+
+    rpm = 600
+    extractor = kimi_extractor.KimiExtractor(limiter=RateLimiter(rpm, 2000000))
+    extractor.api_url = api_url
+    elapsed, in_order, failed, requests = run(extractor, items('b'), workers)
+    tokens = sum(_prompt_tokens)
+    print(f'  {workers}线程批量     {elapsed:6.2f} s  请求 {requests}  失败 {failed}  顺序一致: {in_order}  提示词 {tokens} token')
+
+    extractor = kimi_extractor.KimiExtractor(limiter=RateLimiter(rpm, 2000000))
+    extractor.api_url = api_url
+    elapsed, in_order, failed, requests = run(extractor, items('p'), workers, packed=True)
+    tokens = sum(_prompt_tokens)
+    print(f'  {workers}线程多篇合并 {elapsed:6.2f} s  请求 {requests}  失败 {failed}  顺序一致: {in_order}  提示词 {tokens} token')
+
+    # 限速检查：任意 60 秒窗口内的请求数不超过 rpm（桶容量允许开头突发一分钟的额度）
+    extractor = kimi_extractor.KimiExtractor(limiter=RateLimiter(120, 2000000))
+    extractor.limiter.requests.tokens = 0  # 清空突发额度，直接观察稳态速率
+    extractor.api_url = api_url
+    elapsed, in_order, failed, requests = run(extractor, items('c')[:10], workers)
+    rate = (requests - 1) / (_request_times[-1] - _request_times[0]) * 60 if requests > 1 else 0
+    print(f'  限速120次/分  {elapsed:6.2f} s  请求 {requests}  实测 {rate:.0f} 次/分  顺序一致: {in_order}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Kimi 流式提取基准：本地服务器回放录制的 SSE 流（按固定间隔逐个事件发送，模拟生成速度）
+对比：非流式（生成完才返回）、流式完整接收、流式核心字段齐了就断开；
+检查流式增量解析的结果与完整 JSON 一致
+SSE 文件可用 KIMI_RECORD_DIR 录制真实返回，默认用 benchmarks/data/kimi_stream_sample.sse（按接口格式构造）
+用法: python benchmarks/bench_kimi_stream.py [SSE文件] [事件间隔ms]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('KIMI_API_KEY', 'bench')
+os.environ['KIMI_CACHE_DIR'] = tempfile.mkdtemp(prefix='kimi_cache_')
+
+import kimi_extractor  # noqa: E402
+import kimi_stream  # noqa: E402
+
+DEFAULT_SSE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'kimi_stream_sample.sse')
+
+
+def load_events(path):
+    """SSE 文件按空行分成事件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [block + '\n\n' for block in f.read().split('\n\n') if block.strip()]
+
+
+def make_handler(events, interval):
+    lines = [line for event in events for line in event.splitlines()]
+    deltas = list(kimi_stream.iter_deltas(kimi_stream.iter_events(lines)))
+    content = ''.join(delta for delta, _ in deltas)
+    usage = next((u for _, u in reversed(deltas) if u), {})
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if body.get('stream'):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                try:
+                    for event in events:
+                        self.wfile.write(event.encode('utf-8'))
+                        self.wfile.flush()
+                        time.sleep(interval)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 客户端提前断开
+                self.close_connection = True
+                return
+            # 非流式：等全部生成完再一次返回
+            time.sleep(interval * len(events))
+            payload = json.dumps({
+                'choices': [{'message': {'role': 'assistant', 'content': content}}],
+                'usage': usage,
+            }, ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return ReplayHandler
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SSE
+    interval = (float(sys.argv[2]) if len(sys.argv) > 2 else 10) / 1000
+    events = load_events(path)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(events, interval))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    extractor = kimi_extractor.KimiExtractor()
+    extractor.api_url = f'http://127.0.0.1:{server.server_port}/v1/chat/completions'
+    print(f'{os.path.basename(path)}: {len(events)} 个事件，间隔 {interval * 1000:.0f} ms')
+
+    def run(label, index, **kwargs):
+        first_core = []
+        start = time.perf_counter()
+
+        def on_field(key, value):
+            if not first_core and key in kimi_stream.CORE_FIELDS and kimi_stream.has_fields(fields_seen | {key: value}):
+                first_core.append(time.perf_counter() - start)
+            fields_seen[key] = value
+
+        fields_seen = {}
+        if kwargs.get('stream'):
+            kwargs['on_field'] = on_field
+        # 每次换一篇正文，避免命中缓存
+        extracted, _ = extractor.extract(f'https://example.com/{index}', '东阳江北污水厂', f'正文{index}', **kwargs)
+        elapsed = time.perf_counter() - start
+        core = f'核心字段齐 {first_core[0]:5.2f} s' if first_core else ' ' * 15
+        print(f'  {label:<14} 总用时 {elapsed:5.2f} s  {core}  字段 {len([k for k in extracted if not k.startswith("_")])}')
+        return extracted
+
+    full = run('非流式', 1)
+    streamed = run('流式完整接收', 2, stream=True)
+    early = run('流式提前结束', 3, stream=True, stop_early=True)
+
+    strip = lambda d: {k: v for k, v in d.items() if not k.startswith('_')}  # noqa: E731
+    print(f'  流式结果与完整JSON一致: {strip(full) == strip(streamed)}')
+    print(f'  提前结束的核心字段一致: {all(early.get(k) == full.get(k) for k in kimi_stream.CORE_FIELDS)}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
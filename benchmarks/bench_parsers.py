@@ -0,0 +1,76 @@
+"""
+HTML解析后端基准：各爬虫的列表页/详情页解析在不同后端下的耗时
+对比 BeautifulSoup+html.parser 整页解析（旧实现）、局部解析（SoupStrainer）、lxml、selectolax
+用法: python benchmarks/bench_parsers.py [web_archives目录]
+"""
+
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import html_backend  # noqa: E402
+import site_profiles  # noqa: E402
+from underground_wastewater_crawler import SiteCrawler  # noqa: E402
+
+
+def load_pages(archive_dir):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(archive_dir, '*.html'))):
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            pages.append(f.read())
+    return pages
+
+
+def variants():
+    """(名称, 后端, 是否局部解析)"""
+    result = [('html.parser 整页', 'html.parser', False), ('html.parser 局部', 'html.parser', True)]
+    if 'lxml' in html_backend.available_backends():
+        result += [('lxml 整页', 'lxml', False), ('lxml 局部', 'lxml', True)]
+    if 'selectolax' in html_backend.available_backends():
+        result.append(('selectolax', 'selectolax', False))
+    return result
+
+
+def run(crawler, method, pages, backend, partial):
+    os.environ['HTML_BACKEND'] = backend
+    regions = crawler.list_regions, crawler.detail_regions
+    if not partial:
+        crawler.list_regions = None
+        crawler.detail_regions = None
+    try:
+        start = time.perf_counter()
+        results = [getattr(crawler, method)(html) for html in pages]
+        return time.perf_counter() - start, results
+    finally:
+        crawler.list_regions, crawler.detail_regions = regions
+
+
+def main():
+    archive_dir = sys.argv[1] if len(sys.argv) > 1 else 'web_archives'
+    pages = load_pages(archive_dir)
+    if not pages:
+        print(f'{archive_dir} 下没有存档页面')
+        return
+    size = sum(len(page) for page in pages)
+    print(f'{len(pages)} 个页面，共 {size / 1024 / 1024:.1f} MB；可用后端: {", ".join(html_backend.available_backends())}')
+
+    crawlers = [SiteCrawler(profile) for profile in site_profiles.PROFILES]
+    jobs = [(crawler, 'parse_list') for crawler in crawlers] + [(crawlers[0], 'parse_detail')]
+    for crawler, method in jobs:
+        name = crawler.source_name if method == 'parse_list' else '详情页'
+        print(f'\n{name} {method}')
+        baseline_time, baseline = None, None
+        for label, backend, partial in variants():
+            elapsed, results = run(crawler, method, pages, backend, partial)
+            if baseline_time is None:
+                baseline_time, baseline = elapsed, results
+            same = results == baseline
+            print(f'  {label:<16} {elapsed * 1000:9.1f} ms  {baseline_time / elapsed:5.1f}x  结果一致: {same}')
+    os.environ.pop('HTML_BACKEND', None)
+
+
+if __name__ == '__main__':
+    main()
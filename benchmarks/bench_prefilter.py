@@ -0,0 +1,41 @@
+"""
+相关性预筛基准：对全部存档页面跑两级预筛，统计各级排除数量和单篇耗时
+（对比：一次 Kimi 调用通常要几秒、几千 token）
+用法: python benchmarks/bench_prefilter.py [web_archives目录] [模型文件]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import page_extractor  # noqa: E402
+import relevance_filter  # noqa: E402
+import replay  # noqa: E402
+
+
+def main():
+    archive_dir = sys.argv[1] if len(sys.argv) > 1 else 'web_archives'
+    model_path = sys.argv[2] if len(sys.argv) > 2 else relevance_filter.DEFAULT_MODEL_PATH
+
+    pages = []
+    for document in replay.iter_documents(archive_dir):
+        parsed = page_extractor.extract_html(replay.read_body(document).decode('utf-8', errors='ignore'))
+        pages.append((parsed['title'], parsed['text']))
+    if not pages:
+        print(f'{archive_dir} 下没有存档')
+        return
+
+    prefilter = relevance_filter.RelevanceFilter(model_path)
+    print(f'{len(pages)} 份存档，第二级分类器: {"已加载 " + model_path if prefilter.classifier else "无模型文件，跳过"}')
+    start = time.perf_counter()
+    for title, text in pages:
+        prefilter.check(title, text)
+    elapsed = time.perf_counter() - start
+    print(f'  {prefilter.report()}')
+    print(f'  平均每篇 {elapsed / len(pages) * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+项目匹配基准：ProjectIndex 分块索引 vs 逐个比较
+用法: python benchmarks/bench_project_index.py [现有项目数] [待匹配项目数]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gazetteer  # noqa: E402
+from project_matcher import ProjectMatcher  # noqa: E402
+
+NAME_CHARS = '东西南北中新城港湾河湖山桥苑园林溪滨江海塘口坝庄村镇开发高科技临空'
+SUFFIXES = ['地下污水处理厂', '净水厂', '再生水厂', '水质净化厂', '污水处理厂一期工程']
+PROCESSES = ['AAO+MBR', 'AAO+深床滤池', 'MBBR', 'SBR', '改良AAO+高效沉淀']
+
+
+def make_project(rng, cities):
+    city = rng.choice(cities)
+    province = gazetteer.CITY_PROVINCE[city]
+    return {
+        '项目名称': city + ''.join(rng.choice(NAME_CHARS) for _ in range(rng.randint(2, 4))) + rng.choice(SUFFIXES),
+        '地理位置': f'{province}·{city}',
+        '近期规模': rng.choice([2, 5, 8, 10, 15, 20, 30]),
+        '工程总投资': round(rng.uniform(1, 30), 1),
+        '水处理流程': rng.choice(PROCESSES),
+    }
+
+
+def perturb(rng, project):
+    """生成同一项目的另一来源版本"""
+    other = dict(project)
+    other['项目名称'] = project['项目名称'].replace('地下', '全地下') if rng.random() < 0.5 else '新建' + project['项目名称']
+    other['工程总投资'] = round(project['工程总投资'] * rng.uniform(0.9, 1.1), 1)
+    return other
+
+
+def main():
+    existing_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    rng = random.Random(42)
+    cities = [city for city in gazetteer.CITY_PROVINCE if len(city) <= 3]
+    existing = [make_project(rng, cities) for _ in range(existing_count)]
+    queries = [
+        perturb(rng, rng.choice(existing)) if rng.random() < 0.5 else make_project(rng, cities)
+        for _ in range(query_count)
+    ]
+    matcher = ProjectMatcher()
+
+    start = time.perf_counter()
+    index = matcher.build_index(existing)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [matcher.find_match(q, index) for q in queries]
+    index_time = time.perf_counter() - start
+
+    brute_queries = queries[:min(query_count, 50)]
+    start = time.perf_counter()
+    brute = [matcher.find_match(q, existing) for q in brute_queries]
+    brute_time = (time.perf_counter() - start) / len(brute_queries) * query_count
+
+    same = all(
+        (a is b or (a is None and b is None)) and abs(sa - sb) < 1e-12
+        for (a, sa), (b, sb) in zip(indexed, brute)
+    )
+    matched = sum(1 for m, _ in indexed if m is not None)
+    print(f'现有项目 {existing_count}，待匹配 {query_count}，匹配成功 {matched}')
+    print(f'  建索引        {build_time * 1000:9.1f} ms')
+    print(f'  索引匹配      {index_time * 1000:9.1f} ms')
+    print(f'  逐个比较(估算) {brute_time * 1000:9.1f} ms')
+    print(f'  前 {len(brute_queries)} 条结果与逐个比较一致: {same}')
+
+
+if __name__ == '__main__':
+    main()
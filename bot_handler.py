@@ -1,27 +1,25 @@
 # -*- coding: utf-8 -*-
 import json
 import os
-import urllib.request
-import urllib.error
 import re
 from datetime import datetime
 
+import archive_store
+import content_compactor
+import feishu_auth
+import field_extractor
+import gazetteer
+import http_cache
+import http_client
+import kimi_cache
+import page_extractor
+import relevance_filter
+
 def http_post(url, headers=None, data=None, timeout=10):
-    """HTTP POST"""
-    req_headers = headers or {}
-    if data:
-        json_data = json.dumps(data).encode('utf-8')
-        req_headers['Content-Type'] = 'application/json'
-    else:
-        json_data = None
-    
-    req = urllib.request.Request(url, data=json_data, headers=req_headers, method='POST')
-    
+    """HTTP POST（走共享连接池）"""
     try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            return resp.status, resp.read().decode('utf-8')
-    except urllib.error.HTTPError as e:
-        return e.code, e.read().decode('utf-8')
+        resp = http_client.post(url, headers=headers, json=data if data else None, timeout=timeout)
+        return resp.status_code, resp.content.decode('utf-8')
     except Exception as e:
         return 0, str(e)
 
@@ -32,6 +30,12 @@ GITHUB_REPO = "allensun4water-ux/underground-wastewater-tracker"
 FEISHU_APP_ID = os.environ.get('FEISHU_APP_ID')
 FEISHU_APP_SECRET = os.environ.get('FEISHU_APP_SECRET')
 
+# 提示词改动时递增，旧的缓存结果随之失效
+KIMI_PROMPT_VERSION = "bot-v1"
+# 正文压缩后的 token 预算、预留给回复的 token 数（据此自动选择 8k/32k 模型）
+KIMI_CONTENT_TOKENS = 4000
+KIMI_COMPLETION_TOKENS = 800
+
 def extract_with_kimi(url, title, content):
     """Kimi提取（无上下文，每次独立）"""
     
@@ -39,6 +43,15 @@ def extract_with_kimi(url, title, content):
         print("无KIMI_KEY，使用简单提取")
         return simple_extract(url, title, content)
     
+    # 预筛：验证页、与污水处理无关的页面不调用Kimi
+    passed, tier, score = relevance_filter.check(title, content)
+    if not passed:
+        print(f"预筛未通过（{tier}，分数 {score}），不调用Kimi，使用简单提取")
+        return simple_extract(url, title, content)
+    
+    # 按相关度挑选句子装入预算（原先截取前8000字）
+    kimi_content = content_compactor.compact(content, KIMI_CONTENT_TOKENS)
+    
     api_url = "https://api.moonshot.cn/v1/chat/completions"
     
     # 关键：system 指令强制要求只分析当前网页
@@ -56,7 +69,7 @@ def extract_with_kimi(url, title, content):
 
 【网页标题】{title}
 
-【网页正文】{content[:8000]}
+【网页正文】{kimi_content}
 
 请提取以下字段（当前网页中找不到的填 null）：
 - 项目名称（必须基于当前网页标题或正文）
@@ -87,13 +100,22 @@ def extract_with_kimi(url, title, content):
 注意：如果当前网页是"余杭污水处理厂"，就必须返回"余杭污水处理厂"，绝不能返回"嘉兴城东再生水厂"等其他项目名称！
 """
 
+    estimated = content_compactor.estimate_tokens(system_prompt + user_prompt) + KIMI_COMPLETION_TOKENS
+    model = content_compactor.choose_model(estimated)
+    
+    # 重复提交的同一篇文章直接用上次的提取结果
+    cached = kimi_cache.lookup(model, KIMI_PROMPT_VERSION, url, title, kimi_content)
+    if cached is not None:
+        print("Kimi缓存命中，跳过API调用")
+        return cached[0]
+    
     headers = {
         "Authorization": f"Bearer {KIMI_API_KEY}",
         "Content-Type": "application/json"
     }
     
     data = {
-        "model": "moonshot-v1-8k",
+        "model": model,
         "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
@@ -110,6 +132,7 @@ def extract_with_kimi(url, title, content):
             result = json.loads(resp_text)
             content_str = result['choices'][0]['message']['content']
             extracted = json.loads(content_str)
+            extracted['_api_usage'] = result.get('usage', {})
             
             print(f"Kimi原始返回: {extracted}")
             
@@ -130,6 +153,7 @@ def extract_with_kimi(url, title, content):
                     print(f"  Kimi返回: {result_name}")
                     extracted["项目名称"] = title[:50]
             
+            kimi_cache.store(model, KIMI_PROMPT_VERSION, title, kimi_content, extracted, content_str)
             return extracted
         else:
             print(f"Kimi错误: {resp_text[:200]}")
@@ -139,6 +163,25 @@ def extract_with_kimi(url, title, content):
         print(f"Kimi异常: {e}")
         return simple_extract(url, title, content)
 
+COMPANY_PATTERN = re.compile(r'(中国.*?公司|.*?集团|.*?市政|.*?环保|.*?水务|.*?建设)')
+_COMPANY_KEYWORDS = ('集团', '市政', '环保', '水务', '建设')
+_STATE_COMPANY_PATTERN = re.compile(r'中国.*?公司')
+
+def first_company(content):
+    """
+    等价于 re.findall(COMPANY_PATTERN, content)[0]，但只需线性时间
+    （原写法在没有关键词的长行上会从每个位置扫到行尾，几万字的正文要两秒）
+    """
+    for line in content.split('\n'):
+        # 行内有关键词时，正则必然从行首匹配成功
+        if any(word in line for word in _COMPANY_KEYWORDS):
+            return COMPANY_PATTERN.match(line).group(1)
+        # 否则只可能匹配“中国...公司”
+        match = _STATE_COMPANY_PATTERN.search(line)
+        if match:
+            return match.group()
+    return None
+
 def simple_extract(url, title, content):
     """简单正则提取（备用）"""
     data = {
@@ -155,31 +198,18 @@ def simple_extract(url, title, content):
         "_source": "simple"
     }
     
-    # 规模
-    scale_match = re.search(r'(\d+\.?\d*)\s*万\s*吨', content)
-    if scale_match:
-        data["近期规模"] = float(scale_match.group(1))
-    
-    # 投资
-    inv_match = re.search(r'(\d+\.?\d*)\s*亿', content)
-    if inv_match:
-        data["工程总投资"] = float(inv_match.group(1))
+    # 规模、投资（一次扫描）
+    fields = field_extractor.extract_fields(content)
+    data["近期规模"] = fields['scale']
+    data["工程总投资"] = fields['investment']
     
     # 地理位置
-    provinces = ['北京', '天津', '上海', '重庆', '河北', '山西', '辽宁', '吉林', 
-                 '黑龙江', '江苏', '浙江', '安徽', '福建', '江西', '山东', '河南',
-                 '湖北', '湖南', '广东', '海南', '四川', '贵州', '云南', '陕西',
-                 '甘肃', '青海', '内蒙古', '广西', '西藏', '宁夏', '新疆']
-    for prov in provinces:
-        if prov in content:
-            data["地理位置"] = prov
-            break
+    data["地理位置"] = gazetteer.extract_location(content)
     
     # 公司
-    company_pattern = r'(中国.*?公司|.*?集团|.*?市政|.*?环保|.*?水务|.*?建设)'
-    companies = re.findall(company_pattern, content)
-    if companies:
-        data["投资方/总包方"] = companies[0][:50]
+    company = first_company(content)
+    if company:
+        data["投资方/总包方"] = company[:50]
     
     # 工艺
     if 'AAO' in content or 'A2O' in content:
@@ -198,127 +228,66 @@ def simple_extract(url, title, content):
 def send_feishu_message(chat_id, content):
     """发送消息到飞书"""
     try:
-        # 获取token
-        token_url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
-        status, resp_text = http_post(token_url, data={
-            "app_id": FEISHU_APP_ID,
-            "app_secret": FEISHU_APP_SECRET
-        })
-        
-        if status != 200:
-            print(f"获取token失败: {status}")
-            return False
-        
-        token = json.loads(resp_text).get("tenant_access_token")
-        if not token:
-            return False
-        
-        # 发送消息
+        # 令牌由 feishu_auth 统一带上（共享缓存，失效时刷新重试一次）
         url = "https://open.feishu.cn/open-apis/im/v1/messages?receive_id_type=chat_id"
-        headers = {"Authorization": f"Bearer {token}"}
         data = {
             "receive_id": chat_id,
             "msg_type": "text",
             "content": json.dumps({"text": content[:500]})
         }
         
-        status, _ = http_post(url, headers=headers, data=data)
-        return status == 200
+        resp = feishu_auth.post(url, json=data, timeout=10)
+        return resp.status_code == 200
     except Exception as e:
         print(f"发送消息失败: {e}")
         return False
 
+def parse_page(html):
+    """从HTML中提取标题和正文（fetch_webpage 与离线重放共用）"""
+    return page_extractor.extract_html(html)
+
 def fetch_webpage(url):
-    """获取网页内容（加强版）"""
+    """获取网页内容（边下载边提取，正文结束后不再读取剩余页面）"""
     try:
-        import urllib.request
-        req = urllib.request.Request(
-            url, 
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'zh-CN,zh;q=0.9'
-            }
+        resp = http_client.get(
+            url,
+            headers={'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'},
+            timeout=20,
+            stream=True
         )
+        resp.raise_for_status()
+        
+        parsed, received = page_extractor.extract_response(resp)
+        print(f"已读取 {received / 1024:.0f} KB")
+        
+        title, text = parsed["title"], parsed["text"]
+        
+        print(f"获取网页成功: 标题={title[:50]}, 内容长度={len(text)}")
+        return {"success": True, "title": title, "content": text}
         
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            html = resp.read().decode('utf-8', errors='ignore')
-            
-            # 提取标题
-            title_match = re.search(r'<title[^>]*>(.*?)</title>', html, re.DOTALL | re.IGNORECASE)
-            title = title_match.group(1).strip() if title_match else ""
-            title = re.sub(r'\s+', ' ', title)  # 清理空白
-            
-            # 提取正文（更智能）
-            # 尝试找文章正文区域
-            content = ""
-            
-            # 方法1：找 article 标签
-            article_match = re.search(r'<article[^>]*>(.*?)</article>', html, re.DOTALL | re.IGNORECASE)
-            if article_match:
-                content = article_match.group(1)
-            else:
-                # 方法2：找常见的正文div
-                for class_name in ['content', 'rich_media_content', 'article-content', 'post-content']:
-                    pattern = f'<div[^>]*class=["\'][^"\']*{class_name}[^"\']*["\'][^>]*>(.*?)</div>'
-                    match = re.search(pattern, html, re.DOTALL | re.IGNORECASE)
-                    if match:
-                        content = match.group(1)
-                        break
-            
-            # 如果没找到，用整个body
-            if not content:
-                body_match = re.search(r'<body[^>]*>(.*?)</body>', html, re.DOTALL | re.IGNORECASE)
-                content = body_match.group(1) if body_match else html
-            
-            # 去除标签
-            text = re.sub(r'<[^>]+>', ' ', content)
-            text = re.sub(r'\s+', ' ', text).strip()
-            
-            print(f"获取网页成功: 标题={title[:50]}, 内容长度={len(text)}")
-            return {"success": True, "title": title, "content": text}
-            
     except Exception as e:
         print(f"获取网页失败: {e}")
         return {"success": False, "error": str(e)}
 
 def archive_webpage(url, project_id):
-    """存档网页"""
+    """存档网页（正文按哈希去重，页面未变化时只追加一条存档记录）"""
     try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            html = resp.read().decode('utf-8')
-            
-            # 保存文件
-            import hashlib
-            url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-            filename = f"web_archives/{project_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{url_hash}.html"
-            
-            os.makedirs("web_archives", exist_ok=True)
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(html)
-            
-            return {"success": True, "path": filename}
+        # 条件请求：上次抓取后页面未变化时服务器返回304，不重复下载
+        resp = http_cache.get(url, timeout=20)
+        resp.raise_for_status()
+        
+        store = archive_store.get_store()
+        entry = store.put(url, project_id, resp.content, resp.headers, resp.status_code)
+        
+        path, offset, _ = store.locate(entry["sha256"])
+        return {"success": True, "path": f"{path}@{offset}",
+                "sha256": entry["sha256"], "deduplicated": entry["deduplicated"]}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 def push_to_feishu(extracted, url):
     """推送到飞书多维表格（只推主表存在的11个字段）"""
     
-    # 准备token
-    token_url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
-    status, resp_text = http_post(token_url, data={
-        "app_id": FEISHU_APP_ID,
-        "app_secret": FEISHU_APP_SECRET
-    })
-    
-    if status != 200:
-        return False, f"获取token失败: {status}"
-    
-    token = json.loads(resp_text).get("tenant_access_token")
-    if not token:
-        return False, "token为空"
-    
     # 主表配置
     base_id = os.environ.get('FEISHU_BASE_ID')
     table_id = os.environ.get('FEISHU_TABLE_ID')
@@ -349,17 +318,18 @@ def push_to_feishu(extracted, url):
     
     # 推送
     push_url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{base_id}/tables/{table_id}/records"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
+    headers = {"Content-Type": "application/json"}
     
-    status, resp_text = http_post(push_url, headers=headers, data=record_data)
+    # 令牌由 feishu_auth 统一带上（共享缓存，失效时刷新重试一次）
+    try:
+        resp = feishu_auth.post(push_url, headers=headers, json=record_data, timeout=10)
+    except Exception as e:
+        return False, str(e)
     
-    if status == 200:
+    if resp.status_code == 200:
         return True, "成功"
     else:
-        return False, f"{status}: {resp_text[:200]}"
+        return False, f"{resp.status_code}: {resp.text[:200]}"
 
 def main():
     """主入口"""
@@ -0,0 +1,110 @@
+"""
+正文压缩 - 调用 Kimi 前按 token 预算挑选最有用的句子，代替简单截取前 N 个字
+句子按相关度打分：带单位的数字（规模/投资/面积/浓度）、地下厂特征词、项目关键词、单位名称，
+导语加分，版权/关注二维码等套话减分；按分数从高到低装入预算，再按原文顺序拼接，
+不相邻的句子之间用“…”隔开。全文不超预算时原样返回。
+同时根据估算的总 token 数在 moonshot-v1-8k / 32k 之间自动选择模型
+"""
+
+import re
+
+import field_extractor
+from keywords import UNDERGROUND_KEYWORDS
+
+# (模型, 上下文窗口)，从小到大
+MODELS = [
+    ('moonshot-v1-8k', 8192),
+    ('moonshot-v1-32k', 32768),
+]
+# 估算有误差，窗口只用到这个比例
+WINDOW_USAGE = 0.9
+
+_SENTENCE = re.compile(r'[^。！？；!?;\n]+[。！？；!?;]*')
+
+PROJECT_KEYWORDS = (
+    '污水处理厂', '污水厂', '再生水厂', '净水厂', '水质净化', '工艺', 'AAO', 'A2O', 'MBR',
+    '中标', '总包', 'EPC', 'PPP', '设计', '施工', '运营', '投资', '规模', '占地',
+    '出水', '标准', '除臭', '污泥', '开工', '投产', '通水', '建成',
+)
+COMPANY_KEYWORDS = ('公司', '集团', '市政', '环保', '水务', '建设', '设计院', '研究院')
+BOILERPLATE_KEYWORDS = ('版权', '免责声明', '扫码', '二维码', '关注', '点击', '责任编辑', '转载', '阅读原文')
+
+MIN_SENTENCE_CHARS = 6
+
+
+def estimate_tokens(text):
+    """粗略估算 token 数（中文约 1.5 字一个 token）"""
+    return int(len(text) / 1.5) + 1
+
+
+def choose_model(total_tokens):
+    """按估算的总 token 数（提示词 + 回复）选择上下文足够的最小模型"""
+    for model, window in MODELS:
+        if total_tokens <= window * WINDOW_USAGE:
+            return model
+    return MODELS[-1][0]
+
+
+def split_sentences(text):
+    return [match.group().strip() for match in _SENTENCE.finditer(text) if match.group().strip()]
+
+
+def score_sentence(sentence, index=0):
+    """句子相关度，越高越优先保留"""
+    if len(sentence) < MIN_SENTENCE_CHARS:
+        return 0
+    score = 0
+    quantities = field_extractor.extract_quantities(sentence)
+    score += 4 * min(len(quantities), 3)
+    score += 2 * sum(1 for q in quantities if q.context)
+    if any(word in sentence for word in UNDERGROUND_KEYWORDS):
+        score += 3
+    score += min(sum(1 for word in PROJECT_KEYWORDS if word in sentence), 3)
+    if any(word in sentence for word in COMPANY_KEYWORDS):
+        score += 2
+    if index == 0:
+        score += 1  # 导语通常概括了项目
+    if any(word in sentence for word in BOILERPLATE_KEYWORDS):
+        score -= 5
+    return score
+
+
+def compact(content, budget):
+    """把正文压缩到约 budget 个 token 以内"""
+    if not content or estimate_tokens(content) <= budget:
+        return content
+
+    sentences = split_sentences(content)
+    # 转载页面常见重复段落，只保留第一次出现
+    seen = set()
+    candidates = []
+    for index, sentence in enumerate(sentences):
+        if sentence in seen:
+            continue
+        seen.add(sentence)
+        candidates.append((score_sentence(sentence, index), index, sentence))
+
+    candidates.sort(key=lambda c: (-c[0], c[1]))
+    chosen = []
+    used = 0
+    for score, index, sentence in candidates:
+        if score < 0:
+            break
+        cost = estimate_tokens(sentence)
+        if used + cost > budget:
+            continue  # 放不下，看看更短的句子
+        chosen.append(index)
+        used += cost
+
+    if not chosen:
+        return content[:int(budget * 1.5)]
+
+    chosen.sort()
+    parts = []
+    previous = None
+    for index in chosen:
+        if previous is not None and index != previous + 1:
+            parts.append('…')
+        parts.append(sentences[index])
+        previous = index
+    return ''.join(parts)
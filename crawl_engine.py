@@ -0,0 +1,160 @@
+"""
+并发抓取引擎 - 多站点列表页同时抓取，详情页并发补充
+按主机和全局两级限制并发，输出顺序与逐站逐页抓取一致
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from urllib.parse import urlparse
+
+
+class CrawlEngine:
+    """并发抓取引擎"""
+
+    def __init__(self, crawlers, max_workers=6, per_host_limit=2):
+        """
+        crawlers: 爬虫实例列表（需有 fetch_list 和 base_url）
+        max_workers: 全局并发上限
+        per_host_limit: 单个主机的并发上限
+        """
+        self.crawlers = crawlers
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self._host_locks = {}
+        self._host_locks_guard = threading.Lock()
+        # 每个站点遇到空页后的最小页码，之后的页不再请求
+        self._exhausted = {}
+        self._exhausted_guard = threading.Lock()
+
+    def _host_semaphore(self, crawler):
+        """获取站点所在主机的信号量"""
+        host = urlparse(getattr(crawler, 'base_url', '')).netloc or crawler.source_name
+        with self._host_locks_guard:
+            if host not in self._host_locks:
+                self._host_locks[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_locks[host]
+
+    def _is_exhausted(self, index, page):
+        with self._exhausted_guard:
+            return page > self._exhausted.get(index, float('inf'))
+
+    def _mark_exhausted(self, index, page):
+        with self._exhausted_guard:
+            self._exhausted[index] = min(page, self._exhausted.get(index, page))
+
+    def _fetch_page(self, index, crawler, page):
+        """抓取单个列表页（受主机并发限制）"""
+        if self._is_exhausted(index, page):
+            return []
+        with self._host_semaphore(crawler):
+            if self._is_exhausted(index, page):
+                return []
+            items = crawler.fetch_list(page)
+        if not items:
+            self._mark_exhausted(index, page)
+        return items
+
+    def fetch_lists(self, pages=2):
+        """
+        并发抓取所有站点的列表页
+        返回: [(crawler, [page1_items, page2_items, ...]), ...]，
+        每个站点的页在第一个空页处截断，与顺序抓取结果一致
+        """
+        self._exhausted = {}
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # 按页轮转提交，让各站点的第1页最先开始
+            for page in range(1, pages + 1):
+                for index, crawler in enumerate(self.crawlers):
+                    futures[(index, page)] = pool.submit(self._fetch_page, index, crawler, page)
+
+        results = []
+        for index, crawler in enumerate(self.crawlers):
+            site_pages = []
+            for page in range(1, pages + 1):
+                items = futures[(index, page)].result()
+                if not items:
+                    break
+                site_pages.append(items)
+            results.append((crawler, site_pages))
+        return results
+
+    def _walk_site(self, crawler, max_pages, is_new):
+        """逐页抓取单个站点，直到某页全部是已知条目"""
+        site_pages = []
+        for page in range(1, max_pages + 1):
+            with self._host_semaphore(crawler):
+                items = crawler.fetch_list(page)
+            if not items:
+                break
+            new_items = [item for item in items if is_new(crawler, item)]
+            print(f'  {crawler.source_name} 第{page}页: {len(items)}条，新增{len(new_items)}条')
+            if not new_items:
+                break
+            site_pages.append(new_items)
+        return site_pages
+
+    def fetch_lists_incremental(self, is_new, max_pages=10):
+        """
+        增量抓取：各站点并发，站内逐页抓取，遇到全部已知的页即停止翻页
+        is_new: 判断条目是否为新条目的函数 (crawler, item) -> bool
+        返回: 与 fetch_lists 相同的结构，只包含新条目
+        """
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.crawlers)) or 1) as pool:
+            futures = [pool.submit(self._walk_site, crawler, max_pages, is_new) for crawler in self.crawlers]
+        return [(crawler, future.result()) for crawler, future in zip(self.crawlers, futures)]
+
+    def _fetch_detail(self, crawler, url, item_timeout, stop_at):
+        """抓取单个详情页（受主机并发限制），总耗时不超过 item_timeout，也不超过阶段截止时间"""
+        with self._host_semaphore(crawler):
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                return None  # 排队等主机并发期间阶段预算已用完
+            return crawler.fetch_detail(url, timeout=item_timeout, deadline=min(item_timeout, remaining))
+
+    def enrich_details(self, jobs, item_timeout=15, budget=120):
+        """
+        并发抓取详情页，补充 company/scale/investment/location 等字段
+        jobs: [(crawler, item), ...]，item 为 fetch_list 返回的字典，原地更新
+        item_timeout: 单个详情页的总耗时上限（秒，含重试和读取正文，慢速响应也会被截断）
+        budget: 整个阶段的时间预算（秒），超时后保留已完成的结果；
+            进行中的请求同样在预算到期时中止，工作线程随之退出，不会拖长进程退出时间
+        返回: 成功补充的条数
+        """
+        jobs = [(crawler, item) for crawler, item in jobs if item.get('url')]
+        if not jobs:
+            return 0
+
+        start = time.monotonic()
+        stop_at = start + budget
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = {
+            pool.submit(self._fetch_detail, crawler, item['url'], item_timeout, stop_at): item
+            for crawler, item in jobs
+        }
+
+        enriched = 0
+        try:
+            for future in as_completed(futures, timeout=budget):
+                try:
+                    detail = future.result()
+                except Exception as e:
+                    print(f'  详情页抓取异常: {e}')
+                    continue
+                if not detail:
+                    continue
+                item = futures[future]
+                # 只用非空值覆盖，避免详情页缺失字段冲掉列表页已有信息
+                item.update({k: v for k, v in detail.items() if v})
+                enriched += 1
+        except FutureTimeoutError:
+            done = sum(1 for f in futures if f.done())
+            print(f'  详情页阶段超出时间预算({budget}s)，已完成 {done}/{len(futures)}，其余保留列表页信息')
+        finally:
+            # 未开始的任务直接取消；进行中的任务不再等待，它们最迟在 stop_at 前结束
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        print(f'  详情页补充 {enriched}/{len(jobs)} 条，用时 {time.monotonic() - start:.1f}s')
+        return enriched
@@ -0,0 +1,79 @@
+"""
+增量抓取状态 - 按数据来源记录高水位
+保存每个来源已见过的URL集合（判断新旧条目只看URL）和最新发布时间（只用于日志）
+"""
+
+import json
+import os
+import re
+from datetime import datetime
+
+DEFAULT_STATE_FILE = 'crawl_state.json'
+
+# 每个来源最多保留的URL数量（保留最近的）
+MAX_URLS_PER_SOURCE = 5000
+
+
+def normalize_date(text):
+    """把 2026-02-08 / 2026/2/8 / 2026年2月8日 等统一成 YYYY-MM-DD，无法识别返回空字符串"""
+    if not text:
+        return ''
+    match = re.search(r'(\d{4})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})', str(text))
+    if not match:
+        return ''
+    year, month, day = match.groups()
+    return f'{year}-{int(month):02d}-{int(day):02d}'
+
+
+class CrawlState:
+    """各来源的增量抓取高水位"""
+
+    def __init__(self, path=DEFAULT_STATE_FILE):
+        self.path = path
+        self.sources = {}
+        self._url_sets = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.sources = json.load(f)
+            except Exception as e:
+                print(f'读取抓取状态失败，按首次运行处理: {e}')
+                self.sources = {}
+        for source, info in self.sources.items():
+            self._url_sets[source] = set(info.get('urls', []))
+
+    def latest_publish_time(self, source):
+        return self.sources.get(source, {}).get('latest_publish_time', '')
+
+    def is_known(self, source, item):
+        """
+        条目是否已抓取过：只看该来源的URL集合
+        不按发布时间判断，晚发现的旧条目（补发、列表排序变化、之前抓取失败）照样当作新条目
+        """
+        url = item.get('url', '')
+        return bool(url and url in self._url_sets.get(source, ()))
+
+    def record(self, source, items):
+        """记录本次抓到的条目，推进高水位"""
+        info = self.sources.setdefault(source, {'latest_publish_time': '', 'urls': []})
+        url_set = self._url_sets.setdefault(source, set(info['urls']))
+
+        for item in items:
+            url = item.get('url', '')
+            if url and url not in url_set:
+                url_set.add(url)
+                info['urls'].append(url)
+            pub_date = normalize_date(item.get('publish_time', ''))
+            if pub_date > info['latest_publish_time']:
+                info['latest_publish_time'] = pub_date
+
+        if len(info['urls']) > MAX_URLS_PER_SOURCE:
+            info['urls'] = info['urls'][-MAX_URLS_PER_SOURCE:]
+            self._url_sets[source] = set(info['urls'])
+        info['updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.sources, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,187 @@
+"""
+飞书 tenant_access_token 管理 - 所有飞书接口共用一个令牌
+令牌连同过期时间缓存在内存和本地文件里（同一个 Job 的多个进程/步骤共用），
+离过期不到 REFRESH_MARGIN 秒时提前刷新；并发刷新只发一次请求（进程内加锁，进程间加文件锁）
+调用飞书接口统一走 request()：自动带上令牌，接口报令牌失效时强制刷新后重试一次
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+import http_client
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只做进程内去重
+    fcntl = None
+
+TOKEN_URL = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
+
+# 接口返回这些错误码表示令牌无效或已过期，应强制刷新后重试
+INVALID_TOKEN_CODES = (99991661, 99991663, 99991668)
+
+# 令牌有效期一般为 2 小时，剩余不到 5 分钟就换新的
+REFRESH_MARGIN = 300
+
+
+def default_token_file(app_id):
+    """默认放在临时目录（不在仓库工作区里，避免被 git add 提交）"""
+    return os.path.join(tempfile.gettempdir(), f'feishu_token_{app_id}.json')
+
+
+class TokenManager:
+    """缓存并按需刷新一个应用的 tenant_access_token"""
+
+    def __init__(self, app_id, app_secret, token_file=None, margin=REFRESH_MARGIN):
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.token_file = token_file or default_token_file(app_id)
+        self.margin = margin
+        self._token = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        self.stats = {'cached': 0, 'loaded': 0, 'fetched': 0}
+
+    def _fresh(self, expires_at):
+        return expires_at - self.margin > time.time()
+
+    def get_token(self, force=False):
+        """返回有效的令牌；force=True 时丢弃缓存重新获取（例如接口报令牌失效）"""
+        if not force and self._token and self._fresh(self._expires_at):
+            self.stats['cached'] += 1
+            return self._token
+
+        stale = self._token if force else None
+        with self._lock:
+            # 等锁期间其他线程可能已经刷新过
+            if self._token and self._token != stale and self._fresh(self._expires_at):
+                self.stats['cached'] += 1
+                return self._token
+            with self._file_lock():
+                saved = self._load()
+                if saved and saved['token'] != stale and self._fresh(saved['expires_at']):
+                    self.stats['loaded'] += 1
+                else:
+                    saved = self._fetch()
+                    self._save(saved)
+                    self.stats['fetched'] += 1
+            self._token, self._expires_at = saved['token'], saved['expires_at']
+            return self._token
+
+    def _fetch(self):
+        resp = http_client.post(TOKEN_URL, json={
+            "app_id": self.app_id,
+            "app_secret": self.app_secret
+        }, timeout=10)
+        result = resp.json()
+        token = result.get("tenant_access_token")
+        if result.get("code") != 0 or not token:
+            raise Exception(f"获取token失败: {result}")
+        print(f"飞书token已刷新，有效期 {result.get('expire', 0)} 秒")
+        return {'token': token, 'expires_at': time.time() + result.get('expire', 0)}
+
+    def _load(self):
+        try:
+            with open(self.token_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get('app_id') != self.app_id or not saved.get('token'):
+            return None
+        return saved
+
+    def _save(self, saved):
+        """原子写入，文件权限只允许本用户读写"""
+        tmp_path = f'{self.token_file}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'app_id': self.app_id, **saved}, f)
+            os.replace(tmp_path, self.token_file)
+        except OSError as e:
+            print(f"保存飞书token失败（不影响本进程）: {e}")
+
+    def _file_lock(self):
+        return _FileLock(f'{self.token_file}.lock')
+
+
+class _FileLock:
+    """进程间互斥：同时启动的多个进程只有一个去请求令牌"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return self
+        try:
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        except OSError:
+            self._file = None  # 拿不到文件锁就退化为各自请求
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """获取进程内共享的令牌管理器（应用凭证取自 FEISHU_APP_ID / FEISHU_APP_SECRET）"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = TokenManager(
+                    os.environ.get('FEISHU_APP_ID'),
+                    os.environ.get('FEISHU_APP_SECRET'),
+                    os.environ.get('FEISHU_TOKEN_FILE'),
+                )
+    return _manager
+
+
+def get_token(force=False):
+    """获取共享的 tenant_access_token，失败时抛出异常"""
+    return get_manager().get_token(force)
+
+
+def request(method, url, headers=None, **kwargs):
+    """
+    带令牌调用飞书接口（其余参数同 http_client.request），返回响应
+    接口返回 INVALID_TOKEN_CODES 时强制刷新令牌后重试一次（令牌被提前吊销、其他进程换了新令牌等）；
+    获取令牌失败时抛出异常
+    """
+    for attempt in range(2):
+        token = get_token(force=attempt > 0)
+        resp = http_client.request(method, url, headers={**(headers or {}), "Authorization": f"Bearer {token}"},
+                                   **kwargs)
+        try:
+            code = resp.json().get("code")
+        except ValueError:
+            return resp
+        if attempt or code not in INVALID_TOKEN_CODES:
+            return resp
+        print(f"飞书令牌失效（{code}），刷新后重试")
+    return resp
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request('PUT', url, **kwargs)
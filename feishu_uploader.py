@@ -3,7 +3,8 @@
 自动将爬虫数据推送到飞书，支持去重和字段映射
 """
 
-import requests
+import feishu_auth
+import field_extractor
 import json
 import os
 from datetime import datetime
@@ -20,34 +21,13 @@ class FeishuUploader:
             raise ValueError("缺少飞书配置环境变量")
     
     def get_access_token(self):
-        """获取飞书 access_token"""
-        url = "https://open.feishu.cn/open-apis/auth/v3/app_access_token/internal"
-        headers = {
-            "Content-Type": "application/json; charset=utf-8"
-        }
-        data = {
-            "app_id": self.app_id,
-            "app_secret": self.app_secret
-        }
-        
-        resp = requests.post(url, headers=headers, json=data)
-        result = resp.json()
-        
-        if result.get("code") == 0:
-            self.access_token = result["tenant_access_token"]
-            return self.access_token
-        else:
-            raise Exception(f"获取token失败: {result}")
+        """获取飞书 tenant_access_token（共享缓存，快过期时自动刷新）"""
+        self.access_token = feishu_auth.get_token()
+        return self.access_token
     
     def get_existing_records(self):
         """获取已有记录（用于去重）"""
-        if not self.access_token:
-            self.get_access_token()
-        
         url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.base_id}/tables/{self.table_id}/records"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}"
-        }
         
         all_records = []
         page_token = None
@@ -57,7 +37,7 @@ class FeishuUploader:
             if page_token:
                 params["page_token"] = page_token
             
-            resp = requests.get(url, headers=headers, params=params)
+            resp = feishu_auth.get(url, params=params)
             result = resp.json()
             
             if result.get("code") != 0:
@@ -98,8 +78,8 @@ class FeishuUploader:
                 "text": "查看原文" if len(title) < 5 else title[:50]
             } if url else title,
             "原文摘要": item.get("原文摘要", "")[:2000],  # 飞书文本字段限制
-            "近期规模_万吨每日": self._extract_number(item.get("近期规模", "")),
-            "工程总投资_亿元": self._extract_number(item.get("工程总投资", "")),
+            "近期规模_万吨每日": self._extract_number(item.get("近期规模", ""), 'scale'),
+            "工程总投资_亿元": self._extract_number(item.get("工程总投资", ""), 'investment'),
             "地理位置": item.get("地理位置", ""),
             "投资方总包方": item.get("投资方/总包方", ""),
             "抓取时间": item.get("抓取时间", datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
@@ -108,27 +88,14 @@ class FeishuUploader:
             "关联项目ID": ""
         }
     
-    def _extract_number(self, value):
-        """从字符串提取数字"""
-        if isinstance(value, (int, float)):
-            return float(value)
-        if not value:
-            return None
-        
-        import re
-        match = re.search(r'(\d+\.?\d*)', str(value))
-        return float(match.group(1)) if match else None
+    def _extract_number(self, value, kind=None):
+        """从字符串提取数字（带单位时按 kind 换算）"""
+        return field_extractor.to_number(value, kind)
     
     def add_records(self, records):
         """批量添加记录到飞书"""
-        if not self.access_token:
-            self.get_access_token()
-        
         url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.base_id}/tables/{self.table_id}/records/batch_create"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
+        headers = {"Content-Type": "application/json"}
         
         # 飞书限制每次最多 500 条
         batch_size = 100
@@ -141,7 +108,7 @@ class FeishuUploader:
                 "records": [{"fields": r} for r in batch]
             }
             
-            resp = requests.post(url, headers=headers, json=data)
+            resp = feishu_auth.post(url, headers=headers, json=data)
             result = resp.json()
             
             if result.get("code") == 0:
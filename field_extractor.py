@@ -0,0 +1,132 @@
+"""
+数值字段提取 - 一遍扫描找出所有“数字+单位”
+处理规模（万吨/日）、投资（亿元）、浓度（mg/L）、面积（平方米）统一换算并做范围校验，
+爬虫、表单处理、机器人、飞书推送共用
+"""
+
+import re
+from collections import namedtuple
+
+# kind: scale / investment / concentration / area
+# value: 换算到标准单位后的数值；unit: 标准单位；start/end: 在原文中的位置
+# rank: 单位明确程度，越小越可信；context: 前文是否有“规模/投资”等提示词
+Quantity = namedtuple('Quantity', 'kind value unit start end raw rank context')
+
+# (分组名, 单位正则, 类型, 换算系数, rank) —— 顺序即匹配优先级，长的写在前面
+# 类型为 None 的规则只用来吃掉不是处理规模的“万吨/年”等，避免再被后面的宽松规则匹配
+_UNIT_RULES = [
+    ('scale_wan', r'万\s*(?:吨|t|m³|m3|立方米|方)?\s*[/／每]\s*(?:日|天|d)', 'scale', 1, 0),
+    ('wan_per_period', r'万\s*(?:吨|t|m³|m3|立方米|方)?\s*[/／每]\s*(?:年|月|a)', None, 1, 0),
+    ('scale_wan_loose', r'万\s*(?:吨|立方米|方)', 'scale', 1, 1),
+    ('scale_ton', r'(?:吨|t|m³|m3|立方米|方)\s*[/／每]\s*(?:日|天|d)', 'scale', 1e-4, 0),
+    ('inv_yi', r'亿\s*元', 'investment', 1, 0),
+    ('inv_wan', r'万\s*元', 'investment', 1e-4, 1),
+    ('area_wan', r'万\s*(?:平方米|平米|㎡|m²)', 'area', 1e4, 0),
+    ('wan_bare', r'万', 'scale', 1, 2),
+    ('inv_yi_bare', r'亿', 'investment', 1, 1),
+    ('conc', r'(?:mg\s*/\s*[lL]|毫克\s*/\s*升|毫克每升)', 'concentration', 1, 0),
+    ('area', r'(?:平方米|平米|㎡|m²)', 'area', 1, 0),
+    ('area_ha', r'公顷', 'area', 1e4, 0),
+    ('area_mu', r'亩', 'area', 666.67, 1),
+]
+
+_RULES = {name: (kind, factor, rank) for name, _, kind, factor, rank in _UNIT_RULES}
+
+_UNITS = {
+    'scale': '万吨/日',
+    'investment': '亿元',
+    'concentration': 'mg/L',
+    'area': '平方米',
+}
+
+# 各类型的合理取值范围（标准单位）
+_RANGES = {
+    'scale': (0, 500),
+    'investment': (0.1, 500),
+    'concentration': (0, 100000),
+    'area': (0, 1e8),
+}
+
+# 数字前面出现这些词时，优先取该候选
+_CONTEXT_WORDS = {
+    'scale': ('规模', '处理能力', '处理量', '日处理'),
+    'investment': ('投资', '概算', '造价'),
+    'concentration': (),
+    'area': ('占地', '面积'),
+}
+_CONTEXT_WINDOW = 12
+
+# 单位不含“/日”的规模写法（污泥“万吨”、土方“万方”也是这样写），只在“规模”等提示词之后、
+# 且前文不是按年计的量（“年处理量”等）时才采用
+_CONTEXT_REQUIRED = ('scale_wan_loose', 'wan_bare')
+_ANNUAL_WORDS = ('年处理', '年产', '年均', '每年', '全年')
+
+_PATTERN = re.compile(
+    r'(?P<num>\d+(?:,\d{3})*(?:\.\d+)?)\s*(?:'
+    + '|'.join(f'(?P<{name}>{unit})' for name, unit, _, _, _ in _UNIT_RULES)
+    + ')'
+)
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def extract_quantities(text):
+    """一遍扫描提取所有数值候选（已换算并过滤超出范围的值），按出现位置排序"""
+    if not text:
+        return []
+
+    quantities = []
+    for match in _PATTERN.finditer(text):
+        kind, factor, rank = _RULES[match.lastgroup]
+        if kind is None:
+            continue
+        start = match.start()
+        before = text[max(0, start - _CONTEXT_WINDOW):start]
+        context = any(word in before for word in _CONTEXT_WORDS[kind])
+        if match.lastgroup in _CONTEXT_REQUIRED and (
+                not context or any(word in before for word in _ANNUAL_WORDS)):
+            continue
+
+        value = round(float(match.group('num').replace(',', '')) * factor, 4)
+        low, high = _RANGES[kind]
+        if not low < value <= high:
+            continue
+        quantities.append(Quantity(kind, value, _UNITS[kind], start, match.end(), match.group(), rank, context))
+    return quantities
+
+
+def pick(quantities, kind):
+    """取某类最可信的值：有提示词优先，其次单位明确，再其次位置靠前"""
+    candidates = [q for q in quantities if q.kind == kind]
+    if not candidates:
+        return None
+    best = min(candidates, key=lambda q: (not q.context, q.rank, q.start))
+    return best.value
+
+
+def extract_fields(text):
+    """一次扫描同时得到规模、投资、面积"""
+    quantities = extract_quantities(text)
+    return {
+        'scale': pick(quantities, 'scale'),
+        'investment': pick(quantities, 'investment'),
+        'area': pick(quantities, 'area'),
+    }
+
+
+def to_number(value, kind=None):
+    """
+    把字段值转成数字：数字原样返回；
+    字符串带单位时按 kind 换算（如“5000吨/日” -> 0.5），否则取第一个数字
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return None
+
+    text = str(value)
+    if kind:
+        result = pick(extract_quantities(text), kind)
+        if result is not None:
+            return result
+    match = _NUMBER.search(text)
+    return float(match.group()) if match else None
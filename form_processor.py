@@ -4,35 +4,46 @@
 
 import os
 import json
-import requests
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import feishu_auth
+import html_backend
+import http_cache
+import field_extractor
 from datetime import datetime, timedelta
 
+FEISHU_API = "https://open.feishu.cn/open-apis"
+
+# 流水线模式：并发抓取的线程数；批量接口每次最多 500 条
+FETCH_WORKERS = 8
+BATCH_SIZE = 500
+# 批量请求遇到限流/服务端错误时，整块退避重试的次数和基础等待秒数
+MAX_RETRIES = 3
+RETRY_DELAY = 1.0
+# 可以原样重试的失败：HTTP 状态码，以及飞书的限流、写冲突、数据未就绪、超时错误码
+TRANSIENT_STATUS = (429, 500, 502, 503, 504)
+TRANSIENT_CODES = (1254290, 1254291, 1254607, 1255040)
+
+# 网页标题/正文提取逻辑改动时递增，HTTP 缓存里的旧解析结果随之不再复用
+FORM_PARSER_VERSION = 'v1'
+
+# _batch_post 的结果
+BATCH_OK = 'ok'
+BATCH_TRANSIENT = 'transient'  # 与记录内容无关，整块稍后重试
+BATCH_REJECTED = 'rejected'    # 记录内容有问题（字段校验等），拆开定位
+
 class FormProcessor:
     def __init__(self):
         self.form_base_id = os.environ.get('FEISHU_FORM_BASE_ID')
         self.form_table_id = os.environ.get('FEISHU_FORM_TABLE_ID')
         self.main_base_id = os.environ.get('FEISHU_BASE_ID')
         self.main_table_id = os.environ.get('FEISHU_TABLE_ID')
-        self.app_id = os.environ.get('FEISHU_APP_ID')
-        self.app_secret = os.environ.get('FEISHU_APP_SECRET')
-        self.token = None
-        
-        self._get_token()
-    
-    def _get_token(self):
-        """获取飞书token"""
-        url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
-        resp = requests.post(url, json={
-            "app_id": self.app_id,
-            "app_secret": self.app_secret
-        })
-        self.token = resp.json().get("tenant_access_token")
-        print(f"Token获取: {'成功' if self.token else '失败'}")
     
     def get_form_records(self):
         """获取待处理的表单记录"""
-        url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.form_base_id}/tables/{self.form_table_id}/records"
-        headers = {"Authorization": f"Bearer {self.token}"}
+        url = f"{FEISHU_API}/bitable/v1/apps/{self.form_base_id}/tables/{self.form_table_id}/records"
         
         records = []
         page_token = None
@@ -42,8 +53,11 @@ class FormProcessor:
             if page_token:
                 params["page_token"] = page_token
             
-            resp = requests.get(url, headers=headers, params=params)
-            result = resp.json()
+            try:
+                result = feishu_auth.get(url, params=params).json()
+            except Exception as e:
+                print(f"获取表单数据失败: {e}")
+                break
             
             if result.get("code") != 0:
                 print(f"获取表单数据失败: {result}")
@@ -83,32 +97,37 @@ class FormProcessor:
     
     def extract_from_url(self, url):
         """从URL提取内容"""
-        import requests
-        from bs4 import BeautifulSoup
-        import re
-        
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
-            resp = requests.get(url, headers=headers, timeout=15)
+            resp = http_cache.get(url, timeout=15)
             resp.encoding = 'utf-8'
-            soup = BeautifulSoup(resp.text, 'html.parser')
             
-            # 提取标题
-            title = soup.title.string if soup.title else ''
-            h1 = soup.find('h1')
-            if h1:
-                title = h1.get_text(strip=True)
+            # 页面未变化时复用上次解析出的标题和正文
+            parsed = http_cache.load_parsed(resp, 'form', FORM_PARSER_VERSION)
+            if parsed is None:
+                # 正文找不到时要用全文兜底，所以整页解析
+                root = html_backend.parse(resp.text)
             
-            # 提取正文
-            content = ''
-            for selector in ['article', '.content', '.article', '#content', '.detail']:
-                tag = soup.select_one(selector)
-                if tag:
-                    content = tag.get_text(separator='\n', strip=True)
-                    break
+                # 提取标题
+                title = html_backend.title(root)
+                h1 = root.find('h1')
+                if h1:
+                    title = h1.text()
             
-            if not content:
-                content = soup.get_text(separator='\n', strip=True)
+                # 提取正文
+                content = ''
+                for selector in ['article', '.content', '.article', '#content', '.detail']:
+                    tag = root.select_one(selector)
+                    if tag:
+                        content = tag.text(separator='\n')
+                        break
+            
+                if not content:
+                    content = root.text(separator='\n')
+                
+                parsed = {'title': title, 'content': content}
+                http_cache.save_parsed(resp, 'form', parsed, FORM_PARSER_VERSION)
+            
+            title, content = parsed['title'], parsed['content']
             
             # 简单提取
             text = title + ' ' + content
@@ -127,14 +146,10 @@ class FormProcessor:
                 "处理状态": "待清洗"
             }
             
-            # 尝试提取数字
-            scale_match = re.search(r'(\d+\.?\d*)\s*万\s*吨', text)
-            if scale_match:
-                data["近期规模_万吨每日"] = float(scale_match.group(1))
-            
-            inv_match = re.search(r'(\d+\.?\d*)\s*亿', text)
-            if inv_match:
-                data["工程总投资_亿元"] = float(inv_match.group(1))
+            # 提取数字（一次扫描）
+            fields = field_extractor.extract_fields(text)
+            data["近期规模_万吨每日"] = fields['scale']
+            data["工程总投资_亿元"] = fields['investment']
             
             return data
             
@@ -142,14 +157,8 @@ class FormProcessor:
             print(f"提取失败: {e}")
             return None
     
-    def push_to_main(self, data):
-        """推送到主数据表"""
-        url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.main_base_id}/tables/{self.main_table_id}/records"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
-        
+    def _main_fields(self, data):
+        """主表记录的字段"""
         # 处理超链接格式
         url_value = data.get("来源URL", "")
         if url_value and url_value.startswith("http"):
@@ -157,23 +166,28 @@ class FormProcessor:
         else:
             url_field = url_value
         
-        record_data = {
-            "fields": {
-                "项目名称": data.get("项目名称", ""),
-                "数据来源": data.get("数据来源", "用户提交"),
-                "来源URL": url_field,
-                "原文摘要": data.get("原文摘要", "")[:2000],
-                "近期规模_万吨每日": data.get("近期规模_万吨每日"),
-                "工程总投资_亿元": data.get("工程总投资_亿元"),
-                "地理位置": data.get("地理位置", ""),
-                "投资方总包方": data.get("投资方总包方", ""),
-               "抓取时间": int(datetime.now().timestamp()) * 1000,  # 飞书需要毫秒时间戳,
-                "数据置信度": data.get("数据置信度", "低"),
-                "处理状态": data.get("处理状态", "待清洗")
-            }
+        return {
+            "项目名称": data.get("项目名称", ""),
+            "数据来源": data.get("数据来源", "用户提交"),
+            "来源URL": url_field,
+            "原文摘要": data.get("原文摘要", "")[:2000],
+            "近期规模_万吨每日": data.get("近期规模_万吨每日"),
+            "工程总投资_亿元": data.get("工程总投资_亿元"),
+            "地理位置": data.get("地理位置", ""),
+            "投资方总包方": data.get("投资方总包方", ""),
+            "抓取时间": int(datetime.now().timestamp()) * 1000,  # 飞书需要毫秒时间戳
+            "数据置信度": data.get("数据置信度", "低"),
+            "处理状态": data.get("处理状态", "待清洗")
         }
+    
+    def push_to_main(self, data):
+        """推送到主数据表"""
+        url = f"{FEISHU_API}/bitable/v1/apps/{self.main_base_id}/tables/{self.main_table_id}/records"
+        headers = {"Content-Type": "application/json"}
+        
+        record_data = {"fields": self._main_fields(data)}
         
-        resp = requests.post(url, headers=headers, json=record_data)
+        resp = feishu_auth.post(url, headers=headers, json=record_data)
         result = resp.json()
         
         if result.get("code") == 0:
@@ -185,17 +199,14 @@ class FormProcessor:
     
     def mark_processed(self, record_id):
         """标记为已处理"""
-        url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{self.form_base_id}/tables/{self.form_table_id}/records/{record_id}"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
+        url = f"{FEISHU_API}/bitable/v1/apps/{self.form_base_id}/tables/{self.form_table_id}/records/{record_id}"
+        headers = {"Content-Type": "application/json"}
         data = {
             "fields": {
                 "处理状态": "已处理"
             }
         }
-        resp = requests.put(url, headers=headers, json=data)
+        resp = feishu_auth.put(url, headers=headers, json=data)
         return resp.json().get("code") == 0
     
     def process_all(self):
@@ -229,6 +240,129 @@ class FormProcessor:
         print(f"\n总计: 处理 {len(records)} 条，成功 {success} 条")
         return success
 
+    def _batch_post(self, url, records, client_token=None):
+        """
+        调用一次批量接口，返回 BATCH_OK / BATCH_TRANSIENT / BATCH_REJECTED
+        client_token: 幂等键（batch_create 用），同一个键重复提交时飞书只写入一次
+        令牌失效时由 feishu_auth 强制刷新后重试一次
+        """
+        params = {"client_token": client_token} if client_token else None
+        headers = {"Content-Type": "application/json"}
+        try:
+            resp = feishu_auth.post(url, headers=headers, params=params, json={"records": records})
+            result = resp.json()
+        except Exception as e:
+            print(f"  批量请求异常: {e}")
+            return BATCH_TRANSIENT
+        code = result.get("code")
+        if code == 0:
+            return BATCH_OK
+        print(f"  批量请求失败（{len(records)} 条）: {result.get('msg', result)}")
+        if resp.status_code in TRANSIENT_STATUS or code in TRANSIENT_CODES:
+            return BATCH_TRANSIENT
+        return BATCH_REJECTED
+    
+    def _batch_write(self, url, records, batch_size=BATCH_SIZE, idempotent_create=False):
+        """
+        分块调用批量接口，返回每条记录是否成功
+        idempotent_create: 每块带一个 client_token（退避重试时不变，拆开后各自换新的），
+        请求已被飞书写入、但超时或返回 5xx 时重试不会产生重复记录
+        批量接口整块成功或整块失败：
+        - 限流、服务端错误、网络异常与记录内容无关，整块退避后重试，最多 MAX_RETRIES 次
+        - 记录被拒（字段校验等）时对半拆开重试，定位出个别有问题的记录，其余照常写入
+        没写成功的记录保持未处理，下次运行再处理
+        """
+        ok = [False] * len(records)
+        new_token = (lambda: str(uuid.uuid4())) if idempotent_create else (lambda: None)
+        pending = [(list(range(i, min(i + batch_size, len(records)))), 0, new_token())
+                   for i in range(0, len(records), batch_size)]
+        calls = 0
+        while pending:
+            indexes, retries, client_token = pending.pop(0)
+            calls += 1
+            status = self._batch_post(url, [records[i] for i in indexes], client_token)
+            if status == BATCH_OK:
+                for i in indexes:
+                    ok[i] = True
+            elif status == BATCH_TRANSIENT:
+                if retries < MAX_RETRIES:
+                    time.sleep(random.uniform(0, RETRY_DELAY * 2 ** retries))
+                    pending.append((indexes, retries + 1, client_token))
+            elif len(indexes) > 1:
+                half = len(indexes) // 2
+                pending += [(indexes[:half], retries, new_token()), (indexes[half:], retries, new_token())]
+        print(f"  批量写入 {sum(ok)}/{len(records)} 条，调用 {calls} 次")
+        return ok
+    
+    def push_batch(self, datas):
+        """批量推送到主表（records/batch_create），返回每条是否成功"""
+        url = f"{FEISHU_API}/bitable/v1/apps/{self.main_base_id}/tables/{self.main_table_id}/records/batch_create"
+        return self._batch_write(url, [{"fields": self._main_fields(data)} for data in datas],
+                                 idempotent_create=True)
+    
+    def mark_batch(self, record_ids):
+        """批量标记为已处理（records/batch_update），返回每条是否成功"""
+        url = f"{FEISHU_API}/bitable/v1/apps/{self.form_base_id}/tables/{self.form_table_id}/records/batch_update"
+        return self._batch_write(url, [{"record_id": record_id, "fields": {"处理状态": "已处理"}}
+                                       for record_id in record_ids])
+    
+    def _flush(self, extracted):
+        """推送一批已提取的记录，推送成功的再批量标记，返回 (推送成功数, 标记成功数)"""
+        if not extracted:
+            return 0, 0
+        pushed = self.push_batch([data for _, data in extracted])
+        record_ids = [record['record_id'] for (record, _), ok in zip(extracted, pushed) if ok]
+        marked = self.mark_batch(record_ids) if record_ids else []
+        for record_id, ok in zip(record_ids, marked):
+            if not ok:
+                print(f"  ⚠️ 推送成功但标记失败: {record_id}")
+        return len(record_ids), sum(marked)
+    
+    def process_pipelined(self, workers=FETCH_WORKERS, batch_size=BATCH_SIZE):
+        """
+        流水线模式：线程池并发抓取提取，每攒够 batch_size 条就批量推送、批量标记
+        （推送期间其余页面继续抓取）；提取失败的不标记，下次运行再处理
+        """
+        records = self.get_form_records()
+        if not records:
+            print("没有待处理的表单提交")
+            return 0
+        
+        failed_extract = 0
+        pushed = success = 0
+        extracted = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.extract_from_url, record['url']): record for record in records}
+            for future in as_completed(futures):
+                record = futures[future]
+                data = future.result()
+                if not data:
+                    print(f"  提取内容失败，跳过: {record['url'][:60]}")
+                    failed_extract += 1
+                    continue
+                extracted.append((record, data))
+                if len(extracted) >= batch_size:
+                    counts = self._flush(extracted)
+                    pushed, success = pushed + counts[0], success + counts[1]
+                    extracted = []
+        counts = self._flush(extracted)
+        pushed, success = pushed + counts[0], success + counts[1]
+        
+        print(f"\n总计: 处理 {len(records)} 条，提取失败 {failed_extract} 条，"
+              f"推送成功 {pushed} 条，完成 {success} 条")
+        return success
+
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='处理飞书表单提交')
+    parser.add_argument('--pipeline', action='store_true', help='并发抓取 + 批量写入')
+    parser.add_argument('--workers', type=int, default=FETCH_WORKERS, help='流水线模式的抓取线程数')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='流水线模式每批写入条数（最多500）')
+    args = parser.parse_args()
+    
     processor = FormProcessor()
-    processor.process_all()
+    if args.pipeline:
+        processor.process_pipelined(args.workers, min(args.batch_size, BATCH_SIZE))
+    else:
+        processor.process_all()
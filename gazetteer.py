@@ -0,0 +1,166 @@
+"""
+省市地名库 - 导入时把全部地名构建成前缀树并编译为一个正则
+一遍扫描同时得到省份、城市，并按城市反查所属省份
+"""
+
+import re
+
+PROVINCES = [
+    '北京', '天津', '上海', '重庆', '河北', '山西', '辽宁', '吉林', '黑龙江',
+    '江苏', '浙江', '安徽', '福建', '江西', '山东', '河南', '湖北', '湖南',
+    '广东', '海南', '四川', '贵州', '云南', '陕西', '甘肃', '青海', '台湾',
+    '内蒙古', '广西', '西藏', '宁夏', '新疆', '香港', '澳门',
+]
+
+# 省份 -> 地级行政区（直辖市不再细分）
+PROVINCE_CITIES = {
+    '河北': ['石家庄', '唐山', '秦皇岛', '邯郸', '邢台', '保定', '张家口', '承德', '沧州', '廊坊', '衡水'],
+    '山西': ['太原', '大同', '阳泉', '长治', '晋城', '朔州', '晋中', '运城', '忻州', '临汾', '吕梁'],
+    '内蒙古': ['呼和浩特', '包头', '乌海', '赤峰', '通辽', '鄂尔多斯', '呼伦贝尔', '巴彦淖尔', '乌兰察布',
+            '兴安盟', '锡林郭勒盟', '阿拉善盟'],
+    '辽宁': ['沈阳', '大连', '鞍山', '抚顺', '本溪', '丹东', '锦州', '营口', '阜新', '辽阳', '盘锦', '铁岭',
+           '朝阳', '葫芦岛'],
+    '吉林': ['长春', '吉林', '四平', '辽源', '通化', '白山', '松原', '白城', '延边朝鲜族自治州'],
+    '黑龙江': ['哈尔滨', '齐齐哈尔', '鸡西', '鹤岗', '双鸭山', '大庆', '伊春', '佳木斯', '七台河', '牡丹江',
+            '黑河', '绥化', '大兴安岭地区'],
+    '江苏': ['南京', '无锡', '徐州', '常州', '苏州', '南通', '连云港', '淮安', '盐城', '扬州', '镇江', '泰州', '宿迁'],
+    '浙江': ['杭州', '宁波', '温州', '嘉兴', '湖州', '绍兴', '金华', '衢州', '舟山', '台州', '丽水'],
+    '安徽': ['合肥', '芜湖', '蚌埠', '淮南', '马鞍山', '淮北', '铜陵', '安庆', '黄山', '滁州', '阜阳', '宿州',
+           '六安', '亳州', '池州', '宣城'],
+    '福建': ['福州', '厦门', '莆田', '三明', '泉州', '漳州', '南平', '龙岩', '宁德'],
+    '江西': ['南昌', '景德镇', '萍乡', '九江', '新余', '鹰潭', '赣州', '吉安', '宜春', '抚州', '上饶'],
+    '山东': ['济南', '青岛', '淄博', '枣庄', '东营', '烟台', '潍坊', '济宁', '泰安', '威海', '日照', '莱芜',
+           '临沂', '德州', '聊城', '滨州', '菏泽'],
+    '河南': ['郑州', '开封', '洛阳', '平顶山', '安阳', '鹤壁', '新乡', '焦作', '濮阳', '许昌', '漯河', '三门峡',
+           '南阳', '商丘', '信阳', '周口', '驻马店', '济源'],
+    '湖北': ['武汉', '黄石', '十堰', '宜昌', '襄阳', '鄂州', '荆门', '孝感', '荆州', '黄冈', '咸宁', '随州',
+           '恩施土家族苗族自治州', '仙桃', '潜江', '天门'],
+    '湖南': ['长沙', '株洲', '湘潭', '衡阳', '邵阳', '岳阳', '常德', '张家界', '益阳', '郴州', '永州', '怀化',
+           '娄底', '湘西土家族苗族自治州'],
+    '广东': ['广州', '韶关', '深圳', '珠海', '汕头', '佛山', '江门', '湛江', '茂名', '肇庆', '惠州', '梅州',
+           '汕尾', '河源', '阳江', '清远', '东莞', '中山', '潮州', '揭阳', '云浮'],
+    '广西': ['南宁', '柳州', '桂林', '梧州', '北海', '防城港', '钦州', '贵港', '玉林', '百色', '贺州', '河池',
+           '来宾', '崇左'],
+    '海南': ['海口', '三亚', '三沙', '儋州'],
+    '四川': ['成都', '自贡', '攀枝花', '泸州', '德阳', '绵阳', '广元', '遂宁', '内江', '乐山', '南充', '眉山',
+           '宜宾', '广安', '达州', '雅安', '巴中', '资阳', '阿坝藏族羌族自治州', '甘孜藏族自治州',
+           '凉山彝族自治州'],
+    '贵州': ['贵阳', '六盘水', '遵义', '安顺', '毕节', '铜仁', '黔西南布依族苗族自治州',
+           '黔东南苗族侗族自治州', '黔南布依族苗族自治州'],
+    '云南': ['昆明', '曲靖', '玉溪', '保山', '昭通', '丽江', '普洱', '临沧', '楚雄彝族自治州',
+           '红河哈尼族彝族自治州', '文山壮族苗族自治州', '西双版纳傣族自治州', '大理白族自治州',
+           '德宏傣族景颇族自治州', '怒江傈僳族自治州', '迪庆藏族自治州'],
+    '西藏': ['拉萨', '日喀则', '昌都', '林芝', '山南', '那曲', '阿里地区'],
+    '陕西': ['西安', '铜川', '宝鸡', '咸阳', '渭南', '延安', '汉中', '榆林', '安康', '商洛'],
+    '甘肃': ['兰州', '嘉峪关', '金昌', '白银', '天水', '武威', '张掖', '平凉', '酒泉', '庆阳', '定西', '陇南',
+           '临夏回族自治州', '甘南藏族自治州'],
+    '青海': ['西宁', '海东', '海北藏族自治州', '黄南藏族自治州', '海南藏族自治州', '果洛藏族自治州',
+           '玉树藏族自治州', '海西蒙古族藏族自治州'],
+    '宁夏': ['银川', '石嘴山', '吴忠', '固原', '中卫'],
+    '新疆': ['乌鲁木齐', '克拉玛依', '吐鲁番', '哈密', '昌吉回族自治州', '博尔塔拉蒙古自治州',
+           '巴音郭楞蒙古自治州', '阿克苏地区', '克孜勒苏柯尔克孜自治州', '喀什地区', '和田地区',
+           '伊犁哈萨克自治州', '塔城地区', '阿勒泰地区', '石河子', '阿拉尔', '图木舒克', '五家渠', '北屯',
+           '铁门关', '双河', '可克达拉', '昆玉', '胡杨河', '新星'],
+}
+
+# 自治州等常用简称 -> 标准名称
+CITY_ALIASES = {
+    '延边': '延边朝鲜族自治州',
+    '恩施': '恩施土家族苗族自治州',
+    '湘西': '湘西土家族苗族自治州',
+    '阿坝': '阿坝藏族羌族自治州',
+    '甘孜': '甘孜藏族自治州',
+    '凉山': '凉山彝族自治州',
+    '黔西南': '黔西南布依族苗族自治州',
+    '黔东南': '黔东南苗族侗族自治州',
+    '黔南': '黔南布依族苗族自治州',
+    '楚雄': '楚雄彝族自治州',
+    '红河': '红河哈尼族彝族自治州',
+    '文山': '文山壮族苗族自治州',
+    '西双版纳': '西双版纳傣族自治州',
+    '大理': '大理白族自治州',
+    '德宏': '德宏傣族景颇族自治州',
+    '迪庆': '迪庆藏族自治州',
+    '临夏': '临夏回族自治州',
+    '昌吉': '昌吉回族自治州',
+    '伊犁': '伊犁哈萨克自治州',
+    '喀什': '喀什地区',
+    '阿克苏': '阿克苏地区',
+    '大兴安岭': '大兴安岭地区',
+}
+
+CITY_PROVINCE = {
+    city: province
+    for province, cities in PROVINCE_CITIES.items()
+    for city in cities
+}
+
+
+def _build_trie_pattern(words):
+    """
+    把词表构建成前缀树，再展开成一个正则（如 黑(?:龙江|河)）
+    扫描在正则引擎内完成，同一起点贪婪匹配最长的词
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return re.compile(build(trie))
+
+
+_PROVINCE_SET = frozenset(PROVINCES)
+_CITY_NAMES = {city: city for city in CITY_PROVINCE}
+_CITY_NAMES.update(CITY_ALIASES)
+
+# 模块导入时构建一次
+_PATTERN = _build_trie_pattern(PROVINCES + list(_CITY_NAMES))
+
+
+def find_location(text):
+    """
+    一遍扫描提取省份和城市
+    返回: (province, city)，城市未给出省份时按城市反查；找不到为空字符串
+    """
+    if not text:
+        return '', ''
+
+    province = None
+    city = None
+    for match in _PATTERN.finditer(text):
+        word = match.group()
+        if province is None and word in _PROVINCE_SET:
+            province = word
+        # “吉林省”中的“吉林”按省份处理，只有“吉林市”才算城市
+        if city is None and word in _CITY_NAMES:
+            if word not in _PROVINCE_SET or text[match.end():match.end() + 1] == '市':
+                city = word
+        if province and city:
+            break
+
+    province_name = province or ''
+    city_name = _CITY_NAMES[city] if city else ''
+    if city_name and not province_name:
+        province_name = CITY_PROVINCE.get(city_name, '')
+    return province_name, city_name
+
+
+def format_location(province, city):
+    """格式化为“省·市”"""
+    if province and city:
+        return f'{province}·{city}'
+    return province or city or ''
+
+
+def extract_location(text):
+    """提取地理位置，返回“省·市”/“省”/空字符串"""
+    return format_location(*find_location(text))
@@ -0,0 +1,140 @@
+"""
+HTML 解析后端 - 爬虫和表单处理共用
+优先使用已安装的 selectolax（lexbor，C 实现），其次 BeautifulSoup + lxml，最后 BeautifulSoup + html.parser；
+可用环境变量 HTML_BACKEND=selectolax / lxml / html.parser 指定
+BeautifulSoup 后端支持 SoupStrainer 局部解析：只为列表区、正文区建树，其余标签直接丢弃
+"""
+
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    _HAS_LXML = True
+except ImportError:
+    _HAS_LXML = False
+
+
+def available_backends():
+    """当前环境可用的后端"""
+    result = []
+    if LexborHTMLParser is not None:
+        result.append('selectolax')
+    if _HAS_LXML:
+        result.append('lxml')
+    result.append('html.parser')
+    return result
+
+
+def default_backend():
+    backend = os.environ.get('HTML_BACKEND', '')
+    if backend:
+        if backend not in available_backends():
+            raise ValueError(f'HTML解析后端不可用: {backend}（可用: {", ".join(available_backends())}）')
+        return backend
+    return available_backends()[0]
+
+
+class SoupNode:
+    """BeautifulSoup 节点"""
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    def select(self, css):
+        return [SoupNode(tag) for tag in self._tag.select(css)]
+
+    def select_one(self, css):
+        tag = self._tag.select_one(css)
+        return SoupNode(tag) if tag is not None else None
+
+    def find(self, name, string=None):
+        """第一个 name 标签；string 为正则时要求标签只含文字且匹配"""
+        tag = self._tag.find(name, string=string) if string is not None else self._tag.find(name)
+        return SoupNode(tag) if tag is not None else None
+
+    def find_all(self, name, class_pattern):
+        """所有 class 匹配正则的 name 标签"""
+        return [SoupNode(tag) for tag in self._tag.find_all(name, class_=class_pattern)]
+
+    def find_class(self, name, class_pattern):
+        """第一个 class 匹配正则的 name 标签"""
+        tag = self._tag.find(name, class_=class_pattern)
+        return SoupNode(tag) if tag is not None else None
+
+    def text(self, separator='', strip=True):
+        return self._tag.get_text(separator=separator, strip=strip)
+
+    def attr(self, name, default=''):
+        value = self._tag.get(name, default)
+        return ' '.join(value) if isinstance(value, list) else value
+
+
+class LexborNode:
+    """selectolax 节点，接口与 SoupNode 一致"""
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, css):
+        return [LexborNode(node) for node in self._node.css(css)]
+
+    def select_one(self, css):
+        node = self._node.css_first(css)
+        return LexborNode(node) if node is not None else None
+
+    def find(self, name, string=None):
+        for node in self._node.css(name):
+            if string is None:
+                return LexborNode(node)
+            # 与 BeautifulSoup 的 string= 一致：只看没有子标签的节点
+            if next(node.iter(), None) is not None:
+                continue
+            if string.search(node.text(deep=True)):
+                return LexborNode(node)
+        return None
+
+    def find_all(self, name, class_pattern):
+        return [
+            LexborNode(node) for node in self._node.css(name)
+            if class_pattern.search(node.attributes.get('class') or '')
+        ]
+
+    def find_class(self, name, class_pattern):
+        for node in self._node.css(name):
+            if class_pattern.search(node.attributes.get('class') or ''):
+                return LexborNode(node)
+        return None
+
+    def text(self, separator='', strip=True):
+        return self._node.text(deep=True, separator=separator, strip=strip)
+
+    def attr(self, name, default=''):
+        value = self._node.attributes.get(name)
+        return default if value is None else value
+
+
+def parse(html, regions=None, backend=None):
+    """
+    解析HTML，返回根节点
+    regions: 只解析 class 匹配该正则的元素及其子树（仅 BeautifulSoup 后端生效，selectolax 整页解析已足够快）
+             调用方的选择器都必须落在这些区域内
+    """
+    backend = backend or default_backend()
+    if backend == 'selectolax':
+        return LexborNode(LexborHTMLParser(html).root)
+
+    parse_only = SoupStrainer(class_=regions) if regions is not None else None
+    return SoupNode(BeautifulSoup(html, backend, parse_only=parse_only))
+
+
+def title(root):
+    """<title> 文字"""
+    tag = root.select_one('title')
+    return tag.text(strip=False).strip() if tag else ''
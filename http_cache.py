@@ -0,0 +1,242 @@
+"""
+HTTP 条件请求缓存 - 列表页/详情页按URL落盘
+保存 ETag/Last-Modified 和正文哈希，发送 If-None-Match/If-Modified-Since，
+页面未变化（304 或正文哈希相同）时调用方可直接复用上次的解析结果
+解析结果按 (类型, 正文哈希, 解析器版本) 复用，解析逻辑或站点配置改了版本号就不再命中旧结果
+索引改动延迟落盘（最多每 INDEX_SAVE_INTERVAL 秒写一次），进程退出时写入剩余改动；
+进程被强杀时丢失的只是最近的索引条目，对应页面下次重新下载即可
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+
+import http_client
+
+DEFAULT_CACHE_DIR = '.http_cache'
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+
+# 索引两次落盘的最小间隔（秒）；每个请求都重写整个索引会比请求本身还慢
+INDEX_SAVE_INTERVAL = 5.0
+
+
+class CachedResponse:
+    """缓存层返回的响应（接口与 requests.Response 常用部分一致）"""
+
+    def __init__(self, url, status_code, content, headers, changed, body_hash, encoding='utf-8'):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.changed = changed  # False 表示与上次缓存内容相同
+        self.body_hash = body_hash
+        self.encoding = encoding
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f'HTTP {self.status_code}: {self.url}')
+
+
+class HttpCache:
+    """按URL缓存的磁盘HTTP缓存，超出容量时按最近访问时间淘汰"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index = self._load_index()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        atexit.register(self.flush)
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f'读取HTTP缓存索引失败，重建: {e}')
+            return {}
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _mark_dirty(self):
+        """索引有改动（调用时已持有锁）：距上次落盘超过 INDEX_SAVE_INTERVAL 秒才写，其余留给 flush()"""
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= INDEX_SAVE_INTERVAL:
+            self._save_index()
+
+    def flush(self):
+        """把尚未落盘的索引改动写入磁盘（进程退出时自动调用）"""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.cache_dir, f'{key}.{suffix}')
+
+    def _read_body(self, key):
+        try:
+            with open(self._path(key, 'body'), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get(self, url, headers=None, **kwargs):
+        """
+        条件GET，参数同 requests.get
+        返回 CachedResponse，changed=False 表示页面自上次抓取后未变化
+        """
+        key = self._key(url)
+        with self._lock:
+            entry = dict(self.index.get(key) or {})
+
+        req_headers = dict(headers or {})
+        if entry.get('etag'):
+            req_headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            req_headers['If-Modified-Since'] = entry['last_modified']
+
+        resp = http_client.get(url, headers=req_headers, **kwargs)
+
+        if resp.status_code == 304:
+            body = self._read_body(key)
+            if body is not None:
+                self._touch(key)
+                return CachedResponse(url, 200, body, resp.headers, False, entry['body_hash'])
+            # 缓存正文丢失，去掉条件头重新下载
+            resp = http_client.get(url, headers=headers, **kwargs)
+
+        body = resp.content
+        body_hash = hashlib.sha256(body).hexdigest()
+        if resp.status_code != 200:
+            return CachedResponse(url, resp.status_code, body, resp.headers, True, body_hash)
+
+        changed = body_hash != entry.get('body_hash')
+        self._store(key, url, resp, body, body_hash, changed)
+        return CachedResponse(url, resp.status_code, body, resp.headers, changed, body_hash)
+
+    def _store(self, key, url, resp, body, body_hash, changed):
+        with self._lock:
+            if changed or not os.path.exists(self._path(key, 'body')):
+                with open(self._path(key, 'body'), 'wb') as f:
+                    f.write(body)
+                self._drop_parsed(key)
+            self.index[key] = {
+                'url': url,
+                'etag': resp.headers.get('ETag', ''),
+                'last_modified': resp.headers.get('Last-Modified', ''),
+                'body_hash': body_hash,
+                'size': len(body),
+                'last_access': time.time(),
+                'parsed': self.index.get(key, {}).get('parsed', []) if not changed else [],
+            }
+            self._evict()
+            self._mark_dirty()
+
+    def _touch(self, key):
+        with self._lock:
+            if key in self.index:
+                self.index[key]['last_access'] = time.time()
+                self._mark_dirty()
+
+    def load_parsed(self, url, kind, body_hash, version=''):
+        """读取该URL上次的解析结果（仅当正文哈希和解析器版本都一致时有效）"""
+        key = self._key(url)
+        try:
+            with open(self._path(key, f'{kind}.json'), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get('body_hash') != body_hash or saved.get('version', '') != version:
+            return None
+        return saved.get('data')
+
+    def save_parsed(self, url, kind, body_hash, data, version=''):
+        """保存解析结果，下次页面未变化时直接复用"""
+        key = self._key(url)
+        with self._lock:
+            entry = self.index.get(key)
+            if not entry or entry.get('body_hash') != body_hash:
+                return
+            with open(self._path(key, f'{kind}.json'), 'w', encoding='utf-8') as f:
+                json.dump({'body_hash': body_hash, 'version': version, 'data': data}, f, ensure_ascii=False)
+            if kind not in entry['parsed']:
+                entry['parsed'].append(kind)
+                self._mark_dirty()
+
+    def _drop_parsed(self, key):
+        for kind in self.index.get(key, {}).get('parsed', []):
+            try:
+                os.remove(self._path(key, f'{kind}.json'))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """总大小超出上限时，按最近访问时间从旧到新淘汰"""
+        total = sum(e.get('size', 0) for e in self.index.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(self.index, key=lambda k: self.index[k].get('last_access', 0)):
+            if total <= self.max_bytes:
+                break
+            total -= self.index[key].get('size', 0)
+            self._drop_parsed(key)
+            try:
+                os.remove(self._path(key, 'body'))
+            except OSError:
+                pass
+            del self.index[key]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """获取进程内共享的缓存实例"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HttpCache(os.environ.get('HTTP_CACHE_DIR', DEFAULT_CACHE_DIR))
+    return _cache
+
+
+def get(url, **kwargs):
+    """条件GET（走共享缓存）"""
+    return get_cache().get(url, **kwargs)
+
+
+def load_parsed(resp, kind, version=''):
+    """
+    页面未变化时返回上次的解析结果，否则返回 None
+    version: 解析器版本（解析代码或站点配置的版本），与保存时不同则不复用
+    """
+    if resp.changed:
+        return None
+    return get_cache().load_parsed(resp.url, kind, resp.body_hash, version)
+
+
+def save_parsed(resp, kind, data, version=''):
+    """保存本次解析结果"""
+    get_cache().save_parsed(resp.url, kind, resp.body_hash, data, version)
@@ -0,0 +1,185 @@
+"""
+共享HTTP客户端 - 所有模块共用的连接池
+按主机复用 keep-alive 连接，统一请求头、超时和重试
+传 deadline 时限制整个请求（含重试等待和读取正文）的总耗时
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+DEFAULT_HEADERS = {
+    'User-Agent': USER_AGENT,
+    'Accept-Language': 'zh-CN,zh;q=0.9',
+}
+
+DEFAULT_TIMEOUT = 15  # 秒
+
+# 每个主机的连接池大小，需不小于并发抓取的线程数
+POOL_MAXSIZE = 16
+
+# 与 _build_retry 一致的重试设置（deadline 模式下自行重试，等待不超过剩余时间）
+RETRY_STATUS = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+# deadline 模式下每次读取正文的最大字节数
+CHUNK_SIZE = 64 * 1024
+
+_session = None
+_plain_session = None
+_session_lock = threading.Lock()
+
+
+class DeadlineExceeded(requests.Timeout):
+    """请求总耗时超过 deadline"""
+
+
+class _Session(requests.Session):
+    """带默认超时的 Session"""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+def _build_retry():
+    """
+    重试策略：连接失败、429/5xx 指数退避重试
+    POST 等非幂等请求只在连接阶段失败时重试，避免重复写入
+    """
+    return Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=2,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _build_session(retry):
+    session = _Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=POOL_MAXSIZE,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """获取进程内共享的 Session（线程安全的懒加载）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session(_build_retry())
+    return _session
+
+
+def _get_plain_session():
+    """不带自动重试的 Session（deadline 模式自己控制重试）"""
+    global _plain_session
+    if _plain_session is None:
+        with _session_lock:
+            if _plain_session is None:
+                _plain_session = _build_session(0)
+    return _plain_session
+
+
+def request(method, url, deadline=None, **kwargs):
+    """
+    发送请求（参数同 requests.request）
+    deadline: 总耗时上限（秒），含重试等待和读取正文，超过时抛出 DeadlineExceeded；
+    timeout 只限制单次连接/读取，服务器每次只发几个字节的慢速响应可以一直拖下去
+    """
+    if deadline is None:
+        return get_session().request(method, url, **kwargs)
+    return _request_with_deadline(method, url, deadline, **kwargs)
+
+
+def _request_with_deadline(method, url, deadline, timeout=DEFAULT_TIMEOUT, **kwargs):
+    end = time.monotonic() + deadline
+    kwargs['stream'] = True
+    # 与共享 Session 一样，非幂等请求不重试，避免重复写入
+    retryable = method.upper() in Retry.DEFAULT_ALLOWED_METHODS
+    attempt = 0
+    while True:
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f'{url} 超过 {deadline} 秒')
+        if isinstance(timeout, tuple):
+            attempt_timeout = tuple(min(t or remaining, remaining) for t in timeout)
+        else:
+            attempt_timeout = min(timeout or remaining, remaining)
+        error = resp = None
+        try:
+            resp = _get_plain_session().request(method, url, timeout=attempt_timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        if resp is not None and resp.status_code not in RETRY_STATUS:
+            break
+        delay = BACKOFF_FACTOR * 2 ** attempt
+        if not retryable or attempt >= MAX_RETRIES or time.monotonic() + delay >= end:
+            if error is not None:
+                raise error
+            break  # 重试用尽时返回最后一次响应（与 raise_on_status=False 一致）
+        if resp is not None:
+            resp.close()
+        time.sleep(delay)
+        attempt += 1
+
+    _read_until(resp, end, url, deadline)
+    return resp
+
+
+def _read_until(resp, end, url, deadline):
+    """在 end 之前读完正文，存入 resp.content"""
+    raw = resp.raw
+    # read1 每次只等一次 socket 读取；urllib3 1.x 没有 read1，退回 read
+    read = getattr(raw, 'read1', None) or raw.read
+    chunks = []
+    try:
+        while True:
+            if time.monotonic() > end:
+                raise DeadlineExceeded(f'{url} 超过 {deadline} 秒（已读取 {sum(map(len, chunks))} 字节）')
+            chunk = read(CHUNK_SIZE, decode_content=True)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except ReadTimeoutError as e:
+        resp.close()
+        raise requests.ReadTimeout(e, request=resp.request)
+    except ProtocolError as e:
+        resp.close()
+        raise requests.ConnectionError(e, request=resp.request)
+    except Exception:
+        resp.close()
+        raise
+    resp._content = b''.join(chunks)
+    resp._content_consumed = True
+    raw.release_conn()
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request('PUT', url, **kwargs)
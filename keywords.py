@@ -0,0 +1,10 @@
+"""
+关键词表 - 爬虫筛选、正文压缩、相关性预筛共用
+只放常量、不依赖其他模块，谁都可以导入
+"""
+
+# 地下厂特征关键词
+UNDERGROUND_KEYWORDS = [
+    '地下式', '全地下', '地埋式', '下沉式', '地下污水',
+    '地下厂', '箱体', '地下空间', '覆土', '地下一层', '地下二层'
+]
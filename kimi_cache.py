@@ -0,0 +1,171 @@
+"""
+Kimi 提取结果缓存 - 同一篇文章不重复调用 Moonshot API
+键为 (模型, 提示词版本, 规范化后的标题+正文哈希)，与 URL 无关：同一文章换个链接提交也能命中；
+每条结果一个 JSON 文件（原子写入，多进程重放可共用），过期（TTL）或超出条数上限时按最近访问时间淘汰。
+条目里记录当时的 _api_usage，命中时累计节省的 token 数
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+
+DEFAULT_CACHE_DIR = '.kimi_cache'
+DEFAULT_TTL = 30 * 24 * 3600  # 30天
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def normalize(text):
+    """规范化文本：全角转半角、合并空白，排版差异不影响命中"""
+    text = unicodedata.normalize('NFKC', text or '')
+    return ' '.join(text.split())
+
+
+def make_key(model, prompt_version, title, content):
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, normalize(title), normalize(content)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _total_tokens(usage):
+    return (usage or {}).get('total_tokens', 0) or 0
+
+
+class KimiCache:
+    """磁盘上的 Kimi 提取结果缓存"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'tokens_saved': 0, 'tokens_spent': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def get(self, key):
+        """返回缓存条目 {"result", "raw", "usage", ...}，未命中或已过期返回 None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._count('misses')
+            return None
+
+        if time.time() - entry.get('created', 0) > self.ttl:
+            self._remove(path)
+            self._count('misses')
+            return None
+
+        # 以文件修改时间作为最近访问时间
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count('hits', _total_tokens(entry.get('usage')))
+        return entry
+
+    def put(self, key, result, raw=None, model='', prompt_version=''):
+        """保存一次成功的提取结果"""
+        usage = result.get('_api_usage') or {}
+        entry = {
+            'model': model,
+            'prompt_version': prompt_version,
+            'created': time.time(),
+            'usage': usage,
+            'result': result,
+            'raw': raw,
+        }
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.stats['tokens_spent'] += _total_tokens(usage)
+        self._evict()
+
+    def _count(self, name, tokens=0):
+        with self._lock:
+            self.stats[name] += 1
+            self.stats['tokens_saved'] += tokens
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """删除过期条目；超出条数上限时按最近访问时间从旧到新淘汰"""
+        entries = []
+        now = time.time()
+        with os.scandir(self.cache_dir) as it:
+            for item in it:
+                if not item.name.endswith('.json'):
+                    continue
+                try:
+                    mtime = item.stat().st_mtime
+                except OSError:
+                    continue
+                entries.append((mtime, item.path))
+
+        # 文件修改时间不早于创建时间，修改时间已超过 TTL 的必然过期，不必逐个读取
+        fresh = []
+        for mtime, path in entries:
+            if now - mtime > self.ttl:
+                self._remove(path)
+            else:
+                fresh.append((mtime, path))
+
+        if len(fresh) > self.max_entries:
+            fresh.sort()
+            for _, path in fresh[:len(fresh) - self.max_entries]:
+                self._remove(path)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """获取进程内共享的缓存实例"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = KimiCache(os.environ.get('KIMI_CACHE_DIR', DEFAULT_CACHE_DIR))
+    return _cache
+
+
+def lookup(model, prompt_version, url, title, content):
+    """
+    查缓存，命中时返回 (提取结果, 原始返回)，否则返回 None
+    结果中的 _url 换成本次的 URL，并标记 _cache_hit
+    """
+    entry = get_cache().get(make_key(model, prompt_version, title, content))
+    if entry is None:
+        return None
+    result = dict(entry['result'])
+    result['_url'] = url
+    result['_cache_hit'] = True
+    return result, entry.get('raw')
+
+
+def store(model, prompt_version, title, content, result, raw=None):
+    """保存提取结果（降级结果不缓存，下次仍会重试 API）"""
+    if result.get('_fallback') or result.get('_error'):
+        return
+    get_cache().put(make_key(model, prompt_version, title, content), result, raw, model, prompt_version)
+
+
+def stats():
+    """本进程的命中统计"""
+    return dict(get_cache().stats)
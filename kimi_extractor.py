@@ -1,103 +1,55 @@
 """
 Kimi API 提取器 - 从网页内容提取56个字段
+extract 单篇提取（stream=True 时流式接收，可在核心字段齐了后提前结束）；
+extract_batch 多线程批量提取，按每分钟请求数/token 数限速，429/5xx 自动重试
 """
 
 import os
 import json
-import requests
+import random
+import time
+import content_compactor
+import http_client
+import kimi_cache
+import kimi_stream
 import re
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from rate_limiter import RateLimiter
 
-class KimiExtractor:
-    """使用 Moonshot Kimi API 提取结构化信息"""
-    
-    def __init__(self):
-        self.api_key = os.environ.get('KIMI_API_KEY')
-        if not self.api_key:
-            raise ValueError("缺少 KIMI_API_KEY 环境变量")
-        
-        self.api_url = "https://api.moonshot.cn/v1/chat/completions"
-        self.model = "moonshot-v1-8k"  # 或 moonshot-v1-32k 用于长文
-    
-    def extract(self, url, title="", content=""):
-        """
-        提取项目信息
-        返回: (extracted_data, raw_response)
-        """
-        # 清理内容，去除多余空白
-        content = re.sub(r'\n+', '\n', content)
-        content = re.sub(r'\s+', ' ', content)
-        
-        prompt = self._build_prompt(url, title, content[:6000])  # 限制长度
-        
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "model": self.model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "你是专业的环保工程信息提取助手，擅长从新闻、招标公告中提取地下式污水处理厂的详细信息。请严格按照要求的JSON格式返回，没有的信息填null。"
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.1,
-            "response_format": {"type": "json_object"}
-        }
-        
-        try:
-            resp = requests.post(self.api_url, headers=headers, json=data, timeout=60)
-            result = resp.json()
-            
-            if 'choices' in result and len(result['choices']) > 0:
-                raw_content = result['choices'][0]['message']['content']
-                extracted = json.loads(raw_content)
-                
-                # 添加元数据
-                extracted['_url'] = url
-                extracted['_extract_time'] = datetime.now().isoformat()
-                extracted['_api_usage'] = result.get('usage', {})
-                
-                # 计算完整度
-                extracted['_completeness'] = self._calculate_completeness(extracted)
-                
-                return extracted, raw_content
-            else:
-                error_msg = result.get('error', {}).get('message', '未知错误')
-                print(f"Kimi API 返回错误: {error_msg}")
-                return self._fallback(url, title, error_msg), None
-                
-        except json.JSONDecodeError as e:
-            print(f"Kimi 返回非JSON格式: {e}")
-            return self._fallback(url, title, "解析失败"), None
-        except Exception as e:
-            print(f"Kimi API 调用异常: {e}")
-            return self._fallback(url, title, str(e)), None
-    
-    def _build_prompt(self, url, title, content):
-        """构建提取提示词"""
-        return f"""请从以下地下式污水处理厂相关新闻中提取结构化信息。
+# 提示词或字段列表改动时递增，旧的缓存结果随之失效
+PROMPT_VERSION = 'v1'
 
-【来源信息】
-URL: {url}
-标题: {title}
+# 批量提取的默认限速（按账号额度调整，也可用环境变量 KIMI_RPM / KIMI_TPM 指定）
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_TOKENS_PER_MINUTE = 64000
+DEFAULT_WORKERS = 4
 
-【正文内容】
-{content}
+# 限流或服务端错误时重试：指数退避 + 随机抖动，有 Retry-After 时以其为准
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+MAX_RETRIES = 4
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
 
-【提取要求】
-请提取以下56个字段，返回标准JSON格式。没有的信息填 null 或空字符串。
+# 预留给回复的 token 数（56个字段的 JSON）
+COMPLETION_TOKENS = 1500
 
-【字段列表】
+# 正文压缩后的 token 预算；调大后超出 8k 窗口时自动改用 32k 模型
+DEFAULT_CONTENT_TOKENS = 3000
 
-1. 基础信息类：
+# 多篇合并请求：每次最多几篇、每篇正文的 token 预算（列表页摘要等短文）
+PACK_SIZE = 5
+PACK_CONTENT_TOKENS = 600
+PACK_PROMPT_VERSION = PROMPT_VERSION + '-pack'
+
+SYSTEM_PROMPT = "你是专业的环保工程信息提取助手，擅长从新闻、招标公告中提取地下式污水处理厂的详细信息。请严格按照要求的JSON格式返回，没有的信息填null。"
+
+estimate_tokens = content_compactor.estimate_tokens
+
+# 56个字段的说明，单篇和多篇提示词共用
+FIELD_LIST = """1. 基础信息类：
 - 项目名称（标准全称，去掉修饰词）
 - 近期规模（万吨/日，纯数字）
 - 远期总规模（万吨/日，纯数字）
@@ -165,7 +117,401 @@ URL: {url}
 - 安装时长（月，数字）
 - 分期模式（如：分两期建设，近期15万吨/日，远期30万吨/日）
 - 地面开发模式（如：公园、商业、停车场）
-- 绿色能源利用情况（如：光伏发电、余热利用）
+- 绿色能源利用情况（如：光伏发电、余热利用）"""
+
+
+def retry_delay(attempt, retry_after=None):
+    """第 attempt 次重试前的等待秒数"""
+    try:
+        if retry_after:
+            return float(retry_after) + random.uniform(0, RETRY_BASE_DELAY)
+    except ValueError:
+        pass  # Retry-After 为日期格式时按退避计算
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class KimiExtractor:
+    """使用 Moonshot Kimi API 提取结构化信息"""
+    
+    def __init__(self, limiter=None, max_retries=MAX_RETRIES, content_tokens=DEFAULT_CONTENT_TOKENS, prefilter=None):
+        """
+        limiter: 共用的 RateLimiter，None 表示不限速（extract_batch 会自动创建）
+        max_retries: 429/5xx 时的最大重试次数
+        content_tokens: 正文压缩后的 token 预算
+        prefilter: relevance_filter.RelevanceFilter，未通过预筛的页面不调用 API
+        """
+        self.api_key = os.environ.get('KIMI_API_KEY')
+        if not self.api_key:
+            raise ValueError("缺少 KIMI_API_KEY 环境变量")
+        
+        self.api_url = "https://api.moonshot.cn/v1/chat/completions"
+        self.model = None  # 指定后固定使用；None 时按提示词长度自动选择 8k/32k
+        self.content_tokens = content_tokens
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.prefilter = prefilter
+        # 设置后把流式返回的原始 SSE 存到该目录，供本地回放调试
+        self.record_dir = os.environ.get('KIMI_RECORD_DIR')
+    
+    def extract(self, url, title="", content="", stream=False, stop_early=False, on_field=None):
+        """
+        提取项目信息
+        stream: 使用流式接口，字段边生成边解析
+        stop_early: 流式时 项目名称/近期规模/工程总投资/地理位置 都有值后立即断开（结果只含已收到的字段）
+        on_field: 流式时每解析出一个字段就调用 on_field(键, 值)
+        返回: (extracted_data, raw_response)
+        """
+        skipped = self._prefilter(url, title, content)
+        if skipped is not None:
+            return skipped, None
+        return self._extract_one(url, title, content, stream, stop_early, on_field)
+    
+    def _extract_one(self, url, title, content, stream=False, stop_early=False, on_field=None):
+        """单篇提取（不经预筛）"""
+        content = self._clean(content, self.content_tokens)
+        prompt = self._build_prompt(url, title, content)
+        estimated = estimate_tokens(SYSTEM_PROMPT + prompt) + COMPLETION_TOKENS
+        model = self.model or content_compactor.choose_model(estimated)
+        
+        # 同一篇文章已提取过时直接返回，不消耗 token
+        cached = kimi_cache.lookup(model, PROMPT_VERSION, url, title, content)
+        if cached is not None:
+            return cached
+        
+        try:
+            if stream:
+                return self._extract_stream(url, title, content, model, prompt, estimated, stop_early, on_field)
+            
+            result = self._post(model, prompt, estimated)
+            
+            if 'choices' in result and len(result['choices']) > 0:
+                raw_content = result['choices'][0]['message']['content']
+                extracted = json.loads(raw_content)
+                
+                self._add_metadata(extracted, url, result.get('usage', {}))
+                
+                kimi_cache.store(model, PROMPT_VERSION, title, content, extracted, raw_content)
+                return extracted, raw_content
+            else:
+                error_msg = result.get('error', {}).get('message', '未知错误')
+                print(f"Kimi API 返回错误: {error_msg}")
+                return self._fallback(url, title, error_msg), None
+                
+        except json.JSONDecodeError as e:
+            print(f"Kimi 返回非JSON格式: {e}")
+            return self._fallback(url, title, "解析失败"), None
+        except Exception as e:
+            print(f"Kimi API 调用异常: {e}")
+            return self._fallback(url, title, str(e)), None
+    
+    def _prefilter(self, url, title, content):
+        """未通过预筛时返回跳过标记的结果，否则返回 None"""
+        if self.prefilter is None:
+            return None
+        passed, tier, score = self.prefilter.check(title, content)
+        if passed:
+            return None
+        return {
+            "项目名称": title or "未识别项目",
+            "_url": url,
+            "_extract_time": datetime.now().isoformat(),
+            "_completeness": "0%",
+            "_summary": f"预筛未通过（{tier}，分数 {score}），未调用Kimi",
+            "_skipped": tier,
+        }
+    
+    def _clean(self, content, budget):
+        """去除多余空白，再按相关度挑选句子装入预算（原先直接截取前6000字，常把规模、投资所在段落截掉）"""
+        content = re.sub(r'\n+', '\n', content)
+        content = re.sub(r'\s+', ' ', content)
+        return content_compactor.compact(content, budget)
+    
+    def _add_metadata(self, extracted, url, usage):
+        extracted['_url'] = url
+        extracted['_extract_time'] = datetime.now().isoformat()
+        extracted['_api_usage'] = usage
+        
+        # 计算完整度
+        extracted['_completeness'] = self._calculate_completeness(extracted)
+    
+    def _send(self, model, prompt, estimated_tokens, stream=False):
+        """发送请求（限速 + 429/5xx、连接错误/超时重试），返回响应"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        data = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.1,
+            "response_format": {"type": "json_object"}
+        }
+        if stream:
+            data["stream"] = True
+        
+        for attempt in range(self.max_retries + 1):
+            # 每次尝试占一个请求额度；token 额度只在第一次扣（被拒的请求不消耗 token，settle 也只修正一次）
+            if self.limiter is not None:
+                self.limiter.acquire(estimated_tokens if attempt == 0 else 0)
+            try:
+                resp = http_client.post(self.api_url, headers=headers, json=data, timeout=60, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = retry_delay(attempt)
+                print(f"Kimi API 请求异常（{type(e).__name__}），{delay:.1f} 秒后重试（第{attempt + 1}次）")
+                time.sleep(delay)
+                continue
+            if resp.status_code in RETRYABLE_STATUS and attempt < self.max_retries:
+                delay = retry_delay(attempt, resp.headers.get('Retry-After'))
+                print(f"Kimi API 返回 {resp.status_code}，{delay:.1f} 秒后重试（第{attempt + 1}次）")
+                resp.close()
+                time.sleep(delay)
+                continue
+            return resp
+    
+    def _post(self, model, prompt, estimated_tokens):
+        """调用 API，返回解析后的 JSON"""
+        result = self._send(model, prompt, estimated_tokens).json()
+        if self.limiter is not None:
+            usage = result.get('usage') or {}
+            self.limiter.settle(estimated_tokens, usage.get('total_tokens', 0))
+        return result
+    
+    def _extract_stream(self, url, title, content, model, prompt, estimated, stop_early, on_field):
+        """流式提取：增量解析回复中的 JSON，提前结束时只返回已收到的字段（不写缓存）"""
+        resp = self._send(model, prompt, estimated, stream=True)
+        if resp.status_code != 200:
+            try:
+                error_msg = resp.json().get('error', {}).get('message', '未知错误')
+            except ValueError:
+                error_msg = f"HTTP {resp.status_code}"
+            resp.close()
+            print(f"Kimi API 返回错误: {error_msg}")
+            return self._fallback(url, title, error_msg), None
+        
+        parser = kimi_stream.IncrementalJSONParser()
+        usage = {}
+        stopped = False
+        record = None
+        if self.record_dir:
+            os.makedirs(self.record_dir, exist_ok=True)
+            record_path = os.path.join(self.record_dir, f"{datetime.now():%Y%m%d_%H%M%S_%f}.sse")
+            record = open(record_path, 'w', encoding='utf-8')
+        try:
+            events = kimi_stream.iter_events(resp.iter_lines(), record)
+            for delta, event_usage in kimi_stream.iter_deltas(events):
+                usage = event_usage or usage
+                for key, value in parser.feed(delta):
+                    if on_field is not None:
+                        on_field(key, value)
+                if stop_early and not parser.complete and kimi_stream.has_fields(parser.fields):
+                    stopped = True
+                    break
+        finally:
+            resp.close()
+            if record is not None:
+                record.close()
+        
+        if self.limiter is not None and usage:
+            self.limiter.settle(estimated, usage.get('total_tokens', 0))
+        
+        raw_content = parser.text
+        if stopped:
+            extracted = dict(parser.fields)
+            extracted['_partial'] = True
+            self._add_metadata(extracted, url, usage)
+            return extracted, raw_content
+        
+        extracted = json.loads(raw_content)
+        self._add_metadata(extracted, url, usage)
+        kimi_cache.store(model, PROMPT_VERSION, title, content, extracted, raw_content)
+        return extracted, raw_content
+    
+    def extract_batch(self, items, workers=DEFAULT_WORKERS):
+        """
+        并发批量提取
+        items: [(url, title, content), ...]
+        返回与 items 顺序一致的 [(extracted_data, raw_response), ...]
+        """
+        self._ensure_limiter()
+        items = list(items)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map 按提交顺序返回结果
+            results = list(pool.map(lambda item: self.extract(*item), items))
+        failed = sum(1 for extracted, _ in results if extracted.get('_fallback'))
+        print(f"Kimi批量提取: {len(items)}条，失败 {failed}条，用时 {time.perf_counter() - start:.1f} 秒")
+        if self.prefilter is not None:
+            print(self.prefilter.report())
+        return results
+    
+    def _ensure_limiter(self):
+        if self.limiter is None:
+            self.limiter = RateLimiter(
+                int(os.environ.get('KIMI_RPM', DEFAULT_REQUESTS_PER_MINUTE)),
+                int(os.environ.get('KIMI_TPM', DEFAULT_TOKENS_PER_MINUTE)),
+            )
+    
+    def extract_packed(self, items, pack_size=PACK_SIZE, workers=DEFAULT_WORKERS):
+        """
+        多篇合并提取：几篇短文放进一次请求，字段说明每组只发一次（适合每日列表页摘要）
+        items: [(url, title, content), ...]
+        返回与 items 顺序一致的 [(extracted_data, raw_response), ...]；
+        某篇在返回的数组里缺失或格式不对时，单独再请求一次
+        """
+        self._ensure_limiter()
+        items = list(items)
+        results = [None] * len(items)
+        
+        pending = []
+        for index, (url, title, content) in enumerate(items):
+            skipped = self._prefilter(url, title, content)
+            if skipped is not None:
+                results[index] = (skipped, None)
+                continue
+            content = self._clean(content, PACK_CONTENT_TOKENS)
+            # 合并请求的模型随分组变化，缓存键里模型统一记为 pack
+            cached = kimi_cache.lookup('pack', PACK_PROMPT_VERSION, url, title, content)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, url, title, content))
+        
+        packs = self._make_packs(pending, pack_size)
+        start = time.perf_counter()
+        retried = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for pack_results, pack_retried in pool.map(lambda pack: self._extract_pack(pack, items), packs):
+                retried += pack_retried
+                for index, value in pack_results.items():
+                    results[index] = value
+        skipped = sum(1 for result in results if '_skipped' in result[0])
+        cached = len(items) - len(pending) - skipped
+        print(f"Kimi多篇提取: {len(items)}条，预筛跳过 {skipped}条，缓存命中 {cached}条，"
+              f"合并请求 {len(packs)}次，逐篇重试 {retried}条，用时 {time.perf_counter() - start:.1f} 秒")
+        if self.prefilter is not None:
+            print(self.prefilter.report())
+        return results
+    
+    def _make_packs(self, pending, pack_size):
+        """按篇数和上下文窗口分组（每篇的回复也要占 token）"""
+        window = content_compactor.MODELS[-1][1] * content_compactor.WINDOW_USAGE
+        overhead = estimate_tokens(SYSTEM_PROMPT + self._build_pack_prompt([]))
+        packs = []
+        current = []
+        size = overhead
+        for entry in pending:
+            cost = estimate_tokens(entry[1] + entry[2] + entry[3]) + COMPLETION_TOKENS
+            if current and (len(current) >= pack_size or size + cost > window):
+                packs.append(current)
+                current = []
+                size = overhead
+            current.append(entry)
+            size += cost
+        if current:
+            packs.append(current)
+        return packs
+    
+    def _extract_pack(self, pack, items):
+        """
+        一次请求提取一组文章，逐篇校验返回结果
+        返回 ({原始序号: (extracted_data, raw_response)}, 逐篇重试的篇数)
+        """
+        prompt = self._build_pack_prompt(pack)
+        estimated = estimate_tokens(SYSTEM_PROMPT + prompt) + COMPLETION_TOKENS * len(pack)
+        model = self.model or content_compactor.choose_model(estimated)
+        
+        returned = {}
+        usage = {}
+        try:
+            result = self._post(model, prompt, estimated)
+            raw_content = result['choices'][0]['message']['content']
+            usage = result.get('usage') or {}
+            array = json.loads(raw_content).get('items')
+            for item in array if isinstance(array, list) else []:
+                if not isinstance(item, dict) or '项目名称' not in item:
+                    continue
+                # 编号重复时只认第一项
+                returned.setdefault(str(item.get('id')), item)
+        except Exception as e:
+            print(f"Kimi 多篇提取失败，逐篇重试: {e}")
+        
+        # 按篇数平摊本次用量，缓存命中时统计的节省量才不会重复计算
+        share = {key: value // len(pack) for key, value in usage.items() if isinstance(value, int)}
+        results = {}
+        retried = 0
+        for number, (index, url, title, content) in enumerate(pack, start=1):
+            item = returned.get(str(number))
+            if item is None:
+                retried += 1
+                results[index] = self._extract_one(*items[index])
+                continue
+            extracted = {key: value for key, value in item.items() if key != 'id'}
+            self._add_metadata(extracted, url, share)
+            raw = json.dumps(item, ensure_ascii=False)
+            kimi_cache.store('pack', PACK_PROMPT_VERSION, title, content, extracted, raw)
+            results[index] = (extracted, raw)
+        return results, retried
+    
+    def _build_pack_prompt(self, pack):
+        """多篇提取提示词：文章依次编号，要求按编号返回数组"""
+        articles = ''.join(
+            f"【文章{number}】\nURL: {url}\n标题: {title}\n正文: {content}\n\n"
+            for number, (_, url, title, content) in enumerate(pack, start=1)
+        )
+        return f"""请从以下{len(pack)}篇地下式污水处理厂相关新闻中分别提取结构化信息。
+
+{articles}【提取要求】
+对每篇文章分别提取以下56个字段。没有的信息填 null 或空字符串。
+
+【字段列表】
+
+{FIELD_LIST}
+
+【返回格式】
+{{
+    "items": [
+        {{"id": 1, "项目名称": "嘉兴市秀洲区花园式地下污水处理厂", "近期规模": 15, "工程总投资": 12.5, ..., "_completeness": "35%", "_summary": "..."}},
+        {{"id": 2, "项目名称": "...", ...}}
+    ]
+}}
+
+注意：
+1. 只返回JSON，不要其他文字
+2. items 中每篇文章一项，id 与【文章N】的编号 N 一致，不同文章的信息不要混用
+3. 数字字段只返回数字，不要单位
+4. 没有的信息明确填 null
+5. _completeness 和 _summary 是必填的元数据
+"""
+    
+    def _build_prompt(self, url, title, content):
+        """构建提取提示词"""
+        return f"""请从以下地下式污水处理厂相关新闻中提取结构化信息。
+
+【来源信息】
+URL: {url}
+标题: {title}
+
+【正文内容】
+{content}
+
+【提取要求】
+请提取以下56个字段，返回标准JSON格式。没有的信息填 null 或空字符串。
+
+【字段列表】
+
+{FIELD_LIST}
 
 【返回格式】
 {{
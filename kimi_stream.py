@@ -0,0 +1,102 @@
+"""
+Kimi 流式返回 - 解析 SSE（data: {...} / data: [DONE]）并增量解析 JSON
+回复是一个 JSON 对象，每当一个顶层的 "键": 值 完整到达就立即解析出来，
+调用方可以边收边用，核心字段齐了就提前断开
+"""
+
+import json
+
+# 提前结束时要求已经有值的字段
+CORE_FIELDS = ('项目名称', '近期规模', '工程总投资', '地理位置')
+
+
+class IncrementalJSONParser:
+    """增量解析顶层 JSON 对象：只扫描新到的字符，成员完整时解析该成员"""
+
+    def __init__(self):
+        self.text = ''
+        self.fields = {}
+        self.complete = False  # 顶层对象已闭合
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk):
+        """追加一段文本，返回本次新解析出的 [(键, 值), ...]"""
+        self.text += chunk
+        new = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            if self.complete:
+                break
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                continue
+            if c == '"':
+                self._in_string = True
+            elif c in '{[':
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = i + 1
+            elif c in '}]':
+                if self._depth == 1:
+                    self._parse_member(text[self._member_start:i], new)
+                    self.complete = True
+                self._depth -= 1
+            elif c == ',' and self._depth == 1:
+                self._parse_member(text[self._member_start:i], new)
+                self._member_start = i + 1
+        self._pos = len(text)
+        return new
+
+    def _parse_member(self, member, new):
+        if not member.strip():
+            return
+        try:
+            parsed = json.loads('{' + member + '}')
+        except ValueError:
+            return  # 格式不对的成员跳过，最终以完整解析为准
+        for key, value in parsed.items():
+            self.fields[key] = value
+            new.append((key, value))
+
+
+def has_fields(fields, names=CORE_FIELDS):
+    """names 中的字段是否都已有值"""
+    return all(fields.get(name) not in (None, '') for name in names)
+
+
+def iter_events(lines, record=None):
+    """
+    解析 SSE 行，逐个返回 data 的 JSON；遇到 [DONE] 结束
+    record: 可选的文件对象，原样写入收到的每一行（用于录制后在本地回放）
+    """
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if record is not None:
+            record.write(line + '\n')
+        if not line.startswith('data:'):
+            continue
+        payload = line[len('data:'):].strip()
+        if payload == '[DONE]':
+            return
+        yield json.loads(payload)
+
+
+def iter_deltas(events):
+    """从 SSE 事件中取出 (增量文本, usage)；usage 只在最后一个事件里有"""
+    for event in events:
+        choices = event.get('choices') or [{}]
+        choice = choices[0]
+        delta = (choice.get('delta') or {}).get('content') or ''
+        usage = choice.get('usage') or event.get('usage')
+        yield delta, usage
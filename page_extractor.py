@@ -0,0 +1,187 @@
+"""
+网页标题/正文流式提取 - 基于 html.parser 一遍扫描
+边下载边解析，只保留提取出的文字（不保存整页HTML），内存占用有上限；
+<article> 一结束就停止读取，剩余的页面不再下载；class 含 content 的 div 只作后备，
+找到后仍读到 </body>，以免错过后面的 <article>
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser
+
+# 正文最多保留的字符数（Kimi/正则提取只用到前几千字）
+MAX_TEXT_CHARS = 100000
+
+# class 含 content 的 div 少于这么多字时不当作正文（多半是导航、版权栏），继续往后找
+MIN_BODY_CHARS = 200
+
+CHUNK_SIZE = 16 * 1024
+
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+_CONTENT_CLASS = re.compile(r'content', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+class _TextBuffer:
+    """有上限的文字缓冲"""
+
+    def __init__(self, limit=MAX_TEXT_CHARS):
+        self.parts = []
+        self.size = 0
+        self.limit = limit
+
+    def add(self, text):
+        if self.size >= self.limit:
+            return
+        text = text[:self.limit - self.size]
+        self.parts.append(text)
+        self.size += len(text)
+
+    def text(self):
+        return _WHITESPACE.sub(' ', ' '.join(self.parts)).strip()
+
+
+class PageExtractor(HTMLParser):
+    """
+    流式提取标题和正文
+    正文优先级：<article>，其次第一个足够长的 class 含 content 的 div，都没有时用整个 body
+    读到 </article> 或 </body> 时 done=True
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.done = False
+        self._title = _TextBuffer(1000)
+        self._in_title = False
+        self._meta_title = ''  # og:title，<title> 为空时使用（微信文章即如此）
+        self._skip_depth = 0
+        self._body = _TextBuffer()
+        # 当前正在收集的正文容器: (标签, 嵌套深度, 缓冲)
+        self._candidate = None
+        self._article = None
+        self._content_div = None
+        self._short_div = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        if tag == 'title':
+            self._in_title = True
+            return
+        if tag == 'meta' and not self._meta_title:
+            attrs = dict(attrs)
+            if attrs.get('property') == 'og:title':
+                self._meta_title = (attrs.get('content') or '').strip()
+            return
+
+        if self._candidate is not None:
+            if tag == self._candidate[0]:
+                self._candidate[1] += 1
+            elif tag == 'article' and self._article is None:
+                # content div 里套着 article 时改收 article
+                self._candidate = ['article', 1, _TextBuffer()]
+            return
+        if tag == 'article' and self._article is None:
+            self._candidate = ['article', 1, _TextBuffer()]
+        elif tag == 'div' and self._content_div is None:
+            if _CONTENT_CLASS.search(dict(attrs).get('class') or ''):
+                self._candidate = ['div', 1, _TextBuffer()]
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if tag == 'title':
+            self._in_title = False
+            return
+        if tag == 'body':
+            self.done = True
+            return
+
+        candidate = self._candidate
+        if candidate is None or tag != candidate[0]:
+            return
+        candidate[1] -= 1
+        if candidate[1] > 0:
+            return
+
+        self._candidate = None
+        if tag == 'article':
+            self._article = candidate[2]
+            self.done = True
+        elif candidate[2].size >= MIN_BODY_CHARS:
+            # 先作为后备，后面还可能出现 article
+            self._content_div = candidate[2]
+        elif self._short_div is None:
+            # 太短，先记下作为后备，继续找
+            self._short_div = candidate[2]
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self._title.add(data)
+            return
+        self._body.add(data)
+        if self._candidate is not None:
+            self._candidate[2].add(data)
+
+    def result(self):
+        """返回 {"title", "text"}（未读完的页面按已读到的部分计算）"""
+        if self._article is not None:
+            body = self._article
+        elif self._content_div is not None:
+            body = self._content_div
+        elif self._candidate is not None and self._candidate[2].size:
+            body = self._candidate[2]  # 页面截断或标签未闭合
+        elif self._short_div is not None and self._short_div.size:
+            body = self._short_div
+        else:
+            body = self._body
+        title = self._title.text() or _WHITESPACE.sub(' ', self._meta_title)
+        return {"title": title, "text": body.text()}
+
+
+def extract_chunks(chunks, encoding='utf-8'):
+    """
+    从字节块（如 resp.iter_content()）流式提取
+    返回 ({"title", "text"}, 是否提前结束)
+    """
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='ignore')
+    parser = PageExtractor()
+    for chunk in chunks:
+        if not chunk:
+            continue
+        parser.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        if parser.done:
+            return parser.result(), True
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    return parser.result(), False
+
+
+def extract_html(html):
+    """从完整HTML提取（离线重放等场景）"""
+    return extract_chunks([html])[0]
+
+
+def extract_response(resp, chunk_size=CHUNK_SIZE):
+    """
+    从 stream=True 的响应流式提取，正文结束后关闭连接，不再读取剩余内容
+    返回 ({"title", "text"}, 实际读取的字节数)
+    """
+    received = 0
+
+    def chunks():
+        nonlocal received
+        for chunk in resp.iter_content(chunk_size=chunk_size):
+            received += len(chunk)
+            yield chunk
+
+    try:
+        # 微信等页面不声明编码时 requests 会猜成 ISO-8859-1，这里与旧逻辑一致按 utf-8 解码
+        parsed, _ = extract_chunks(chunks(), 'utf-8')
+    finally:
+        resp.close()
+    return parsed, received
@@ -5,18 +5,52 @@
 
 import hashlib
 import re
+from collections import Counter, defaultdict, namedtuple
 from difflib import SequenceMatcher
 from datetime import datetime
 
+import gazetteer
+
+# numpy/scipy 只有批量打分（score_matrix / find_matches）需要，未安装时其余功能不受影响
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+# 项目匹配特征（按原始字段值缓存在匹配器里，不写入项目记录；字段变化后自然算新的）
+# source 为计算时的原始字段值
+ProjectFeatures = namedtuple(
+    'ProjectFeatures', 'name location province scale investment processes source'
+)
+
+_FEATURE_FIELDS = ('项目名称', '地理位置', '近期规模', '工程总投资', '水处理流程')
+_PROCESS_KEYWORD = re.compile(r'[A-Za-z]+')
+
+# 批量打分时复核阈值附近的项目对：上界分数 >= 阈值 - 该值的对用 SequenceMatcher 精确计算
+BATCH_MARGIN = 0.05
+# find_matches 每次打分的新项目行数（控制 N×M 矩阵的内存）
+BATCH_ROWS = 256
+
+
+def _name_tokens(name):
+    """名称的字符多重集：第 k 次出现的字符记为 (字符, k)，两个名称的公共 token 数即按次数取小的公共字符数"""
+    seen = Counter()
+    for ch in name:
+        seen[ch] += 1
+        yield ch, seen[ch]
+
 
 class ProjectMatcher:
     """项目实体识别与合并"""
     
     def __init__(self):
         self.match_threshold = 0.80  # 相似度阈值
-        self.location_pattern = re.compile(
-            r'(北京|天津|上海|重庆|河北|山西|辽宁|吉林|黑龙江|江苏|浙江|安徽|福建|江西|山东|河南|湖北|湖南|广东|海南|四川|贵州|云南|陕西|甘肃|青海|内蒙古|广西|西藏|宁夏|新疆|香港|澳门|台湾)'
-        )
+        self._feature_cache = {}  # 原始字段值 -> ProjectFeatures
     
     def normalize_name(self, name):
         """
@@ -49,29 +83,52 @@ class ProjectMatcher:
         """从文本提取地理位置"""
         if not text:
             return ""
+        return gazetteer.extract_location(text)
+    
+    def _parse_float(self, value):
+        """规模/投资转为浮点数，空值或无法解析返回 None"""
+        if not value:
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    
+    def get_features(self, project):
+        """获取项目的匹配特征（有缓存且字段未变化时直接返回）"""
+        source = tuple(project.get(field) for field in _FEATURE_FIELDS)
+        try:
+            features = self._feature_cache.get(source)
+            cacheable = True
+        except TypeError:  # 字段值不可哈希（如列表）时不缓存
+            features, cacheable = None, False
+        if features is not None:
+            return features
         
-        # 匹配省份
-        prov_match = self.location_pattern.search(text)
-        if prov_match:
-            province = prov_match.group(1)
-            
-            # 尝试匹配城市（常见城市）
-            city_pattern = r'(杭州|宁波|温州|嘉兴|湖州|绍兴|金华|衢州|舟山|台州|丽水|南京|苏州|无锡|常州|徐州|南通|连云港|淮安|盐城|扬州|镇江|泰州|宿迁|广州|深圳|珠海|汕头|佛山|韶关|湛江|肇庆|江门|茂名|惠州|梅州|汕尾|河源|阳江|清远|东莞|中山|潮州|揭阳|云浮)'
-            city_match = re.search(city_pattern, text)
-            
-            if city_match:
-                return f"{province}·{city_match.group(1)}"
-            return province
-        
-        return ""
+        name_raw = project.get('项目名称', '')
+        location = project.get('地理位置', '') or self.extract_location(name_raw)
+        process = project.get('水处理流程', '')
+        features = ProjectFeatures(
+            name=self.normalize_name(name_raw),
+            location=location,
+            province=location.split('·')[0] if location else '',
+            scale=self._parse_float(project.get('近期规模')),
+            investment=self._parse_float(project.get('工程总投资')),
+            processes=frozenset(_PROCESS_KEYWORD.findall(process.upper())) if process else frozenset(),
+            source=source,
+        )
+        if cacheable:
+            self._feature_cache[source] = features
+        return features
     
     def generate_fingerprint(self, project_data):
         """
         生成项目指纹（唯一标识）
         组合：地理位置 + 标准化名称 + 规模
         """
-        location = project_data.get('地理位置', '') or self.extract_location(project_data.get('项目名称', ''))
-        name = self.normalize_name(project_data.get('项目名称', ''))
+        features = self.get_features(project_data)
+        location = features.location
+        name = features.name
         scale = str(project_data.get('近期规模', ''))
         
         # 如果名称太短，用原始名称
@@ -87,71 +144,62 @@ class ProjectMatcher:
         """
         计算两个项目的相似度（0-1）
         """
-        scores = []
+        return self.score_features(self.get_features(proj1), self.get_features(proj2))
+    
+    def score_features(self, f1, f2):
+        """基于预计算特征打分（除名称外都是数值和集合运算）"""
+        total = 0
         
         # 1. 名称相似度（权重35%）
-        name1 = self.normalize_name(proj1.get('项目名称', ''))
-        name2 = self.normalize_name(proj2.get('项目名称', ''))
-        if name1 and name2:
-            name_sim = SequenceMatcher(None, name1, name2).ratio()
-            scores.append(name_sim * 0.35)
+        if f1.name and f2.name:
+            total += SequenceMatcher(None, f1.name, f2.name).ratio() * 0.35
         
         # 2. 地理位置（权重25%）
-        loc1 = proj1.get('地理位置', '') or self.extract_location(proj1.get('项目名称', ''))
-        loc2 = proj2.get('地理位置', '') or self.extract_location(proj2.get('项目名称', ''))
-        if loc1 and loc2:
-            if loc1 == loc2:
-                scores.append(0.25)
-            elif loc1.split('·')[0] == loc2.split('·')[0]:  # 同省不同市
-                scores.append(0.15)
+        if f1.location and f2.location:
+            if f1.location == f2.location:
+                total += 0.25
+            elif f1.province == f2.province:  # 同省不同市
+                total += 0.15
         
         # 3. 规模（权重20%）
-        scale1 = proj1.get('近期规模')
-        scale2 = proj2.get('近期规模')
-        if scale1 and scale2:
-            try:
-                s1, s2 = float(scale1), float(scale2)
-                if max(s1, s2) > 0:
-                    scale_sim = 1.0 - abs(s1 - s2) / max(s1, s2)
-                    scores.append(max(0, scale_sim) * 0.20)
-            except:
-                pass
+        if f1.scale is not None and f2.scale is not None:
+            high = max(f1.scale, f2.scale)
+            if high > 0:
+                total += max(0, 1.0 - abs(f1.scale - f2.scale) / high) * 0.20
         
         # 4. 投资（权重10%）
-        inv1 = proj1.get('工程总投资')
-        inv2 = proj2.get('工程总投资')
-        if inv1 and inv2:
-            try:
-                i1, i2 = float(inv1), float(inv2)
-                if max(i1, i2) > 0:
-                    inv_sim = 1.0 - abs(i1 - i2) / max(i1, i2)
-                    scores.append(max(0, inv_sim) * 0.10)
-            except:
-                pass
-        
-        # 5. 工艺（权重10%）
-        proc1 = proj1.get('水处理流程', '')
-        proc2 = proj2.get('水处理流程', '')
-        if proc1 and proc2:
-            # 简单判断是否有共同关键词
-            keywords1 = set(re.findall(r'[A-Za-z]+', proc1.upper()))
-            keywords2 = set(re.findall(r'[A-Za-z]+', proc2.upper()))
-            if keywords1 & keywords2:  # 有交集
-                scores.append(0.10)
-        
-        total = sum(scores)
+        if f1.investment is not None and f2.investment is not None:
+            high = max(f1.investment, f2.investment)
+            if high > 0:
+                total += max(0, 1.0 - abs(f1.investment - f2.investment) / high) * 0.10
+        
+        # 5. 工艺（权重10%）：有共同关键词
+        if f1.processes & f2.processes:
+            total += 0.10
+        
         return min(total, 1.0)  # 最高1.0
     
+    def build_index(self, projects):
+        """为现有项目建立分块索引，供 find_match 使用"""
+        return ProjectIndex(self, projects)
+    
     def find_match(self, new_project, existing_projects):
         """
         在现有项目中查找最佳匹配
+        existing_projects: 项目列表，或 build_index 返回的 ProjectIndex（只对候选集精确打分）
         返回: (matched_project, similarity) 或 (None, 0)
         """
         best_match = None
         best_score = 0
         
-        for exist in existing_projects:
-            score = self.calculate_similarity(new_project, exist)
+        new_features = self.get_features(new_project)
+        if isinstance(existing_projects, ProjectIndex):
+            pairs = existing_projects.candidate_pairs(new_project)
+        else:
+            pairs = ((exist, self.get_features(exist)) for exist in existing_projects)
+        
+        for exist, features in pairs:
+            score = self.score_features(new_features, features)
             if score > best_score:
                 best_score = score
                 best_match = exist
@@ -161,6 +209,117 @@ class ProjectMatcher:
         
         return None, 0
     
+    def score_matrix(self, projects_a, projects_b, margin=BATCH_MARGIN, exact=False):
+        """
+        批量打分，返回 N×M 的 numpy 数组（第 i 行第 j 列为 projects_a[i] 与 projects_b[j] 的相似度）
+        
+        规模、投资、地理位置、工艺按列式数组整体计算；名称先用字符多重集的 Dice 系数
+        （即 SequenceMatcher.quick_ratio，是 ratio 的上界）通过稀疏矩阵乘法一次算出，
+        总分上界 >= 阈值 - margin 的项目对再用 SequenceMatcher 精确复核。
+        
+        默认（exact=False）只保证 >= 阈值 - margin 的分数与 calculate_similarity 完全一致：
+        其余位置是上界（不低于真实分数、且低于阈值 - margin），与真实分数可相差 0.1 以上，
+        只能用来判断“够不够阈值”，不能当作相似度使用。
+        exact=True 时所有项目对都精确复核，每个分数都与 calculate_similarity 一致（名称逐对比较，慢得多）。
+        """
+        features_a = [self.get_features(p) for p in projects_a]
+        features_b = [self.get_features(p) for p in projects_b]
+        vocab = self._vocabulary(features_a + features_b)
+        return self._score_columns(
+            features_a, self._columns(features_a, vocab),
+            features_b, self._columns(features_b, vocab),
+            # 阈值 - margin <= 0 时每一对都复核
+            self.match_threshold if exact else margin,
+        )
+    
+    def find_matches(self, new_projects, existing_projects, margin=BATCH_MARGIN, block_rows=BATCH_ROWS):
+        """
+        批量版 find_match：对每个新项目返回 (matched_project, similarity) 或 (None, 0)
+        结果与逐个调用 find_match(new_project, existing_projects) 一致
+        """
+        existing_projects = list(existing_projects)
+        features_new = [self.get_features(p) for p in new_projects]
+        features_old = [self.get_features(p) for p in existing_projects]
+        results = [(None, 0)] * len(features_new)
+        if not features_new or not features_old:
+            return results
+        
+        vocab = self._vocabulary(features_new + features_old)
+        columns_old = self._columns(features_old, vocab)
+        for start in range(0, len(features_new), block_rows):
+            block = features_new[start:start + block_rows]
+            scores = self._score_columns(block, self._columns(block, vocab), features_old, columns_old, margin)
+            # argmax 取第一个最大值，与 find_match 中严格大于的比较顺序一致
+            best = scores.argmax(axis=1)
+            for row, col in enumerate(best):
+                score = float(scores[row, col])
+                if score > 0 and score >= self.match_threshold:
+                    results[start + row] = (existing_projects[col], score)
+        return results
+    
+    def _vocabulary(self, features_list):
+        """为一批特征建立编号表（两侧共用，保证列一致）"""
+        if np is None:
+            raise ImportError('批量打分需要 numpy: pip install numpy scipy')
+        vocab = {'location': {}, 'province': {}, 'name': {}, 'process': {}}
+        for f in features_list:
+            if f.location:
+                vocab['location'].setdefault(f.location, len(vocab['location']))
+            vocab['province'].setdefault(f.province, len(vocab['province']))
+            for token in _name_tokens(f.name):
+                vocab['name'].setdefault(token, len(vocab['name']))
+            for keyword in f.processes:
+                vocab['process'].setdefault(keyword, len(vocab['process']))
+        return vocab
+    
+    def _columns(self, features_list, vocab):
+        """把特征列表转成列式数组，空值用 -1 / NaN 表示"""
+        return {
+            'location': np.array([vocab['location'][f.location] if f.location else -1 for f in features_list]),
+            'province': np.array([vocab['province'][f.province] for f in features_list]),
+            'scale': np.array([np.nan if f.scale is None else f.scale for f in features_list], dtype=float),
+            'investment': np.array(
+                [np.nan if f.investment is None else f.investment for f in features_list], dtype=float
+            ),
+            'name_len': np.array([len(f.name) for f in features_list], dtype=float),
+            'name': _indicator([_name_tokens(f.name) for f in features_list], vocab['name']),
+            'process': _indicator([f.processes for f in features_list], vocab['process']),
+        }
+    
+    def _score_columns(self, features_a, cols_a, features_b, cols_b, margin):
+        """按列打分，各项与 score_features 相同的顺序累加"""
+        # 1. 名称：公共字符数 -> Dice 上界
+        common = _overlap(cols_a['name'], cols_b['name'])
+        len_a = cols_a['name_len'][:, None]
+        len_b = cols_b['name_len'][None, :]
+        both_named = (len_a > 0) & (len_b > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            total = np.where(both_named, 2.0 * common / (len_a + len_b), 0.0) * 0.35
+        
+        # 2. 地理位置
+        loc_a = cols_a['location'][:, None]
+        loc_b = cols_b['location'][None, :]
+        same_province = cols_a['province'][:, None] == cols_b['province'][None, :]
+        total = total + np.where(
+            (loc_a >= 0) & (loc_b >= 0),
+            np.where(loc_a == loc_b, 0.25, np.where(same_province, 0.15, 0.0)),
+            0.0,
+        )
+        
+        # 3./4. 规模、投资
+        total = total + _closeness(cols_a['scale'], cols_b['scale']) * 0.20
+        total = total + _closeness(cols_a['investment'], cols_b['investment']) * 0.10
+        
+        # 5. 工艺有共同关键词
+        total = total + np.where(_overlap(cols_a['process'], cols_b['process']) > 0, 0.10, 0.0)
+        total = np.minimum(total, 1.0)
+        
+        # 阈值附近的项目对精确复核
+        rows, cols = np.nonzero(total >= self.match_threshold - margin)
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            total[i, j] = self.score_features(features_a[i], features_b[j])
+        return total
+    
     def merge_projects(self, existing, new_data, source_info):
         """
         合并两个来源的项目信息
@@ -264,6 +423,128 @@ class ProjectMatcher:
         return project_data
 
 
+
+def _indicator(token_lists, vocab):
+    """0/1 矩阵（行: 项目，列: token），装有 scipy 时用稀疏矩阵"""
+    rows, cols = [], []
+    for row, tokens in enumerate(token_lists):
+        for token in tokens:
+            rows.append(row)
+            cols.append(vocab[token])
+    shape = (len(token_lists), max(len(vocab), 1))
+    if sparse is not None:
+        return sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=shape)
+    matrix = np.zeros(shape)
+    matrix[rows, cols] = 1.0
+    return matrix
+
+
+def _overlap(matrix_a, matrix_b):
+    """两组 0/1 矩阵的公共 token 数（N×M 稠密数组）"""
+    product = matrix_a @ matrix_b.T
+    return product.toarray() if sparse is not None else product
+
+
+def _closeness(values_a, values_b):
+    """数值接近程度 max(0, 1 - |a-b| / max(a,b))，任一侧为空或最大值不为正时为 0"""
+    a = values_a[:, None]
+    b = values_b[None, :]
+    high = np.maximum(a, b)
+    valid = ~np.isnan(a) & ~np.isnan(b) & (high > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(valid, np.maximum(0.0, 1.0 - np.abs(a - b) / high), 0.0)
+
+
+class ProjectIndex:
+    """
+    项目分块索引
+    
+    相似度里名称最多0.35、规模0.20、投资0.10、工艺0.10，合计0.75 < 阈值0.80，
+    所以能匹配上的项目必须同省（地理位置得分0.15/0.25）且名称非空。
+    索引按省份分桶，桶内按标准化名称的字符建倒排表，用公共字符数给出
+    SequenceMatcher 相似度的上界，上界都达不到阈值的项目直接跳过。
+    剪枝是无损的：结果与逐个比较完全一致。
+    """
+    
+    def __init__(self, matcher, projects=()):
+        self.matcher = matcher
+        self.projects = []
+        self._features = []
+        self._counts = []
+        self._buckets = defaultdict(lambda: defaultdict(list))  # 省份 -> 字符 -> [(位置, 次数)]
+        for project in projects:
+            self.add(project)
+    
+    def __len__(self):
+        return len(self.projects)
+    
+    def __iter__(self):
+        return iter(self.projects)
+    
+    def add(self, project):
+        """加入一个项目，返回其位置"""
+        position = len(self.projects)
+        self.projects.append(project)
+        self._features.append(None)
+        self._counts.append(None)
+        self._index(position, project)
+        return position
+    
+    def update(self, position, project):
+        """项目字段变化后（如 merge_projects 之后）重建该项目的索引"""
+        self._unindex(position)
+        self.projects[position] = project
+        self._index(position, project)
+    
+    def _index(self, position, project):
+        features = self.matcher.get_features(project)
+        counts = Counter(features.name)
+        self._features[position] = features
+        self._counts[position] = (features.province, counts)
+        if not features.province or not features.name:
+            return
+        bucket = self._buckets[features.province]
+        for ch, count in counts.items():
+            bucket[ch].append((position, count))
+    
+    def _unindex(self, position):
+        province, counts = self._counts[position]
+        if not province or not counts:
+            return
+        bucket = self._buckets[province]
+        for ch in counts:
+            bucket[ch] = [entry for entry in bucket[ch] if entry[0] != position]
+    
+    def candidates(self, new_project):
+        """返回可能达到阈值的项目（保持原顺序，保证同分时结果与逐个比较一致）"""
+        return [project for project, _ in self.candidate_pairs(new_project)]
+    
+    def candidate_pairs(self, new_project):
+        """同 candidates，返回 [(项目, 特征)]"""
+        features = self.matcher.get_features(new_project)
+        if not features.province or not features.name:
+            return []
+        bucket = self._buckets.get(features.province)
+        if not bucket:
+            return []
+        
+        # 公共字符数（按次数取小）
+        common = defaultdict(int)
+        for ch, count in Counter(features.name).items():
+            for position, other_count in bucket.get(ch, ()):
+                common[position] += min(count, other_count)
+        
+        threshold = self.matcher.match_threshold - 1e-9
+        result = []
+        for position in sorted(common):
+            other = self._features[position]
+            location_score = 0.25 if other.location == features.location else 0.15
+            name_bound = 2.0 * common[position] / (len(features.name) + len(other.name))
+            if name_bound * 0.35 + location_score + 0.40 >= threshold:
+                result.append((self.projects[position], other))
+        return result
+
+
 if __name__ == "__main__":
     # 测试
     matcher = ProjectMatcher()
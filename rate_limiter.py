@@ -0,0 +1,63 @@
+"""
+令牌桶限速 - 按“每分钟请求数”和“每分钟 token 数”两个维度限制 API 调用
+多线程共用一个限速器，额度不足时阻塞等待
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """令牌桶：按固定速率补充，容量即允许的突发量"""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """取出 amount 个令牌，不足时等待；返回等待的秒数"""
+        amount = min(amount, self.capacity)  # 超过容量的请求按容量计，否则永远等不到
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def adjust(self, delta):
+        """事后修正：delta > 0 表示实际用量比预估多，从桶里补扣（可为负）"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class RateLimiter:
+    """请求数 + token 数双桶限速"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute=None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def acquire(self, estimated_tokens=0):
+        """发请求前调用；estimated_tokens 为预估的本次 token 用量"""
+        waited = self.requests.acquire(1)
+        if self.tokens is not None and estimated_tokens:
+            waited += self.tokens.acquire(estimated_tokens)
+        return waited
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """拿到实际用量后修正 token 桶"""
+        if self.tokens is not None and actual_tokens:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
@@ -0,0 +1,261 @@
+"""
+相关性预筛 - 调用 Kimi 之前先用便宜的办法排除无关页面
+第一级：关键词 + 地名打分（验证页/错误页、与污水处理无关的页面直接排除）
+第二级：本地字符 n-gram 逻辑回归（纯 Python，模型为 JSON 文件；没有模型文件时跳过）
+通过两级的才调用 Kimi；各级排除的数量记录在 stats 里
+
+第二级只用人工标注训练：用第一级的打分当标签只会让模型学回关键词规则，没有新的信息。
+标注流程:
+  python relevance_filter.py export [--archive-dir web_archives] [--output unlabeled.jsonl]
+    导出通过第一级的存档页面（第二级实际要判断的就是这些），label 为 null，人工改成 0/1
+  python relevance_filter.py train --labels labels.jsonl [--output relevance_model.json]
+    每行 {"text": ..., "label": 0/1}；标注少于 MIN_LABELS 条或只有一类时不训练，也就不启用第二级
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import zlib
+from datetime import datetime
+
+import field_extractor
+import gazetteer
+from keywords import UNDERGROUND_KEYWORDS
+
+DEFAULT_MODEL_PATH = 'relevance_model.json'
+
+# 反爬验证页、错误页：内容再长也不值得送给 Kimi
+BLOCKED_KEYWORDS = ('环境异常', '完成验证后即可继续访问', '访问过于频繁', '请输入验证码', '页面不存在', '404 Not Found')
+WATER_KEYWORDS = ('污水', '再生水', '水质净化', '净水厂', '水务', '排水', '水厂')
+
+KEYWORD_THRESHOLD = 2
+# 第二级只排除把握较大的，宁可多放过几篇给 Kimi
+CLASSIFIER_THRESHOLD = 0.2
+
+# 打分、训练只看前这么多字
+MAX_CHARS = 5000
+
+# 人工标注少于这么多条时不训练第二级
+MIN_LABELS = 30
+
+
+def keyword_score(title, text):
+    """第一级打分：地下厂特征词 3 分，污水处理相关词 2 分，有地名、有规模/投资数字各 1 分；验证页为 -1"""
+    text = f'{title}\n{text[:MAX_CHARS]}'
+    if any(word in text for word in BLOCKED_KEYWORDS) and len(text) < 2000:
+        return -1
+    score = 0
+    if any(word in text for word in UNDERGROUND_KEYWORDS):
+        score += 3
+    if any(word in text for word in WATER_KEYWORDS):
+        score += 2
+    if gazetteer.extract_location(text):
+        score += 1
+    fields = field_extractor.extract_fields(text)
+    if fields['scale'] is not None or fields['investment'] is not None:
+        score += 1
+    return score
+
+
+class NgramClassifier:
+    """字符 n-gram（哈希到固定桶数）+ 逻辑回归"""
+
+    def __init__(self, weights=None, bias=0.0, buckets=1 << 18, ngrams=(2, 3)):
+        self.weights = weights or {}
+        self.bias = bias
+        self.buckets = buckets
+        self.ngrams = tuple(ngrams)
+
+    def features(self, text):
+        """L2 归一化的 n-gram 词频，{桶号: 值}"""
+        text = text[:MAX_CHARS]
+        counts = {}
+        for n in self.ngrams:
+            for i in range(len(text) - n + 1):
+                # crc32 跨进程稳定（内置 hash 每次启动随机）
+                index = zlib.crc32(text[i:i + n].encode('utf-8')) % self.buckets
+                counts[index] = counts.get(index, 0) + 1
+        norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+        return {index: v / norm for index, v in counts.items()}
+
+    def _logit(self, features):
+        return self.bias + sum(self.weights.get(index, 0.0) * v for index, v in features.items())
+
+    def predict_proba(self, text):
+        z = max(-30.0, min(30.0, self._logit(self.features(text))))
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def fit(self, texts, labels, epochs=30, learning_rate=0.5, l2=1e-4, seed=0):
+        """随机梯度下降训练"""
+        samples = [(self.features(text), label) for text, label in zip(texts, labels)]
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(samples)
+            for features, label in samples:
+                z = max(-30.0, min(30.0, self._logit(features)))
+                error = 1.0 / (1.0 + math.exp(-z)) - label
+                for index, v in features.items():
+                    w = self.weights.get(index, 0.0)
+                    self.weights[index] = w - learning_rate * (error * v + l2 * w)
+                self.bias -= learning_rate * error
+        return self
+
+    def save(self, path, provenance=None):
+        data = {
+            'provenance': provenance or {},
+            'buckets': self.buckets,
+            'ngrams': list(self.ngrams),
+            'bias': self.bias,
+            'weights': {str(k): round(v, 6) for k, v in self.weights.items() if abs(v) > 1e-6},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        weights = {int(k): v for k, v in data['weights'].items()}
+        return cls(weights, data['bias'], data['buckets'], data['ngrams'])
+
+
+class RelevanceFilter:
+    """两级预筛，check() 返回 (是否通过, 排除它的级别或 'passed', 分数)"""
+
+    def __init__(self, model_path=None, keyword_threshold=KEYWORD_THRESHOLD,
+                 classifier_threshold=CLASSIFIER_THRESHOLD):
+        model_path = model_path or os.environ.get('RELEVANCE_MODEL', DEFAULT_MODEL_PATH)
+        self.classifier = NgramClassifier.load(model_path) if os.path.exists(model_path) else None
+        if self.classifier is None:
+            print(f'相关性预筛: 没有模型文件 {model_path}，第二级分类器关闭，只用关键词打分'
+                  f'（标注和训练见 README）')
+        self.keyword_threshold = keyword_threshold
+        self.classifier_threshold = classifier_threshold
+        self._lock = threading.Lock()
+        self.stats = {'checked': 0, 'rejected_keyword': 0, 'rejected_classifier': 0, 'passed': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats['checked'] += 1
+            self.stats[name] += 1
+
+    def check(self, title, text):
+        score = keyword_score(title, text)
+        if score < self.keyword_threshold:
+            self._count('rejected_keyword')
+            return False, 'keyword', score
+
+        if self.classifier is not None:
+            probability = self.classifier.predict_proba(f'{title}\n{text}')
+            if probability < self.classifier_threshold:
+                self._count('rejected_classifier')
+                return False, 'classifier', round(probability, 3)
+            score = round(probability, 3)
+
+        self._count('passed')
+        return True, 'passed', score
+
+    def report(self):
+        s = self.stats
+        return (f"预筛: 共{s['checked']}篇，关键词排除 {s['rejected_keyword']}，"
+                f"分类器排除 {s['rejected_classifier']}，送Kimi {s['passed']}")
+
+
+_filter = None
+_filter_lock = threading.Lock()
+
+
+def get_filter():
+    """获取进程内共享的预筛实例"""
+    global _filter
+    if _filter is None:
+        with _filter_lock:
+            if _filter is None:
+                _filter = RelevanceFilter()
+    return _filter
+
+
+def check(title, text):
+    """用共享实例预筛"""
+    return get_filter().check(title, text)
+
+
+def export_candidates(archive_dir, output):
+    """导出通过第一级的存档页面（正文相同的只保留一份），label 留空待人工标注，返回条数"""
+    import page_extractor
+    from replay import iter_documents, read_body
+
+    seen = set()
+    with open(output, 'w', encoding='utf-8') as f:
+        for document in iter_documents(archive_dir):
+            try:
+                html = read_body(document).decode('utf-8', errors='ignore')
+            except (OSError, KeyError) as e:
+                print(f'  跳过 {document["key"]}: {e}')
+                continue
+            parsed = page_extractor.extract_html(html)
+            text = f"{parsed['title']}\n{parsed['text']}"
+            score = keyword_score(parsed['title'], parsed['text'])
+            if score < KEYWORD_THRESHOLD or text in seen:
+                continue
+            seen.add(text)
+            row = {'url': document['url'], 'keyword_score': score, 'text': text, 'label': None}
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    return len(seen)
+
+
+def load_labels(labels_path):
+    """读取人工标注，跳过未标注（label 为 null）的行；同一正文以最后一次标注为准"""
+    examples = {}
+    with open(labels_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get('label') is not None:
+                examples[row['text']] = int(row['label'])
+    return list(examples.keys()), list(examples.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='相关性预筛分类器')
+    sub = parser.add_subparsers(dest='command', required=True)
+    export = sub.add_parser('export', help='导出待标注的存档页面')
+    export.add_argument('--archive-dir', default='web_archives', help='存档目录')
+    export.add_argument('--output', default='unlabeled.jsonl', help='输出文件（JSON Lines）')
+    train = sub.add_parser('train', help='用人工标注训练第二级分类器')
+    train.add_argument('--labels', required=True, help='人工标注（JSON Lines: text, label）')
+    train.add_argument('--output', default=DEFAULT_MODEL_PATH, help='模型文件')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        count = export_candidates(args.archive_dir, args.output)
+        print(f'导出 {count} 条待标注页面到 {args.output}，把 label 改成 0/1 后用 train --labels 训练')
+        return
+
+    texts, labels = load_labels(args.labels)
+    positives = sum(labels)
+    print(f'人工标注 {len(texts)} 条（正例 {positives}，负例 {len(texts) - positives}）')
+    if len(texts) < MIN_LABELS or not positives or positives == len(texts):
+        print(f'需要至少 {MIN_LABELS} 条标注且正负例都有，未训练（第二级保持关闭）')
+        return
+    model = NgramClassifier().fit(texts, labels)
+    correct = sum(1 for text, label in zip(texts, labels) if (model.predict_proba(text) >= 0.5) == bool(label))
+    with open(args.labels, 'rb') as f:
+        labels_sha256 = hashlib.sha256(f.read()).hexdigest()
+    model.save(args.output, {
+        'labels': args.labels,
+        'labels_sha256': labels_sha256,
+        'count': len(texts),
+        'positives': positives,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+    })
+    print(f'训练集准确率 {correct}/{len(texts)}，模型已保存到 {args.output}（{len(model.weights)} 个特征）')
+
+
+if __name__ == '__main__':
+    main()
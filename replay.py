@@ -0,0 +1,150 @@
+"""
+离线重放 - 对存档的原始网页重新执行提取，不访问网络
+先读旧格式的 web_archives/*.html（及同名 .json），再读存档仓库段文件中的每份正文；
+多进程执行 bot_handler 的标题/正文提取和正则字段提取（--kimi 时改用 Kimi 提取），
+结果按存档顺序写入 JSON Lines 文件。提取逻辑改动后可以直接对全部历史存档重新跑一遍。
+
+用法: python replay.py [--archive-dir web_archives] [--output replay_results.jsonl] [--workers N] [--kimi]
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bot_handler
+from archive_store import ArchiveStore, DEFAULT_ARCHIVE_DIR, MANIFEST_FILE
+
+DEFAULT_OUTPUT = 'replay_results.jsonl'
+
+# 每个工作进程各自打开一次存档仓库
+_stores = {}
+
+
+def iter_documents(archive_dir=DEFAULT_ARCHIVE_DIR):
+    """
+    列出要重放的存档（只含元数据，正文由工作进程读取）
+    同一份正文只重放一次；已迁移但保留了原文件的旧存档不重复出现
+    """
+    documents = []
+    legacy_files = set()
+    for html_path in sorted(glob.glob(os.path.join(archive_dir, '*.html'))):
+        meta = {}
+        meta_path = html_path[:-len('.html')] + '.json'
+        if os.path.exists(meta_path):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+        legacy_files.add(os.path.basename(html_path))
+        documents.append({
+            'source': 'legacy',
+            'key': html_path,
+            'url': meta.get('url', ''),
+            'project_id': meta.get('project_id', ''),
+            'archive_time': meta.get('archive_time', ''),
+        })
+
+    if not os.path.exists(os.path.join(archive_dir, MANIFEST_FILE)):
+        return documents
+
+    store = ArchiveStore(archive_dir)
+    seen = set()
+    for entry in store.captures():
+        if entry['sha256'] in seen or entry.get('legacy_file') in legacy_files:
+            continue
+        seen.add(entry['sha256'])
+        documents.append({
+            'source': 'store',
+            'key': entry['sha256'],
+            'archive_dir': archive_dir,
+            'url': entry['url'],
+            'project_id': entry['project_id'],
+            'archive_time': entry['archive_time'],
+        })
+    return documents
+
+
+def read_body(document):
+    """读取 iter_documents 列出的一份存档的原始正文（bytes）"""
+    if document['source'] == 'legacy':
+        with open(document['key'], 'rb') as f:
+            return f.read()
+    archive_dir = document['archive_dir']
+    if archive_dir not in _stores:
+        _stores[archive_dir] = ArchiveStore(archive_dir)
+    return _stores[archive_dir].read(document['key'])
+
+
+def replay_one(document, use_kimi=False):
+    """对一份存档执行与 bot_handler 相同的提取流程"""
+    result = dict(document)
+    result.pop('archive_dir', None)
+    start = time.perf_counter()
+    try:
+        html = read_body(document).decode('utf-8', errors='ignore')
+        parsed = bot_handler.parse_page(html)
+        url = document['url']
+        if use_kimi:
+            extracted = bot_handler.extract_with_kimi(url, parsed['title'], parsed['text'])
+        else:
+            extracted = bot_handler.simple_extract(url, parsed['title'], parsed['text'])
+        result.update({
+            'title': parsed['title'],
+            'content_length': len(parsed['text']),
+            'extracted': extracted,
+        })
+    except Exception as e:
+        result['error'] = str(e)
+    result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def _replay_regex(document):
+    return replay_one(document)
+
+
+def _replay_kimi(document):
+    return replay_one(document, use_kimi=True)
+
+
+def replay(archive_dir=DEFAULT_ARCHIVE_DIR, output=DEFAULT_OUTPUT, workers=None, use_kimi=False):
+    """重放全部存档，返回 (处理数, 失败数)"""
+    documents = iter_documents(archive_dir)
+    if not documents:
+        print(f'{archive_dir} 下没有存档')
+        return 0, 0
+
+    print(f'重放 {len(documents)} 份存档（{"Kimi" if use_kimi else "正则"}提取）...')
+    start = time.perf_counter()
+    errors = 0
+    task = _replay_kimi if use_kimi else _replay_regex
+    with ProcessPoolExecutor(max_workers=workers) as executor, \
+            open(output, 'w', encoding='utf-8') as f:
+        # map 按提交顺序返回，输出顺序与存档顺序一致
+        for result in executor.map(task, documents, chunksize=4):
+            if 'error' in result:
+                errors += 1
+                print(f'  ✗ {result["key"]}: {result["error"]}')
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+    elapsed = time.perf_counter() - start
+    print(f'完成: {len(documents)} 份，失败 {errors} 份，用时 {elapsed:.1f} 秒，结果已保存到 {output}')
+    return len(documents), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线重放存档网页的提取流程')
+    parser.add_argument('--archive-dir', default=DEFAULT_ARCHIVE_DIR, help='存档目录')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='结果文件（JSON Lines）')
+    parser.add_argument('--workers', type=int, default=None, help='进程数，默认CPU核数')
+    parser.add_argument('--kimi', action='store_true', help='使用 Kimi 提取（需要 KIMI_API_KEY，会访问网络）')
+    args = parser.parse_args()
+    replay(args.archive_dir, args.output, args.workers, args.kimi)
+
+
+if __name__ == '__main__':
+    main()
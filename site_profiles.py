@@ -0,0 +1,151 @@
+"""
+站点配置 - 每个采集来源一条声明式配置，由 underground_wastewater_crawler.SiteCrawler 统一执行
+新增来源只需在 SITE_PROFILES 里加一条，不用再写爬虫类
+
+选择器字段是按顺序尝试的候选列表，取第一个有结果的：
+  '.news-list li'                       CSS 选择器
+  {'tag': 'div', 'class': 'item|list'}  class 匹配正则的标签
+  {'tag': 'span', 'text': r'\\d{4}'}     只含文字、且文字匹配正则的标签
+配置在导入时编译一次（正则预编译、局部解析区域自动推导），之后每个列表项直接复用
+"""
+
+import hashlib
+import json
+import re
+from collections import namedtuple
+
+# 详情页正文，各站点通用
+DEFAULT_DETAIL = ['.content-detail', '.article-content', {'tag': 'div', 'class': 'content|article'}]
+
+SITE_PROFILES = [
+    {
+        'name': '中国水网',
+        'base_url': 'https://www.h2o-china.com',
+        'search_url': 'https://www.h2o-china.com/news/search?keyword=地下式污水',
+        'first_page_param': True,  # 第1页也带 &page=1
+        'list': ['.news-list li', '.list-item', {'tag': 'div', 'class': 'item|list'}],
+        'title': ['a'],
+        'summary': ['.summary', '.content', 'p'],
+        'time': ['.time', '.date', {'tag': 'span', 'text': r'\d{4}'}],
+    },
+    {
+        'name': 'E20环境平台',
+        'base_url': 'https://www.e20.com.cn',
+        'search_url': 'https://www.e20.com.cn/search?keyword=地下式污水',
+        'list': ['.news-item', '.list-box', {'tag': 'div', 'class': 'item'}],
+        'title': ['h3 a', 'a'],
+        'summary': ['.intro', 'p'],
+        'time': ['.time', {'tag': 'span', 'text': r'\d{4}-\d{2}'}],
+    },
+    {
+        'name': '北极星环保网',
+        'base_url': 'https://huanbao.bjx.com.cn',
+        'search_url': 'https://huanbao.bjx.com.cn/Search?keyword=地下式污水',
+        'list': ['.list_detail', '.list-item', {'tag': 'dl', 'class': 'list'}],
+        'title': ['h3 a', 'dt a', 'a'],
+        'summary': ['dd', '.summary', 'p'],
+        'time': ['.time', {'tag': 'span', 'text': r'\d{4}'}],
+    },
+]
+
+SiteProfile = namedtuple(
+    'SiteProfile',
+    'name base_url search_url first_page_param items title summary time detail list_regions detail_regions version'
+)
+
+_CSS_CLASS = re.compile(r'\.([\w-]+)')
+
+
+class Selector:
+    """编译后的候选选择器：依次尝试各候选，取第一个有结果的"""
+
+    def __init__(self, specs):
+        self.steps = []
+        for spec in specs:
+            if isinstance(spec, str):
+                self.steps.append(('css', None, spec))
+            elif 'class' in spec:
+                self.steps.append(('class', spec['tag'], re.compile(spec['class'])))
+            elif 'text' in spec:
+                self.steps.append(('text', spec['tag'], re.compile(spec['text'])))
+            else:
+                raise ValueError(f'无法识别的选择器: {spec}')
+
+    def first(self, node):
+        """第一个匹配的节点，没有时返回 None"""
+        for kind, tag, arg in self.steps:
+            if kind == 'css':
+                found = node.select_one(arg)
+            elif kind == 'class':
+                found = node.find_class(tag, arg)
+            else:
+                found = node.find(tag, string=arg)
+            if found is not None:
+                return found
+        return None
+
+    def all(self, node):
+        """第一个有结果的候选匹配到的全部节点"""
+        for kind, tag, arg in self.steps:
+            if kind == 'css':
+                found = node.select(arg)
+            elif kind == 'class':
+                found = node.find_all(tag, arg)
+            else:
+                found = node.find(tag, string=arg)
+                found = [found] if found is not None else []
+            if found:
+                return found
+        return []
+
+    def regions(self):
+        """
+        局部解析需要保留的 class 正则：每个候选都以某个 class 为锚点时才能推导，
+        否则返回 None（整页解析）
+        """
+        parts = []
+        for kind, tag, arg in self.steps:
+            if kind == 'class':
+                parts.append(f'(?:{arg.pattern})')
+                continue
+            classes = _CSS_CLASS.findall(arg) if kind == 'css' else []
+            if not classes:
+                return None
+            # 祖先的 class 在前，保留它即可保留整个子树
+            parts.append(re.escape(classes[0]))
+        return re.compile('|'.join(dict.fromkeys(parts)))
+
+
+def compile_profile(spec):
+    """把一条站点配置编译成 SiteProfile"""
+    missing = [key for key in ('name', 'base_url', 'search_url', 'list', 'title') if not spec.get(key)]
+    if missing:
+        raise ValueError(f'站点配置缺少字段: {", ".join(missing)}')
+    items = Selector(spec['list'])
+    detail = Selector(spec.get('detail', DEFAULT_DETAIL))
+    return SiteProfile(
+        name=spec['name'],
+        base_url=spec['base_url'],
+        search_url=spec['search_url'],
+        first_page_param=spec.get('first_page_param', False),
+        items=items,
+        title=Selector(spec['title']),
+        summary=Selector(spec.get('summary', [])),
+        time=Selector(spec.get('time', [])),
+        detail=detail,
+        list_regions=items.regions(),
+        detail_regions=detail.regions(),
+        # 配置内容的指纹，配置改动后 HTTP 缓存里按旧配置解析的结果不再复用
+        version=hashlib.sha256(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:12],
+    )
+
+
+PROFILES = [compile_profile(spec) for spec in SITE_PROFILES]
+
+
+def get(name):
+    """按站点名取编译好的配置"""
+    for profile in PROFILES:
+        if profile.name == name:
+            return profile
+    raise KeyError(f'没有站点配置: {name}')
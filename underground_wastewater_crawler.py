@@ -1,74 +1,105 @@
 # underground_wastewater_crawler.py
 # 地下式污水处理厂信息采集爬虫
-# 支持：中国水网、E20环境平台、北极星环保网
+# 支持：中国水网、E20环境平台、北极星环保网（站点配置见 site_profiles.py）
 
-import requests
-from bs4 import BeautifulSoup
 import json
+import os
 import re
 from datetime import datetime
 import hashlib
 
+import field_extractor
+import gazetteer
+import html_backend
+import http_cache
+import site_profiles
+from crawl_engine import CrawlEngine
+from crawl_state import CrawlState, DEFAULT_STATE_FILE
+from keywords import UNDERGROUND_KEYWORDS
+
+# 列表页/详情页的解析逻辑（含 field_extractor、gazetteer 的抽取规则）改动时递增，
+# HTTP 缓存里按旧逻辑解析的结果随之不再复用
+PARSER_VERSION = 'v2'
+
 class BaseCrawler:
     """基础爬虫类，统一输出格式"""
     
+    # 解析结果缓存的版本号
+    parser_version = PARSER_VERSION
+    
+    # 详情页正文选择器
+    detail_content = site_profiles.Selector(site_profiles.DEFAULT_DETAIL)
+    # 局部解析时保留的区域（class 匹配的元素及其子树），需覆盖各自选择器用到的 class
+    list_regions = re.compile('item|list')
+    detail_regions = detail_content.regions()
+    
     def __init__(self, source_name):
         self.source_name = source_name
         self.results = []
     
     def extract_underground_features(self, text):
         """识别地下厂特征关键词"""
-        underground_keywords = [
-            '地下式', '全地下', '地埋式', '下沉式', '地下污水', 
-            '地下厂', '箱体', '地下空间', '覆土', '地下一层', '地下二层'
-        ]
-        return any(kw in text for kw in underground_keywords)
+        return any(kw in text for kw in UNDERGROUND_KEYWORDS)
     
     def parse_scale(self, text):
         """提取处理规模（万吨/日）"""
-        patterns = [
-            r'(\d+\.?\d*)\s*万\s*吨[/\\/]日',
-            r'(\d+\.?\d*)\s*万\s*m?³?[/\\/]d',
-            r'处理规模\D*(\d+\.?\d*)\s*万',
-            r'(\d+\.?\d*)\s*万\s*t/d',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                return float(match.group(1))
-        return None
+        return field_extractor.pick(field_extractor.extract_quantities(text), 'scale')
     
     def parse_investment(self, text):
         """提取投资额（亿元）"""
-        patterns = [
-            r'(\d+\.?\d*)\s*亿\s*元',
-            r'投资\D*(\d+\.?\d*)\s*亿',
-            r'总投资\D*(\d+\.?\d*)',
-            r'(\d+\.?\d*)\s*亿',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text)
-            if match:
-                val = float(match.group(1))
-                if val > 0.1 and val < 500:  # 合理范围过滤
-                    return val
-        return None
+        return field_extractor.pick(field_extractor.extract_quantities(text), 'investment')
     
     def parse_location(self, text):
-        """提取地理位置"""
-        # 省市区匹配
-        prov_pattern = r'(北京|天津|上海|重庆|河北|山西|辽宁|吉林|黑龙江|江苏|浙江|安徽|福建|江西|山东|河南|湖北|湖南|广东|海南|四川|贵州|云南|陕西|甘肃|青海|台湾|内蒙古|广西|西藏|宁夏|新疆|香港|澳门)(?:省|市|自治区)?'
-        city_pattern = r'(石家庄|太原|呼和浩特|沈阳|长春|哈尔滨|南京|杭州|合肥|福州|南昌|济南|郑州|武汉|长沙|广州|南宁|海口|成都|贵阳|昆明|拉萨|西安|兰州|西宁|银川|乌鲁木齐|大连|青岛|宁波|厦门|深圳|苏州|无锡|佛山|东莞|常州|徐州|南通|温州|绍兴|嘉兴|烟台|威海|泉州|珠海|中山|惠州|金华|台州|盐城|扬州|镇江|泰州|唐山|保定|邯郸|张家口|承德|沧州|廊坊|衡水|大同|阳泉|长治|晋城|朔州|晋中|运城|忻州|临汾|吕梁|包头|乌海|赤峰|通辽|鄂尔多斯|呼伦贝尔|巴彦淖尔|乌兰察布|兴安盟|锡林郭勒盟|阿拉善盟|鞍山|抚顺|本溪|丹东|锦州|营口|阜新|辽阳|盘锦|铁岭|朝阳|葫芦岛|吉林|四平|辽源|通化|白山|松原|白城|延边朝鲜族自治州|齐齐哈尔|鸡西|鹤岗|双鸭山|大庆|伊春|佳木斯|七台河|牡丹江|黑河|绥化|大兴安岭地区|南京|无锡|徐州|常州|苏州|南通|连云港|淮安|盐城|扬州|镇江|泰州|宿迁|杭州|宁波|温州|嘉兴|湖州|绍兴|金华|衢州|舟山|台州|丽水|合肥|芜湖|蚌埠|淮南|马鞍山|淮北|铜陵|安庆|黄山|滁州|阜阳|宿州|六安|亳州|池州|宣城|福州|厦门|莆田|三明|泉州|漳州|南平|龙岩|宁德|南昌|景德镇|萍乡|九江|新余|鹰潭|赣州|吉安|宜春|抚州|上饶|济南|青岛|淄博|枣庄|东营|烟台|潍坊|济宁|泰安|威海|日照|莱芜|临沂|德州|聊城|滨州|菏泽|郑州|开封|洛阳|平顶山|安阳|鹤壁|新乡|焦作|濮阳|许昌|漯河|三门峡|南阳|商丘|信阳|周口|驻马店|武汉|黄石|十堰|宜昌|襄阳|鄂州|荆门|孝感|荆州|黄冈|咸宁|随州|恩施土家族苗族自治州|长沙|株洲|湘潭|衡阳|邵阳|岳阳|常德|张家界|益阳|郴州|永州|怀化|娄底|湘西土家族苗族自治州|广州|韶关|深圳|珠海|汕头|佛山|江门|湛江|茂名|肇庆|惠州|梅州|汕尾|河源|阳江|清远|东莞|中山|潮州|揭阳|云浮|南宁|柳州|桂林|梧州|北海|防城港|钦州|贵港|玉林|百色|贺州|河池|来宾|崇左|海口|三亚|三沙|儋州|成都|自贡|攀枝花|泸州|德阳|绵阳|广元|遂宁|内江|乐山|南充|眉山|宜宾|广安|达州|雅安|巴中|资阳|阿坝藏族羌族自治州|甘孜藏族自治州|凉山彝族自治州|贵阳|六盘水|遵义|安顺|毕节|铜仁|黔西南布依族苗族自治州|黔东南苗族侗族自治州|黔南布依族苗族自治州|昆明|曲靖|玉溪|保山|昭通|丽江|普洱|临沧|楚雄彝族自治州|红河哈尼族彝族自治州|文山壮族苗族自治州|西双版纳傣族自治州|大理白族自治州|德宏傣族景颇族自治州|怒江傈僳族自治州|迪庆藏族自治州|拉萨|日喀则|昌都|林芝|山南|那曲|阿里地区|西安|铜川|宝鸡|咸阳|渭南|延安|汉中|榆林|安康|商洛|兰州|嘉峪关|金昌|白银|天水|武威|张掖|平凉|酒泉|庆阳|定西|陇南|临夏回族自治州|甘南藏族自治州|西宁|海东市|海北藏族自治州|黄南藏族自治州|海南藏族自治州|果洛藏族自治州|玉树藏族自治州|海西蒙古族藏族自治州|银川|石嘴山|吴忠|固原|中卫|乌鲁木齐|克拉玛依|吐鲁番|哈密|昌吉回族自治州|博尔塔拉蒙古自治州|巴音郭楞蒙古自治州|阿克苏地区|克孜勒苏柯尔克孜自治州|喀什地区|和田地区|伊犁哈萨克自治州|塔城地区|阿勒泰地区|石河子|阿拉尔|图木舒克|五家渠|北屯|铁门关|双河|可克达拉|昆玉|胡杨河|新星)'
+        """提取地理位置（省·市）"""
+        return gazetteer.extract_location(text) or None
+    
+    def fetch_detail(self, url, timeout=15, deadline=None):
+        """获取详情页（提取更完整信息）；deadline 为整个请求的总耗时上限（秒）"""
+        try:
+            resp = http_cache.get(url, timeout=timeout, deadline=deadline)
+            resp.encoding = 'utf-8'
+            cached = http_cache.load_parsed(resp, 'detail', self.parser_version)
+            if cached is not None:
+                return cached
+            detail = self.parse_detail(resp.text)
+            http_cache.save_parsed(resp, 'detail', detail, self.parser_version)
+            return detail
+        except Exception as e:
+            print(f'获取详情页失败 {url}: {e}')
+            return {}
+    
+    def parse_detail(self, html):
+        """解析详情页（只解析正文区域）"""
+        root = html_backend.parse(html, self.detail_regions)
         
-        prov_match = re.search(prov_pattern, text)
-        city_match = re.search(city_pattern, text)
+        # 提取正文
+        content_div = self.detail_content.first(root)
+        content = content_div.text() if content_div else ''
+        
+        # 提取中标单位（常见模式）
+        company_patterns = [
+            r'中标单位[：:]\s*([^\n,，]+)',
+            r'中标人[：:]\s*([^\n,，]+)',
+            r'中标供应商[：:]\s*([^\n,，]+)',
+            r'中标方[：:]\s*([^\n,，]+)',
+            r'中标结果[：:]\s*([^\n,，]+)',
+        ]
+        company = ''
+        for pattern in company_patterns:
+            match = re.search(pattern, content)
+            if match:
+                company = match.group(1).strip()
+                break
         
-        location = ''
-        if prov_match:
-            location = prov_match.group(1)
-        if city_match:
-            location += city_match.group(1) if not location else '·' + city_match.group(1)
-        return location if location else None
+        fields = field_extractor.extract_fields(content)
+        detail = {
+            'full_content': content[:2000],  # 前2000字
+            'company': company,
+            'scale': fields['scale'],
+            'investment': fields['investment'],
+            'location': self.parse_location(content)
+        }
+        return detail
     
     def standardize_output(self, raw_data):
         """统一输出格式（对应56字段模板的核心字段）"""
@@ -107,263 +138,129 @@ class BaseCrawler:
             '地面开发模式': '',
         }
 
-class H2OChinaCrawler(BaseCrawler):
-    """中国水网爬虫"""
+class SiteCrawler(BaseCrawler):
+    """按站点配置（site_profiles）采集的通用爬虫，各站点只在配置上有差别"""
     
-    def __init__(self):
-        super().__init__('中国水网')
-        self.base_url = 'https://www.h2o-china.com'
-        self.search_url = 'https://www.h2o-china.com/news/search?keyword=地下式污水'
-        
-    def fetch_list(self, page=1):
-        """获取列表页"""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            url = f'{self.search_url}&page={page}'
-            resp = requests.get(url, headers=headers, timeout=15)
-            resp.encoding = 'utf-8'
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            
-            items = []
-            # 根据实际页面结构调整选择器
-            news_list = soup.select('.news-list li') or soup.select('.list-item') or soup.find_all('div', class_=re.compile('item|list'))
-            
-            for item in news_list:
-                try:
-                    title_tag = item.select_one('a') or item.find('a')
-                    if not title_tag:
-                        continue
-                        
-                    title = title_tag.get_text(strip=True)
-                    link = title_tag.get('href', '')
-                    if link and not link.startswith('http'):
-                        link = self.base_url + link
-                    
-                    # 过滤地下厂相关
-                    if not self.extract_underground_features(title):
-                        continue
-                    
-                    # 获取摘要
-                    summary_tag = item.select_one('.summary') or item.select_one('.content') or item.find('p')
-                    summary = summary_tag.get_text(strip=True) if summary_tag else ''
-                    
-                    # 获取时间
-                    time_tag = item.select_one('.time') or item.select_one('.date') or item.find('span', string=re.compile(r'\d{4}'))
-                    pub_time = time_tag.get_text(strip=True) if time_tag else ''
-                    
-                    items.append({
-                        'title': title,
-                        'url': link,
-                        'summary': summary,
-                        'publish_time': pub_time,
-                        'scale': self.parse_scale(title + summary),
-                        'investment': self.parse_investment(title + summary),
-                        'company': '',  # 详情页再提取
-                        'location': self.parse_location(title + summary)
-                    })
-                except Exception as e:
-                    print(f'解析列表项出错: {e}')
-                    continue
-            
-            return items
-        except Exception as e:
-            print(f'获取列表页失败: {e}')
-            return []
+    def __init__(self, profile):
+        if isinstance(profile, str):
+            profile = site_profiles.get(profile)
+        super().__init__(profile.name)
+        self.profile = profile
+        self.base_url = profile.base_url
+        self.search_url = profile.search_url
+        self.list_regions = profile.list_regions
+        self.detail_regions = profile.detail_regions
+        self.detail_content = profile.detail
+        self.parser_version = f'{PARSER_VERSION}-{profile.version}'
     
-    def fetch_detail(self, url):
-        """获取详情页（提取更完整信息）"""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            resp = requests.get(url, headers=headers, timeout=15)
-            resp.encoding = 'utf-8'
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            
-            # 提取正文
-            content_div = soup.select_one('.content-detail') or soup.select_one('.article-content') or soup.find('div', class_=re.compile('content|article'))
-            content = content_div.get_text(strip=True) if content_div else ''
-            
-            # 提取中标单位（常见模式）
-            company_patterns = [
-                r'中标单位[：:]\s*([^\n,，]+)',
-                r'中标人[：:]\s*([^\n,，]+)',
-                r'中标供应商[：:]\s*([^\n,，]+)',
-                r'中标方[：:]\s*([^\n,，]+)',
-                r'中标结果[：:]\s*([^\n,，]+)',
-            ]
-            company = ''
-            for pattern in company_patterns:
-                match = re.search(pattern, content)
-                if match:
-                    company = match.group(1).strip()
-                    break
-            
-            return {
-                'full_content': content[:2000],  # 前2000字
-                'company': company,
-                'scale': self.parse_scale(content),
-                'investment': self.parse_investment(content),
-                'location': self.parse_location(content) or self.parse_location(content)
-            }
-        except Exception as e:
-            print(f'获取详情页失败 {url}: {e}')
-            return {}
-
-class E20Crawler(BaseCrawler):
-    """E20环境平台爬虫"""
+    def page_url(self, page):
+        if page > 1 or self.profile.first_page_param:
+            return f'{self.search_url}&page={page}'
+        return self.search_url
     
-    def __init__(self):
-        super().__init__('E20环境平台')
-        self.base_url = 'https://www.e20.com.cn'
-        self.search_url = 'https://www.e20.com.cn/search?keyword=地下式污水'
-        
     def fetch_list(self, page=1):
-        """E20标讯采集"""
+        """获取列表页"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            # E20可能需要登录或有反爬，先尝试公开页面
-            url = f'{self.search_url}&page={page}' if page > 1 else self.search_url
-            resp = requests.get(url, headers=headers, timeout=15)
+            resp = http_cache.get(self.page_url(page), timeout=15)
             resp.encoding = 'utf-8'
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            
-            items = []
-            # E20页面结构（需根据实际调整）
-            news_list = soup.select('.news-item') or soup.select('.list-box') or soup.find_all('div', class_=re.compile('item'))
-            
-            for item in news_list:
-                try:
-                    title_tag = item.select_one('h3 a') or item.select_one('a')
-                    if not title_tag:
-                        continue
-                    
-                    title = title_tag.get_text(strip=True)
-                    link = title_tag.get('href', '')
-                    if link and not link.startswith('http'):
-                        link = self.base_url + link
-                    
-                    if not self.extract_underground_features(title):
-                        continue
-                    
-                    summary_tag = item.select_one('.intro') or item.select_one('p')
-                    summary = summary_tag.get_text(strip=True) if summary_tag else ''
-                    
-                    time_tag = item.select_one('.time') or item.find('span', string=re.compile(r'\d{4}-\d{2}'))
-                    pub_time = time_tag.get_text(strip=True) if time_tag else ''
-                    
-                    items.append({
-                        'title': title,
-                        'url': link,
-                        'summary': summary,
-                        'publish_time': pub_time,
-                        'scale': self.parse_scale(title + summary),
-                        'investment': self.parse_investment(title + summary),
-                        'company': '',
-                        'location': self.parse_location(title + summary)
-                    })
-                except Exception as e:
-                    print(f'解析E20列表项出错: {e}')
-                    continue
-            
+            # 页面未变化时直接复用上次的解析结果
+            cached = http_cache.load_parsed(resp, 'list', self.parser_version)
+            if cached is not None:
+                return cached
+            items = self.parse_list(resp.text)
+            http_cache.save_parsed(resp, 'list', items, self.parser_version)
             return items
         except Exception as e:
-            print(f'获取E20列表失败: {e}')
+            print(f'获取{self.source_name}列表失败: {e}')
             return []
-
-class BjXCrawler(BaseCrawler):
-    """北极星环保网爬虫"""
     
-    def __init__(self):
-        super().__init__('北极星环保网')
-        self.base_url = 'https://huanbao.bjx.com.cn'
-        self.search_url = 'https://huanbao.bjx.com.cn/Search?keyword=地下式污水'
+    def parse_list(self, html):
+        """解析列表页（只解析列表区域）"""
+        profile = self.profile
+        root = html_backend.parse(html, self.list_regions)
         
-    def fetch_list(self, page=1):
-        """北极星环保网"""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            url = f'{self.search_url}&page={page}' if page > 1 else self.search_url
-            resp = requests.get(url, headers=headers, timeout=15)
-            resp.encoding = 'utf-8'
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            
-            items = []
-            # 北极星页面结构
-            news_list = soup.select('.list_detail') or soup.select('.list-item') or soup.find_all('dl', class_=re.compile('list'))
-            
-            for item in news_list:
-                try:
-                    title_tag = item.select_one('h3 a') or item.select_one('dt a') or item.select_one('a')
-                    if not title_tag:
-                        continue
-                    
-                    title = title_tag.get_text(strip=True)
-                    link = title_tag.get('href', '')
-                    if link and not link.startswith('http'):
-                        link = self.base_url + link
-                    
-                    if not self.extract_underground_features(title):
-                        continue
-                    
-                    # 北极星摘要在dd标签
-                    summary_tag = item.select_one('dd') or item.select_one('.summary') or item.find('p')
-                    summary = summary_tag.get_text(strip=True) if summary_tag else ''
-                    
-                    # 时间
-                    time_tag = item.select_one('.time') or item.find('span', string=re.compile(r'\d{4}'))
-                    pub_time = time_tag.get_text(strip=True) if time_tag else ''
-                    
-                    items.append({
-                        'title': title,
-                        'url': link,
-                        'summary': summary,
-                        'publish_time': pub_time,
-                        'scale': self.parse_scale(title + summary),
-                        'investment': self.parse_investment(title + summary),
-                        'company': '',
-                        'location': self.parse_location(title + summary)
-                    })
-                except Exception as e:
-                    print(f'解析北极星列表项出错: {e}')
+        items = []
+        for item in profile.items.all(root):
+            try:
+                title_tag = profile.title.first(item)
+                if not title_tag:
                     continue
-            
-            return items
-        except Exception as e:
-            print(f'获取北极星列表失败: {e}')
-            return []
+                
+                title = title_tag.text()
+                link = title_tag.attr('href')
+                if link and not link.startswith('http'):
+                    link = self.base_url + link
+                
+                # 过滤地下厂相关
+                if not self.extract_underground_features(title):
+                    continue
+                
+                summary_tag = profile.summary.first(item)
+                summary = summary_tag.text() if summary_tag else ''
+                
+                time_tag = profile.time.first(item)
+                pub_time = time_tag.text() if time_tag else ''
+                
+                # 规模、投资一次扫描提取
+                fields = field_extractor.extract_fields(title + summary)
+                
+                items.append({
+                    'title': title,
+                    'url': link,
+                    'summary': summary,
+                    'publish_time': pub_time,
+                    'scale': fields['scale'],
+                    'investment': fields['investment'],
+                    'company': '',  # 详情页再提取
+                    'location': self.parse_location(title + summary)
+                })
+            except Exception as e:
+                print(f'解析{self.source_name}列表项出错: {e}')
+                continue
+        
+        return items
 
-def run_all_crawlers(pages=2):
-    """运行所有爬虫"""
+def run_all_crawlers(pages=2, max_workers=6, per_host_limit=2,
+                     fetch_details=True, detail_timeout=15, detail_budget=120,
+                     incremental=False, backfill=False, state_path=DEFAULT_STATE_FILE):
+    """
+    运行所有爬虫（各站点列表页并发抓取）
+    fetch_details: 是否并发抓取详情页补充字段
+    detail_timeout / detail_budget: 单个详情页超时、详情阶段总时间预算（秒）
+    incremental: 增量模式，只输出新条目，遇到全部已知的页即停止翻页（pages 为翻页上限）
+    backfill: 深度回填，抓满 pages 页并全部输出，同时更新增量状态
+    """
     all_results = []
     
-    crawlers = [
-        H2OChinaCrawler(),
-        E20Crawler(),
-        BjXCrawler()
-    ]
+    crawlers = [SiteCrawler(profile) for profile in site_profiles.PROFILES]
     
-    for crawler in crawlers:
-        print(f'\n=== 开始抓取: {crawler.source_name} ===')
-        for page in range(1, pages + 1):
-            print(f'  正在获取第{page}页...')
-            items = crawler.fetch_list(page)
-            if not items:
-                break
-            
-            # 获取详情页补充信息（可选，会慢一些）
-            for item in items:
-                if item.get('url'):
-                    # 可以在这里调用fetch_detail，但会大幅增加时间
-                    # detail = crawler.fetch_detail(item['url'])
-                    # item.update(detail)
-                    pass
+    engine = CrawlEngine(crawlers, max_workers=max_workers, per_host_limit=per_host_limit)
+    state = CrawlState(state_path) if (incremental or backfill) else None
+    
+    if incremental and not backfill:
+        print(f'\n=== 增量抓取 {len(crawlers)} 个站点，每站最多{pages}页 ===')
+        for crawler in crawlers:
+            latest = state.latest_publish_time(crawler.source_name)
+            if latest:
+                print(f'  {crawler.source_name} 上次抓到的最新发布时间: {latest}')
+        site_pages = engine.fetch_lists_incremental(
+            lambda crawler, item: not state.is_known(crawler.source_name, item),
+            max_pages=pages
+        )
+    else:
+        print(f'\n=== 并发抓取 {len(crawlers)} 个站点，每站最多{pages}页 ===')
+        site_pages = engine.fetch_lists(pages)
+    
+    # 获取详情页补充信息（并发，受时间预算限制）
+    if fetch_details:
+        jobs = [(crawler, item) for crawler, page_items in site_pages for items in page_items for item in items]
+        print(f'\n=== 并发抓取详情页: {len(jobs)}条 ===')
+        engine.enrich_details(jobs, item_timeout=detail_timeout, budget=detail_budget)
+    
+    for crawler, page_items in site_pages:
+        print(f'\n=== 抓取结果: {crawler.source_name} ===')
+        for page, items in enumerate(page_items, start=1):
+            print(f'  第{page}页: {len(items)}条')
             
             # 标准化输出
             for item in items:
@@ -373,6 +270,12 @@ def run_all_crawlers(pages=2):
         
         print(f'  {crawler.source_name} 完成，本站点共{len([r for r in all_results if r["数据来源"]==crawler.source_name])}条')
     
+    # 推进增量高水位
+    if state is not None:
+        for crawler, page_items in site_pages:
+            state.record(crawler.source_name, [item for items in page_items for item in items])
+        state.save()
+    
     # 去重（基于URL）
     seen_urls = set()
     unique_results = []
@@ -384,6 +287,22 @@ def run_all_crawlers(pages=2):
     print(f'\n=== 总计: {len(unique_results)}条不重复数据 ===')
     return unique_results
 
+def load_json(filename='underground_wastewater_data.json'):
+    """读取之前保存的数据，文件不存在或损坏时返回空列表"""
+    if not os.path.exists(filename):
+        return []
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f'读取 {filename} 失败: {e}')
+        return []
+
+def merge_results(existing, new_items):
+    """把本次结果合并进已有数据（按来源URL去重，同一URL以本次为准）"""
+    new_urls = {r['来源URL'] for r in new_items}
+    return [r for r in existing if r.get('来源URL') not in new_urls] + new_items
+
 def save_to_json(data, filename='underground_wastewater_data.json'):
     """保存为JSON"""
     with open(filename, 'w', encoding='utf-8') as f:
@@ -407,10 +326,33 @@ def save_to_csv(data, filename='underground_wastewater_data.csv'):
     print(f'数据已保存: {filename}')
 
 if __name__ == '__main__':
-    # 运行爬虫（默认每站抓2页）
-    results = run_all_crawlers(pages=2)
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='地下式污水处理厂信息采集')
+    parser.add_argument('--pages', type=int, default=None, help='每站翻页上限（默认：普通模式2页，增量模式10页，回填50页）')
+    parser.add_argument('--incremental', action='store_true', help='增量模式：只抓新条目')
+    parser.add_argument('--backfill', action='store_true', help='深度回填：抓满翻页上限并更新增量状态')
+    parser.add_argument('--no-details', action='store_true', help='不抓取详情页')
+    args = parser.parse_args()
+    
+    if args.backfill:
+        pages = args.pages or 50
+    elif args.incremental:
+        pages = args.pages or 10
+    else:
+        pages = args.pages or 2
+    
+    results = run_all_crawlers(
+        pages=pages,
+        fetch_details=not args.no_details,
+        incremental=args.incremental,
+        backfill=args.backfill
+    )
     
-    # 保存数据
+    # 保存数据：增量模式只抓到新条目，单独存一份后合并进完整数据，不覆盖以前的数据
+    if args.incremental and not args.backfill:
+        save_to_json(results, 'underground_wastewater_new.json')
+        results = merge_results(load_json(), results)
     save_to_json(results)
     save_to_csv(results)
     